@@ -2,7 +2,15 @@ import re
 from collections import Counter
 from textstat import textstat
 
+from text_analysis import get_document
+
 def analyze_readability(text):
+    doc = get_document(text)
+    if 'readability' not in doc.derived:
+        doc.derived['readability'] = _textstat_readability(doc.text)
+    return dict(doc.derived['readability'])
+
+def _textstat_readability(text):
     return {
         'flesch_reading_ease': round(textstat.flesch_reading_ease(text), 1),
         'flesch_kincaid_grade': round(textstat.flesch_kincaid_grade(text), 1),
@@ -15,8 +23,7 @@ def analyze_readability(text):
     }
 
 def analyze_keywords(text, top_n=20):
-    text_clean = re.sub(r'[^\w\s]', '', text.lower())
-    words = text_clean.split()
+    doc = get_document(text)
     
     stop_words = {'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 
                   'of', 'with', 'by', 'from', 'as', 'is', 'was', 'are', 'were', 'be',
@@ -24,21 +31,19 @@ def analyze_keywords(text, top_n=20):
                   'would', 'should', 'could', 'may', 'might', 'must', 'can', 'this',
                   'that', 'these', 'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they'}
     
-    filtered_words = [w for w in words if len(w) > 3 and w not in stop_words]
+    keyword_counts = Counter({w: n for w, n in doc.bare_word_counter.items()
+                              if len(w) > 3 and w not in stop_words})
+    total_filtered = sum(keyword_counts.values())
     
-    keyword_counts = Counter(filtered_words)
-    
-    return [{'keyword': word, 'count': count, 'density': round((count / len(filtered_words)) * 100, 2)}
+    return [{'keyword': word, 'count': count, 'density': round((count / total_filtered) * 100, 2)}
             for word, count in keyword_counts.most_common(top_n)]
 
 def analyze_sentence_structure(text):
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    
-    sentence_lengths = [len(s.split()) for s in sentences]
+    doc = get_document(text)
+    sentence_lengths = doc.sentence_lengths
     
     return {
-        'total_sentences': len(sentences),
+        'total_sentences': doc.sentence_count,
         'avg_sentence_length': round(sum(sentence_lengths) / len(sentence_lengths), 1) if sentence_lengths else 0,
         'max_sentence_length': max(sentence_lengths) if sentence_lengths else 0,
         'min_sentence_length': min(sentence_lengths) if sentence_lengths else 0,
@@ -64,14 +69,14 @@ def analyze_tone_sentiment(text):
                    'actually', 'really', 'pretty', 'quite', 'super', 'kinda', 'gonna',
                    'wanna', 'stuff', 'things', 'guys', 'folks'}
     
-    words = re.findall(r'\b\w+\b', text.lower())
+    words = get_document(text).token_counter
     
-    pos_count = sum(1 for w in words if w in positive_words)
-    neg_count = sum(1 for w in words if w in negative_words)
-    prof_count = sum(1 for w in words if w in professional_words)
-    cas_count = sum(1 for w in words if w in casual_words)
+    pos_count = sum(words[w] for w in positive_words)
+    neg_count = sum(words[w] for w in negative_words)
+    prof_count = sum(words[w] for w in professional_words)
+    cas_count = sum(words[w] for w in casual_words)
     
-    total_words = len(words)
+    total_words = sum(words.values())
     
     sentiment_score = ((pos_count - neg_count) / total_words * 100) if total_words > 0 else 0
     
@@ -91,6 +96,7 @@ def analyze_tone_sentiment(text):
     }
 
 def analyze_engagement_potential(text, title):
+    doc = get_document(text)
     engagement_score = 50
     
     title_length = len(title.split())
@@ -105,26 +111,22 @@ def analyze_engagement_potential(text, title):
     if '?' in title or '!' in title or ':' in title:
         engagement_score += 5
     
-    word_count = len(text.split())
+    word_count = doc.word_count
     if 800 <= word_count <= 2000:
         engagement_score += 10
     elif word_count > 2000:
         engagement_score += 5
     
-    paragraphs = text.split('\n\n')
-    short_paragraphs = len([p for p in paragraphs if len(p.split()) < 50])
-    if short_paragraphs / len(paragraphs) > 0.6:
+    if doc.short_paragraph_count / doc.paragraph_count > 0.6:
         engagement_score += 10
     
-    headings = len(re.findall(r'^#{1,3}\s', text, re.MULTILINE))
-    if headings >= 5:
+    if doc.h1_h3_count >= 5:
         engagement_score += 10
     
-    lists = len(re.findall(r'^\*\s|^\d+\.\s', text, re.MULTILINE))
-    if lists > 0:
+    if doc.bullet_or_numbered_count > 0:
         engagement_score += 5
     
-    questions = len(re.findall(r'\?', text))
+    questions = doc.count('?')
     if questions >= 3:
         engagement_score += 5
     
@@ -151,19 +153,20 @@ def calculate_viral_potential(text, title, seo_score):
     elif seo_score >= 60:
         viral_score += 10
     
-    word_count = len(text.split())
+    word_count = get_document(text).word_count
     if 1200 <= word_count <= 1800:
         viral_score += 10
     
     return min(100, max(0, viral_score))
 
 def generate_content_insights(text, title):
-    word_count = len(text.split())
+    doc = get_document(text)
+    word_count = doc.word_count
     
-    readability = analyze_readability(text)
-    keywords = analyze_keywords(text)
-    sentence_structure = analyze_sentence_structure(text)
-    tone_sentiment = analyze_tone_sentiment(text)
+    readability = analyze_readability(doc)
+    keywords = analyze_keywords(doc)
+    sentence_structure = analyze_sentence_structure(doc)
+    tone_sentiment = analyze_tone_sentiment(doc)
     
     insights = []
     
@@ -197,7 +200,7 @@ def generate_content_insights(text, title):
             'message': 'Title is too long. Keep it under 12 words for better click-through rates.'
         })
     
-    headings_count = len(re.findall(r'^#{1,3}\s', text, re.MULTILINE))
+    headings_count = doc.h1_h3_count
     if headings_count < 3:
         insights.append({
             'type': 'warning',
@@ -233,7 +236,8 @@ def generate_improvement_suggestions(text, title, seo_score, engagement_score):
             'suggestion': 'Add more internal and external links'
         })
     
-    readability = analyze_readability(text)
+    doc = get_document(text)
+    readability = analyze_readability(doc)
     if readability['flesch_reading_ease'] < 60:
         suggestions.append({
             'category': 'readability',
@@ -241,7 +245,7 @@ def generate_improvement_suggestions(text, title, seo_score, engagement_score):
             'suggestion': 'Break long sentences into shorter ones'
         })
     
-    word_count = len(text.split())
+    word_count = doc.word_count
     if word_count < 1000:
         suggestions.append({
             'category': 'content',
@@ -249,7 +253,7 @@ def generate_improvement_suggestions(text, title, seo_score, engagement_score):
             'suggestion': f'Expand content to reach 1000-1500 words (currently {word_count})'
         })
     
-    if '?' not in text[:500]:
+    if '?' not in doc.text[:500]:
         suggestions.append({
             'category': 'engagement',
             'priority': 'medium',
@@ -1,17 +1,31 @@
 import os
-import base64
 import re
 import time
 import hashlib
+import threading
 from dotenv import load_dotenv
 import yt_dlp
 import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 from cache_manager import get_cache_manager
+from prompts import CACHE_BOUNDARY, get_continuation_prompt
+from blob_store import get_blob_store, BLOB_CHUNK_SIZE
+from image_cache import get_image_cache
+from config import AVAILABLE_MODELS
+from model_router import get_model_router, model_routing_enabled
 
 load_dotenv()
 
+MAX_CONTINUATIONS = int(os.getenv('LLM_MAX_CONTINUATIONS', 2))
+CONTINUATION_TAIL_CHARS = int(os.getenv('LLM_CONTINUATION_TAIL_CHARS', 6000))
+TRUNCATION_FINISH_REASONS = {'length', 'max_tokens', 'MAX_TOKENS', 'FinishReason.MAX_TOKENS'}
+
+# Image sizes per provider; part of the image cache key
+OPENAI_IMAGE_SIZE = "1792x1024"
+GEMINI_IMAGE_SIZE = "default"
+QWEN_IMAGE_SIZE = "default"
+
 try:
     from openai import OpenAI
     OPENAI_AVAILABLE = True
@@ -236,9 +250,121 @@ Provide:
 
 Make this research detailed, up-to-date, and strictly based on verifiable, legit information. Focus on what's actually trending and newsworthy right now on platforms like Twitter, Reddit, Medium, and YouTube. Do not hallucinate."""
     
-    research_content = ai_manager.generate_content(research_prompt)
+    research_content = ai_manager.generate_content(research_prompt, task='trending_research')
     return f"Research Date: {current_date}\n\nTopic: {topic_query}\n\n{research_content}"
 
+SYSTEM_PROMPT = "You are an expert Medium writer and content strategist."
+SOURCE_CONTENT_HEADER = f"""{'='*80}
+SOURCE CONTENT - THIS IS WHAT YOUR BLOG POST MUST BE ABOUT (apply the instructions above to it):
+{'='*80}
+
+"""
+
+def build_prompt_parts(prompt, video_context=None):
+    """
+    Split a request into (text, cacheable) parts, stable instructions first.
+
+    Everything before CACHE_BOUNDARY in the prompt is identical across requests
+    and is marked cacheable; the per-request remainder and the source content
+    follow it, so provider prefix caches match as much of the request as possible.
+    """
+    static, boundary, dynamic = prompt.partition(CACHE_BOUNDARY)
+    parts = [(static, bool(boundary))]
+    if dynamic.strip():
+        parts.append((dynamic, False))
+    if video_context:
+        parts.append((SOURCE_CONTENT_HEADER + video_context, False))
+    return parts
+
+def build_full_prompt(prompt, video_context=None):
+    return "\n\n".join(text for text, _ in build_prompt_parts(prompt, video_context))
+
+class PromptCacheStats:
+    """Process-wide prompt token counts per provider, split by cache hits."""
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.providers = {}
+    
+    def record(self, provider, prompt_tokens, cached_tokens, seconds, cache_write_tokens=0):
+        prompt_tokens = prompt_tokens or 0
+        cached_tokens = cached_tokens or 0
+        with self.lock:
+            stats = self.providers.setdefault(provider, {
+                'calls': 0, 'prompt_tokens': 0, 'cached_tokens': 0, 'cache_write_tokens': 0,
+                'cache_hit_calls': 0, 'hit_seconds': 0.0, 'miss_seconds': 0.0
+            })
+            stats['calls'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['cached_tokens'] += cached_tokens
+            stats['cache_write_tokens'] += cache_write_tokens or 0
+            if cached_tokens:
+                stats['cache_hit_calls'] += 1
+                stats['hit_seconds'] += seconds
+            else:
+                stats['miss_seconds'] += seconds
+        if cached_tokens:
+            print(f"[AI] {provider} prompt cache hit: {cached_tokens}/{prompt_tokens} tokens")
+    
+    def get_stats(self):
+        with self.lock:
+            result = {}
+            for provider, stats in self.providers.items():
+                hits = stats['cache_hit_calls']
+                misses = stats['calls'] - hits
+                result[provider] = {
+                    'calls': stats['calls'],
+                    'prompt_tokens': stats['prompt_tokens'],
+                    'cached_tokens': stats['cached_tokens'],
+                    'cache_write_tokens': stats['cache_write_tokens'],
+                    'cached_token_ratio': round(stats['cached_tokens'] / stats['prompt_tokens'], 3) if stats['prompt_tokens'] else 0,
+                    'cache_hit_calls': hits,
+                    'avg_seconds_cache_hit': round(stats['hit_seconds'] / hits, 2) if hits else None,
+                    'avg_seconds_cache_miss': round(stats['miss_seconds'] / misses, 2) if misses else None
+                }
+            return result
+
+_prompt_cache_stats = PromptCacheStats()
+
+def get_prompt_cache_stats():
+    return _prompt_cache_stats
+
+# A last line that cannot end a post: a bare list or heading marker, or a link cut inside its brackets
+DANGLING_LINE_RE = re.compile(r'^(#{1,6}|[-*+]|\d+[.)])$|\[[^\]]*$|\]\([^)]*$')
+# A last line of prose that stops on a word or mark that needs something after it
+TRAILING_CONNECTOR_RE = re.compile(
+    r'([,;:]|\s[-\u2013\u2014]|\b(and|or|but|the|a|an|of|to|in|on|with|for|that|which|is|are|was|were))$', re.I)
+NON_PROSE_LINE_RE = re.compile(r'^(#{1,6}\s|[-*+]\s|\d+[.)]\s|>|\||!?\[[^\]]*\]\([^)]*\)$)')
+MID_SENTENCE_MIN_WORDS = 8
+
+def is_truncated(text, finish_reason):
+    if finish_reason is not None:
+        return str(finish_reason) in TRUNCATION_FINISH_REASONS
+    # No finish reason reported: only clear structural evidence counts, since a
+    # complete post can end on a link or a word without a final period
+    stripped = (text or '').rstrip()
+    if len(stripped) <= 1000:
+        return False
+    if stripped.count('```') % 2:
+        return True
+    last_line = stripped.rsplit('\n', 1)[-1].strip()
+    if DANGLING_LINE_RE.search(last_line):
+        return True
+    if NON_PROSE_LINE_RE.match(last_line):
+        return False
+    if TRAILING_CONNECTOR_RE.search(last_line):
+        return True
+    # A long final paragraph with no sentence end anywhere was cut mid-sentence
+    return (stripped[-1].isalnum() and len(last_line.split()) >= MID_SENTENCE_MIN_WORDS
+            and not re.search(r'[.!?]', last_line))
+
+def merge_continuation(text, tail):
+    # Drop any text the model repeated from before the cut
+    for size in range(min(len(text), len(tail), 500), 19, -1):
+        if text.endswith(tail[:size]):
+            return text + tail[size:]
+    return text + tail
+
 class AIProviderManager:
     def __init__(self):
         self.openai_client = None
@@ -295,184 +421,236 @@ class AIProviderManager:
                 raise e
         raise Exception("Max retries exceeded")
     
-    def generate_content(self, prompt, video_context=None, model=None):
-        print(f"[AI] generate_content called with model: {model}")
+    def _model_call(self, model, max_tokens=None):
+        """(name, model, call) for one entry of config.AVAILABLE_MODELS, or None if its provider is not configured."""
+        provider = AVAILABLE_MODELS.get(model, {}).get('provider')
+        options = {'max_tokens': max_tokens} if max_tokens else {}
+        if provider == 'openai' and self.openai_client:
+            return ('OpenAI', model, lambda p, c: self._retry_with_backoff(
+                lambda: self._generate_with_openai(p, c, model, **options)))
+        if provider == 'gemini' and self.gemini_client:
+            return ('Gemini', model, lambda p, c: self._retry_with_backoff(
+                lambda: self._generate_with_gemini(p, c, model, **options)))
+        if provider == 'anthropic' and self.anthropic_client:
+            return ('Anthropic', model, lambda p, c: self._retry_with_backoff(
+                lambda: self._generate_with_anthropic(p, c, model, **options)))
+        return None
+    
+    def _configured_providers(self):
+        return {name for name, client in (('openai', self.openai_client), ('gemini', self.gemini_client),
+                                          ('anthropic', self.anthropic_client)) if client}
+    
+    def _provider_chain(self, model=None, task=None, input_chars=0):
+        """
+        Ordered (name, model, call) entries; each call returns (text, finish_reason).
+        With a routed task the router's picks come first and the default chain
+        stays behind them as the fallback.
+        """
+        chain = []
+        if model and '/' in model and self.openrouter_api_key:
+            chain.append(('OpenRouter', model, lambda p, c: self._generate_with_openrouter(p, c, model)))
+        if task and model_routing_enabled():
+            route = get_model_router().get_route(task) or {}
+            for routed_model in get_model_router().route(task, input_chars, self._configured_providers()):
+                entry = self._model_call(routed_model, route.get('max_output_tokens'))
+                if entry:
+                    chain.append(entry)
+        for default_model in ('gpt-4o', 'gemini-2.0-flash-exp', 'claude-4-sonnet-20250514'):
+            if not any(entry[1] == default_model for entry in chain):
+                entry = self._model_call(default_model)
+                if entry:
+                    chain.append(entry)
+        if self.openrouter_api_key:
+            chain.append(('OpenRouter', 'deepseek/deepseek-chat-v3.1', lambda p, c: self._generate_with_openrouter(p, c)))
+        return chain
+    
+    def _call_and_record(self, entry, prompt, video_context, task=None):
+        name, model, call = entry
+        started = time.time()
+        try:
+            result = call(prompt, video_context)
+        except Exception:
+            get_model_router().record(model, time.time() - started, False, task)
+            raise
+        get_model_router().record(model, time.time() - started, True, task)
+        return result
+    
+    def generate_content(self, prompt, video_context=None, model=None, min_chars=None, task=None):
+        """
+        Try providers in order until one answers. task names an entry of
+        config.TASK_ROUTING and lets the model router pick a cheaper model.
+        A response cut off at the token limit is continued from where it
+        stopped instead of being thrown away; a response shorter than
+        min_chars moves on to the next provider.
+        """
+        print(f"[AI] generate_content called with model: {model}" + (f", task: {task}" if task else ""))
         print(f"[AI] Prompt length: {len(prompt)} chars")
         print(f"[AI] Context length: {len(video_context) if video_context else 0} chars")
         errors = []
         
-        if model and '/' in model:
-            print(f"[AI] Trying OpenRouter with model: {model}")
-            if self.openrouter_api_key:
-                try:
-                    result = self._generate_with_openrouter(prompt, video_context, model)
-                    print(f"[AI] OpenRouter success: {len(result)} chars")
-                    return result
-                except Exception as e:
-                    error_msg = f"OpenRouter: {str(e)}"
-                    print(f"[AI] {error_msg}")
-                    errors.append(error_msg)
-            else:
-                error_msg = "OpenRouter: API key not configured"
-                print(f"[AI] {error_msg}")
-                errors.append(error_msg)
-        
-        if self.openai_client:
-            print(f"[AI] Trying OpenAI...")
-            try:
-                result = self._retry_with_backoff(lambda: self._generate_with_openai(prompt, video_context))
-                print(f"[AI] OpenAI success: {len(result)} chars")
-                return result
-            except Exception as e:
-                error_msg = f"OpenAI: {str(e)}"
-                print(f"[AI] {error_msg}")
-                errors.append(error_msg)
-        
-        if self.gemini_client:
-            print(f"[AI] Trying Gemini...")
-            try:
-                result = self._retry_with_backoff(lambda: self._generate_with_gemini(prompt, video_context))
-                print(f"[AI] Gemini success: {len(result)} chars")
-                return result
-            except Exception as e:
-                error_msg = f"Gemini: {str(e)}"
-                print(f"[AI] {error_msg}")
-                errors.append(error_msg)
+        if model and '/' in model and not self.openrouter_api_key:
+            error_msg = "OpenRouter: API key not configured"
+            print(f"[AI] {error_msg}")
+            errors.append(error_msg)
         
-        if self.anthropic_client:
-            print(f"[AI] Trying Anthropic...")
+        input_chars = len(prompt) + (len(video_context) if video_context else 0)
+        chain = self._provider_chain(model, task, input_chars)
+        for index, entry in enumerate(chain):
+            name, entry_model = entry[0], entry[1]
+            print(f"[AI] Trying {name} ({entry_model})...")
             try:
-                result = self._retry_with_backoff(lambda: self._generate_with_anthropic(prompt, video_context))
-                print(f"[AI] Anthropic success: {len(result)} chars")
-                return result
+                result, finish_reason = self._call_and_record(entry, prompt, video_context, task)
+                result = result or ""
+                print(f"[AI] {name} success: {len(result)} chars")
             except Exception as e:
-                error_msg = f"Anthropic: {str(e)}"
+                error_msg = f"{name}: {str(e)}"
                 print(f"[AI] {error_msg}")
                 errors.append(error_msg)
-        
-        if self.openrouter_api_key:
-            print(f"[AI] Trying OpenRouter as fallback...")
-            try:
-                result = self._generate_with_openrouter(prompt, video_context)
-                print(f"[AI] OpenRouter success: {len(result)} chars")
-                return result
-            except Exception as e:
-                error_msg = f"OpenRouter: {str(e)}"
+                continue
+            
+            if is_truncated(result, finish_reason):
+                result = self._continue_truncated(prompt, video_context, result, chain[index:])
+            
+            if min_chars and len(result.strip()) < min_chars:
+                error_msg = f"{name}: response too short ({len(result.strip())} chars)"
                 print(f"[AI] {error_msg}")
                 errors.append(error_msg)
+                continue
+            return result
         
         error_message = f"All AI providers failed: {'; '.join(errors)}"
         print(f"[AI] {error_message}")
         raise Exception(error_message)
     
-    def _generate_with_openai(self, prompt, video_context):
+    def _continue_truncated(self, prompt, video_context, partial, chain):
+        """
+        Ask for the missing tail only. The provider that was cut off goes first;
+        if it errors, the next providers are asked for the same tail.
+        """
+        text = partial
+        for round_number in range(1, MAX_CONTINUATIONS + 1):
+            continuation_prompt = get_continuation_prompt(prompt, text[-CONTINUATION_TAIL_CHARS:])
+            for entry in chain:
+                name = entry[0]
+                try:
+                    tail, finish_reason = self._call_and_record(entry, continuation_prompt, video_context)
+                except Exception as e:
+                    print(f"[AI] Continuation via {name} failed: {str(e)[:200]}")
+                    continue
+                if not tail or not tail.strip():
+                    continue
+                text = merge_continuation(text, tail)
+                print(f"[AI] Continuation {round_number} via {name}: +{len(tail)} chars")
+                break
+            else:
+                print(f"[AI] No provider could continue the response, keeping {len(text)} chars")
+                return text
+            if not is_truncated(text, finish_reason):
+                return text
+        print(f"[AI] Response still truncated after {MAX_CONTINUATIONS} continuations")
+        return text
+    
+    def _generate_with_openai(self, prompt, video_context, model="gpt-4o", max_tokens=16384):
         print(f"[OpenAI] Preparing request...")
-        if video_context:
-            full_prompt = f"""{'='*80}
-SOURCE CONTENT - THIS IS WHAT YOUR BLOG POST MUST BE ABOUT:
-{'='*80}
-
-{video_context}
-
-{'='*80}
-WRITING INSTRUCTIONS (Apply these to the content above):
-{'='*80}
-
-{prompt}"""
-        else:
-            full_prompt = prompt
+        full_prompt = build_full_prompt(prompt, video_context)
         
         print(f"[OpenAI] Full prompt length: {len(full_prompt)} chars")
-        print(f"[OpenAI] Calling API with model: gpt-4o")
+        print(f"[OpenAI] Calling API with model: {model}")
         
+        started = time.time()
         response = self.openai_client.chat.completions.create(
-            model="gpt-4o",
+            model=model,
             messages=[
-                {"role": "system", "content": "You are an expert Medium writer and content strategist."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": full_prompt}
             ],
             temperature=0.9,
-            max_tokens=16384
+            max_tokens=max_tokens
         )
         
         print(f"[OpenAI] API call successful")
-        result = response.choices[0].message.content
+        usage = getattr(response, 'usage', None)
+        if usage:
+            details = getattr(usage, 'prompt_tokens_details', None)
+            get_prompt_cache_stats().record('openai', usage.prompt_tokens,
+                                            getattr(details, 'cached_tokens', 0) if details else 0,
+                                            time.time() - started)
+        result = response.choices[0].message.content or ""
         print(f"[OpenAI] Response length: {len(result)} chars")
-        return result
+        return result, response.choices[0].finish_reason
     
-    def _generate_with_gemini(self, prompt, video_context):
+    def _generate_with_gemini(self, prompt, video_context, model='gemini-2.0-flash-exp', max_tokens=16384):
         print(f"[Gemini] Preparing request...")
-        if video_context:
-            full_prompt = f"""{'='*80}
-SOURCE CONTENT - THIS IS WHAT YOUR BLOG POST MUST BE ABOUT:
-{'='*80}
-
-{video_context}
-
-{'='*80}
-WRITING INSTRUCTIONS (Apply these to the content above):
-{'='*80}
-
-{prompt}"""
-            contents = [types.Part.from_text(text=full_prompt)]
-        else:
-            contents = [types.Part.from_text(text=prompt)]
+        # Separate parts keep the instruction prefix byte-identical across requests
+        contents = [types.Part.from_text(text=text) for text, _ in build_prompt_parts(prompt, video_context)]
         
-        print(f"[Gemini] Full prompt length: {len(full_prompt if video_context else prompt)} chars")
-        print(f"[Gemini] Calling API with model: gemini-2.0-flash-exp")
+        print(f"[Gemini] Full prompt length: {len(build_full_prompt(prompt, video_context))} chars")
+        print(f"[Gemini] Calling API with model: {model}")
         
+        started = time.time()
         response = self.gemini_client.models.generate_content(
-            model='gemini-2.0-flash-exp',
+            model=model,
             contents=contents,
             config=types.GenerateContentConfig(
                 temperature=0.9,
                 top_p=0.95,
                 top_k=40,
-                max_output_tokens=16384,
+                max_output_tokens=max_tokens,
             )
         )
         
         print(f"[Gemini] API call successful")
-        result = response.text
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            get_prompt_cache_stats().record('gemini', usage.prompt_token_count,
+                                            getattr(usage, 'cached_content_token_count', 0),
+                                            time.time() - started)
+        result = response.text or ""
         print(f"[Gemini] Response length: {len(result)} chars")
-        return result
+        finish_reason = None
+        if getattr(response, 'candidates', None):
+            finish_reason = getattr(response.candidates[0], 'finish_reason', None)
+        return result, finish_reason
     
-    def _generate_with_anthropic(self, prompt, video_context):
+    def _generate_with_anthropic(self, prompt, video_context, model="claude-4-sonnet-20250514", max_tokens=32000):
         print(f"[Anthropic] Preparing request...")
-        if video_context:
-            full_prompt = f"""{'='*80}
-SOURCE CONTENT - THIS IS WHAT YOUR BLOG POST MUST BE ABOUT:
-{'='*80}
-
-{video_context}
-
-{'='*80}
-WRITING INSTRUCTIONS (Apply these to the content above):
-{'='*80}
-
-{prompt}"""
-        else:
-            full_prompt = prompt
-        
-        print(f"[Anthropic] Full prompt length: {len(full_prompt)} chars")
-        print(f"[Anthropic] Calling API with model: claude-4-sonnet-20250514")
+        content = [
+            {"type": "text", "text": text, **({"cache_control": {"type": "ephemeral"}} if cacheable else {})}
+            for text, cacheable in build_prompt_parts(prompt, video_context)
+        ]
+        
+        print(f"[Anthropic] Full prompt length: {len(build_full_prompt(prompt, video_context))} chars")
+        print(f"[Anthropic] Calling API with model: {model}")
+        
+        options = {"temperature": AVAILABLE_MODELS.get(model, {}).get('temperature', 1.0)}
+        thinking_budget = AVAILABLE_MODELS.get(model, {}).get('thinking_budget')
+        if thinking_budget:
+            options = {
+                "temperature": 1.0,
+                "thinking": {"type": "enabled", "budget_tokens": thinking_budget}
+            }
+            max_tokens = max(max_tokens, thinking_budget + 1024)
         
         result_text = ""
+        started = time.time()
         with self.anthropic_client.messages.stream(
-            model="claude-4-sonnet-20250514",
-            max_tokens=32000,
-            temperature=1.0,
-            thinking={
-                "type": "enabled",
-                "budget_tokens": 10000
-            },
+            model=model,
+            max_tokens=max_tokens,
+            system=[{"type": "text", "text": SYSTEM_PROMPT}],
             messages=[
-                {"role": "user", "content": full_prompt}
-            ]
+                {"role": "user", "content": content}
+            ],
+            **options
         ) as stream:
             response = stream.get_final_message()
         
         print(f"[Anthropic] API call successful")
+        usage = getattr(response, 'usage', None)
+        if usage:
+            cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+            cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+            get_prompt_cache_stats().record('anthropic', usage.input_tokens + cache_read + cache_write,
+                                            cache_read, time.time() - started, cache_write)
         
         for block in response.content:
             if block.type == "text":
@@ -483,24 +661,19 @@ WRITING INSTRUCTIONS (Apply these to the content above):
             result_text = response.content[0].text if hasattr(response.content[0], 'text') else ""
         
         print(f"[Anthropic] Response length: {len(result_text)} chars")
-        return result_text
+        return result_text, response.stop_reason
     
     def _generate_with_openrouter(self, prompt, video_context, model="deepseek/deepseek-chat-v3.1"):
-        if video_context:
-            full_prompt = f"""{'='*80}
-SOURCE CONTENT - THIS IS WHAT YOUR BLOG POST MUST BE ABOUT:
-{'='*80}
-
-{video_context}
-
-{'='*80}
-WRITING INSTRUCTIONS (Apply these to the content above):
-{'='*80}
-
-{prompt}"""
+        if model.startswith('anthropic/'):
+            # OpenRouter passes cache_control through to Anthropic models
+            user_content = [
+                {"type": "text", "text": text, **({"cache_control": {"type": "ephemeral"}} if cacheable else {})}
+                for text, cacheable in build_prompt_parts(prompt, video_context)
+            ]
         else:
-            full_prompt = prompt
+            user_content = build_full_prompt(prompt, video_context)
         
+        started = time.time()
         response = requests.post(
             url="https://openrouter.ai/api/v1/chat/completions",
             headers={
@@ -512,37 +685,51 @@ WRITING INSTRUCTIONS (Apply these to the content above):
                 "messages": [
                     {
                         "role": "system",
-                        "content": "You are an expert Medium writer and content strategist."
+                        "content": SYSTEM_PROMPT
                     },
                     {
                         "role": "user",
-                        "content": full_prompt
+                        "content": user_content
                     }
                 ],
                 "temperature": 0.9,
-                "max_tokens": 16384
+                "max_tokens": 16384,
+                "usage": {"include": True}
             },
             timeout=30
         )
         
         response.raise_for_status()
         result = response.json()
-        return result['choices'][0]['message']['content']
+        usage = result.get('usage')
+        if usage:
+            details = usage.get('prompt_tokens_details') or {}
+            get_prompt_cache_stats().record('openrouter', usage.get('prompt_tokens', 0),
+                                            details.get('cached_tokens', 0), time.time() - started)
+        choice = result['choices'][0]
+        return choice['message']['content'] or "", choice.get('finish_reason')
     
+    def _cached_image(self, provider, size, prompt, generate):
+        return get_image_cache().fetch_or_generate(provider, size, prompt, generate)
+
     def generate_images(self, prompt1, prompt2):
-        print(f"[AI] Starting image generation with {len(prompt1)} and {len(prompt2)} char prompts")
+        """
+        Generate two images and return their blob store keys (None for a failed image).
+        Prompts already generated by the same provider at the same size come from the image cache.
+        """
+        print(f"[AI] Starting image generation with {len(prompt1)} and {len(prompt2 or '')} char prompts")
         errors = []
         images = []
         
         if self.openai_client:
             print("[AI] Trying OpenAI DALL-E...")
             try:
-                img1 = self._generate_image_openai(prompt1)
-                print(f"[AI] OpenAI image 1 generated: {len(str(img1))} chars")
+                img1 = self._cached_image('openai', OPENAI_IMAGE_SIZE, prompt1, self._generate_image_openai)
+                print(f"[AI] OpenAI image 1 stored: {img1}")
                 images.append(img1)
                 try:
-                    img2 = self._generate_image_openai(prompt2)
-                    print(f"[AI] OpenAI image 2 generated: {len(str(img2))} chars")
+                    img2 = self._cached_image('openai', OPENAI_IMAGE_SIZE, prompt2, self._generate_image_openai)
+                    print(f"[AI] OpenAI image 2 stored: {img2}")
                     images.append(img2)
                 except Exception as e2:
                     print(f"[AI] OpenAI image 2 failed: {str(e2)}")
@@ -571,12 +758,12 @@ WRITING INSTRUCTIONS (Apply these to the content above):
         if self.gemini_client:
             print("[AI] Trying Gemini Imagen...")
             try:
-                img1 = self._generate_image_gemini(prompt1)
-                print(f"[AI] Gemini image 1 generated: {len(str(img1))} chars")
+                img1 = self._cached_image('gemini', GEMINI_IMAGE_SIZE, prompt1, self._generate_image_gemini)
+                print(f"[AI] Gemini image 1 stored: {img1}")
                 images.append(img1)
                 try:
-                    img2 = self._generate_image_gemini(prompt2)
-                    print(f"[AI] Gemini image 2 generated: {len(str(img2))} chars")
+                    img2 = self._cached_image('gemini', GEMINI_IMAGE_SIZE, prompt2, self._generate_image_gemini)
+                    print(f"[AI] Gemini image 2 stored: {img2}")
                     images.append(img2)
                 except Exception as e2:
                     print(f"[AI] Gemini image 2 failed: {str(e2)}")
@@ -597,18 +784,17 @@ WRITING INSTRUCTIONS (Apply these to the content above):
         response = self.openai_client.images.generate(
             model="dall-e-3",
             prompt=prompt,
-            size="1792x1024",
+            size=OPENAI_IMAGE_SIZE,
             quality="standard",
             n=1,
         )
         
         image_url = response.data[0].url
         
-        import requests
-        img_response = requests.get(image_url)
-        encoded_image = base64.b64encode(img_response.content).decode('utf-8')
-        
-        return encoded_image
+        # Stream the download straight into the blob store
+        with requests.get(image_url, stream=True, timeout=120) as img_response:
+            img_response.raise_for_status()
+            return get_blob_store().put_stream(img_response.iter_content(BLOB_CHUNK_SIZE))
     
     def _generate_image_gemini(self, prompt):
         response = self.gemini_client.models.generate_images(
@@ -619,10 +805,7 @@ WRITING INSTRUCTIONS (Apply these to the content above):
                 output_mime_type='image/png',
             ),
         )
-        image_data = response.generated_images[0].image.image_bytes
-        encoded_image = base64.b64encode(image_data).decode('utf-8')
-        
-        return encoded_image
+        return get_blob_store().put(response.generated_images[0].image.image_bytes)
     
     def _generate_images_qwen(self, prompt1, prompt2):
         API_URL = "https://api-inference.huggingface.co/models/Qwen/Qwen2-VL-7B-Instruct"
@@ -632,16 +815,17 @@ WRITING INSTRUCTIONS (Apply these to the content above):
             raise Exception("HUGGINGFACE_TOKEN not configured")
         
         headers = {"Authorization": f"Bearer {hf_token}"}
-        images = []
         
+        def generate(prompt):
+            with requests.post(API_URL, headers=headers, json={"inputs": prompt}, timeout=60, stream=True) as response:
+                if response.status_code == 200 and response.headers.get('Content-Type', '').startswith('image/'):
+                    return get_blob_store().put_stream(response.iter_content(BLOB_CHUNK_SIZE))
+                return None
+        
+        images = []
         for prompt in [prompt1, prompt2]:
             try:
-                response = requests.post(API_URL, headers=headers, json={"inputs": prompt}, timeout=60)
-                if response.status_code == 200:
-                    encoded_image = base64.b64encode(response.content).decode('utf-8')
-                    images.append(encoded_image)
-                else:
-                    images.append(None)
+                images.append(self._cached_image('qwen', QWEN_IMAGE_SIZE, prompt, generate))
             except:
                 images.append(None)
         
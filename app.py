@@ -1,15 +1,12 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, g
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, g, send_file, abort, Response
 from werkzeug.middleware.proxy_fix import ProxyFix
 import os
 import re
-import markdown
 from dotenv import load_dotenv
 from datetime import datetime
 import prompts
 from util import (
-    extract_title_from_markdown,
     estimate_reading_time,
-    extract_key_quotes,
     validate_youtube_url,
     clean_markdown,
     calculate_engagement_score,
@@ -18,8 +15,18 @@ from util import (
     remove_urls_from_text
 )
 from seo_analyzer import analyze_seo, generate_seo_recommendations
-from ai_providers import AIProviderManager, get_youtube_transcript, detect_input_type, scrape_web_content, research_trending_topic
-from prompts import get_blog_gen_prompt, get_image_gen_prompt
+from text_analysis import get_document
+from blog_pipeline import StagePipeline, add_analysis_stages
+from outline_writer import outline_first_enabled, write_outline_first
+from image_speculation import SpeculativeImages
+from blob_store import get_blob_store, store_image, is_blob_key, content_type_for
+from temp_post_store import get_temp_post_store
+from image_variants import schedule_variants, get_variants, get_variant_pool
+from image_cache import get_image_cache
+from model_router import get_model_router
+from combined_enhancement import combined_enhancement_enabled, enhance_combined, record_chained_pass
+from ai_providers import AIProviderManager, get_youtube_transcript, detect_input_type, scrape_web_content, research_trending_topic, get_prompt_cache_stats
+from prompts import get_blog_gen_prompt, get_image_gen_prompt, get_transcript_enhancement_prompt, get_style_enhancement_prompt
 from export_handler import export_to_medium, export_to_linkedin, create_twitter_thread, export_to_devto, export_to_hashnode, export_to_ghost, export_to_wordpress, export_to_json, export_to_txt, export_to_notion, export_to_email_html, get_export_formats
 from content_library import save_post, get_post, get_all_posts, search_posts, get_stats, add_to_batch_queue, get_batch_queue, update_batch_status, save_draft, get_draft, get_all_drafts, delete_draft, save_post_version, get_post_versions, get_post_version, schedule_post, get_scheduled_posts, update_scheduled_post_status, delete_scheduled_post
 from cache_manager import get_cache_manager
@@ -35,7 +42,9 @@ from linkedin_agent import generate_linkedin_post
 from github_handler import get_github_handler
 from social_auth import get_medium_auth, get_linkedin_auth
 from social_storage import get_social_account_manager
-from supabase_client import get_supabase_manager
+from supabase_client import get_supabase_manager, get_supabase_pool, release_supabase_manager, get_write_behind, \
+    query_stats, record_supabase_queries
+from token_verifier import get_token_verifier
 from post_scheduler import get_scheduler
 from progress_tracker import get_progress_tracker
 from diagram_generator import get_diagram_generator
@@ -53,7 +62,6 @@ import hashlib
 import hmac
 from tenant_context import (
     clear_tenant_session,
-    current_tenant_id,
     get_session_tenant_id,
     normalize_tenant_id,
     resolve_tenant_id,
@@ -70,69 +78,45 @@ print("STARTING FLASK APP")
 print("=" * 60)
 
 TEMP_STORAGE_DIR = Path(__file__).parent / 'temp_posts'
+HISTORY_PAGE_SIZE = 50
 TEMP_STORAGE_DIR.mkdir(exist_ok=True)
 print(f"Temp storage directory: {TEMP_STORAGE_DIR}")
 print(f"Temp storage exists: {TEMP_STORAGE_DIR.exists()}")
 
+temp_post_store = get_temp_post_store(TEMP_STORAGE_DIR)
+
 def get_tenant_temp_dir(tenant_id=None):
-    tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-    tenant_dir = TEMP_STORAGE_DIR / tenant_id
-    tenant_dir.mkdir(parents=True, exist_ok=True)
-    return tenant_dir
+    return temp_post_store.tenant_dir(tenant_id)
 
 def get_tenant_temp_file(post_id, tenant_id=None):
-    return get_tenant_temp_dir(tenant_id) / f'{post_id}.json'
+    return temp_post_store.path(post_id, tenant_id)
 
 def cleanup_old_temp_files():
     try:
-        import time
-        current_time = time.time()
-        for tenant_dir in TEMP_STORAGE_DIR.iterdir():
-            if not tenant_dir.is_dir():
-                continue
-            for temp_file in tenant_dir.glob('*.json'):
-                if current_time - temp_file.stat().st_mtime > 86400:
-                    temp_file.unlink()
-        for temp_file in TEMP_STORAGE_DIR.glob('*.json'):
-            if current_time - temp_file.stat().st_mtime > 86400:
-                temp_file.unlink()
+        temp_post_store.prune()
     except Exception as e:
         print(f"Warning: Failed to cleanup temp files: {e}")
 
 cleanup_old_temp_files()
 
-def get_all_temp_posts():
-    posts = []
+def get_temp_posts(limit=50, offset=0):
+    """Newest temp posts from the metadata index; bodies are not loaded."""
     try:
-        for temp_file in sorted(get_tenant_temp_dir().glob('*.json'), key=lambda x: x.stat().st_mtime, reverse=True):
-            try:
-                with open(temp_file, 'r', encoding='utf-8') as f:
-                    post_data = json.load(f)
-                    post_data['id'] = temp_file.stem
-                    post_data['created_at'] = datetime.fromtimestamp(temp_file.stat().st_mtime).isoformat()
-                    posts.append(post_data)
-            except Exception as e:
-                print(f"Error reading {temp_file}: {e}")
+        return temp_post_store.list(limit=limit, offset=offset)
     except Exception as e:
         print(f"Error listing temp posts: {e}")
-    return posts
+        return []
 
 def calculate_temp_analytics():
-    posts = get_all_temp_posts()
-    
-    total_posts = len(posts)
-    total_words = sum(p.get('word_count', 0) for p in posts)
-    avg_engagement = sum(p.get('engagement_score', 0) for p in posts) / total_posts if total_posts > 0 else 0
-    avg_seo = sum(p.get('seo_score', 0) for p in posts) / total_posts if total_posts > 0 else 0
-    avg_viral = sum(p.get('viral_potential', 0) for p in posts) / total_posts if total_posts > 0 else 0
+    summary = temp_post_store.summary()
     
     return {
-        'total_posts': total_posts,
-        'total_words_written': total_words,
-        'avg_engagement_score': round(avg_engagement),
-        'avg_seo_score': round(avg_seo),
-        'avg_viral_potential': round(avg_viral),
-        'recent_posts': posts[:5] if posts else []
+        'total_posts': summary['total_posts'],
+        'total_words_written': summary['total_words'],
+        'avg_engagement_score': round(summary['avg_engagement']),
+        'avg_seo_score': round(summary['avg_seo']),
+        'avg_viral_potential': round(summary['avg_viral']),
+        'recent_posts': get_temp_posts(limit=5)
     }
 
 load_dotenv()
@@ -231,14 +215,27 @@ def require_session(f):
                 return jsonify({'error': 'Database not configured'}), 503
             return redirect(url_for('login'))
 
-        user_response = supabase.get_user(access_token)
+        # Verify the token locally; Supabase Auth is only asked when that is not
+        # possible or the token is due a revocation check
+        verifier = get_token_verifier()
+        user = verifier.verify(access_token) if verifier else None
+        if not user or verifier.needs_remote_check(access_token):
+            user_response = supabase.get_user(access_token)
+            user = user_response.user if user_response else None
+            if verifier:
+                if user:
+                    verifier.mark_remote_checked(access_token)
+                else:
+                    verifier.invalidate(access_token)
 
-        if not user_response or not user_response.user:
+        if not user:
             # Try refreshing the token before giving up
             refresh_token = tenant_get('refresh_token')
             if refresh_token:
                 new_session = supabase.refresh_session(refresh_token)
                 if new_session and hasattr(new_session, 'session') and new_session.session:
+                    if verifier:
+                        verifier.mark_remote_checked(new_session.session.access_token)
                     tenant_set('access_token', new_session.session.access_token)
                     tenant_set('refresh_token', new_session.session.refresh_token)
                     tenant_set('user_id', new_session.user.id)
@@ -254,10 +251,10 @@ def require_session(f):
                 return jsonify({'error': 'Session expired'}), 401
             return redirect(url_for('login'))
 
-        g.user = user_response.user
-        g.user_id = user_response.user.id
-        tenant_set('user_id', user_response.user.id)
-        tenant_set('user_email', user_response.user.email)
+        g.user = user
+        g.user_id = user.id
+        tenant_set('user_id', user.id)
+        tenant_set('user_email', user.email)
         tenant_set('tenant_id', g.tenant_id)
         set_active_tenant_id(g.tenant_id)
         return f(*args, **kwargs)
@@ -272,6 +269,61 @@ def get_callback_url(endpoint='auth_callback'):
         url = url.replace('http:', 'https:', 1)
     return url
 
+BLOB_CACHE_SECONDS = 365 * 24 * 3600
+
+@app.template_filter('image_src')
+def image_src(image):
+    # Older posts still carry inline base64 images
+    if is_blob_key(image):
+        return url_for('serve_blob', key=image)
+    return f"data:image/png;base64,{image}"
+
+@app.template_filter('image_variants')
+def image_variants_filter(image):
+    """srcsets per format plus a JPEG fallback, once the variants have been built."""
+    manifest = get_variants(image)
+    if not manifest:
+        if is_blob_key(image):
+            schedule_variants(image)
+        return None
+    srcset = {
+        extension: ', '.join(f"{url_for('serve_blob', key=entry['key'])} {entry['width']}w" for entry in entries)
+        for extension, entries in manifest['variants'].items()
+    }
+    fallback = manifest['variants'].get('jpg') or []
+    return {
+        'srcset': srcset,
+        'fallback': url_for('serve_blob', key=fallback[-1]['key'] if fallback else image),
+        'width': manifest['width'],
+        'height': manifest['height']
+    }
+
+@app.template_filter('image_thumbnail')
+def image_thumbnail_filter(image):
+    manifest = get_variants(image)
+    thumbnail = (manifest or {}).get('thumbnail', {})
+    entry = thumbnail.get('webp') or thumbnail.get('jpg')
+    return url_for('serve_blob', key=entry['key']) if entry else None
+
+@app.route('/blobs/<key>')
+def serve_blob(key):
+    # Keys are content hashes, so a response never goes stale
+    if not is_blob_key(key):
+        abort(404)
+    store = get_blob_store()
+    path = store.local_path(key)
+    if path:
+        response = send_file(path, mimetype=content_type_for(key), etag=key.split('.')[0],
+                             max_age=BLOB_CACHE_SECONDS, conditional=True)
+    else:
+        data = store.get(key)
+        if data is None:
+            abort(404)
+        response = Response(data, mimetype=content_type_for(key))
+        response.set_etag(key.split('.')[0])
+    response.headers['Cache-Control'] = f'public, max-age={BLOB_CACHE_SECONDS}, immutable'
+    return response
+
 @app.route('/debug/auth-session')
 def debug_auth_session():
     """Diagnostic route to inspect session state for auth debugging."""
@@ -543,6 +595,9 @@ def auth_store_session():
 
 # ── Main Routes ─────────────────────────────────────────────────────
 
+app.teardown_appcontext(release_supabase_manager)
+app.after_request(record_supabase_queries)
+
 @app.before_request
 def resolve_tenant_context():
     tenant_id = resolve_tenant_id()
@@ -656,11 +711,7 @@ def generate_images_for_blog(blog_title, blog_content):
         prompt2 = prompts.get_content_image_prompt(blog_title, blog_content)
         print(f"[IMAGE GEN] Prompt 2 length: {len(prompt2)} chars")
         images = get_ai_manager().generate_images(prompt1, prompt2)
-        print(f"[IMAGE GEN] Returned images: {[type(img).__name__ if img else 'None' for img in images]}")
-        if images[0]:
-            print(f"[IMAGE GEN] Image 1 size: {len(str(images[0]))} chars")
-        if images[1]:
-            print(f"[IMAGE GEN] Image 2 size: {len(str(images[1]))} chars")
+        print(f"[IMAGE GEN] Returned images: {images}")
         return images
     except Exception as e:
         print(f"[IMAGE GEN] ERROR: {e}")
@@ -668,7 +719,8 @@ def generate_images_for_blog(blog_title, blog_content):
         traceback.print_exc()
         return [None, None]
 
-def generate_blog_post_text(user_input, model, template=None, tone=None, industry=None):
+def generate_blog_post_text(user_input, model, template=None, tone=None, industry=None, outline_first=None, on_outline=None,
+                            enhance=False, enhancement=None):
     """
     Generate blog post from user input which may contain:
     - Multiple URLs (articles, YouTube videos, GitHub repos)
@@ -676,6 +728,11 @@ def generate_blog_post_text(user_input, model, template=None, tone=None, industr
     - Or a mix of all three
     
     This function extracts and combines content from ALL sources to create a comprehensive context.
+    With outline_first (or OUTLINE_FIRST_GENERATION=true) the post is planned as an
+    outline and its sections are written concurrently; see outline_writer.
+    on_outline(title, outline_text) fires as soon as that outline exists.
+    With enhance and COMBINED_ENHANCEMENT=true, YouTube posts get transcript grounding
+    and the style pass in one call; the outcome is recorded in the enhancement dict.
     """
     try:
         # Extract all URLs from the input (supports multiple URLs in one input)
@@ -769,18 +826,19 @@ def generate_blog_post_text(user_input, model, template=None, tone=None, industr
             print(f"Content truncated to: {len(content_context)} chars")
         
         base_prompt = prompts.get_blog_gen_prompt()
-        
-        if template:
-            template_addition = get_template_prompt(template, tone, industry)
-            prompt = base_prompt + "\n\n" + template_addition
-        else:
-            prompt = base_prompt
+        template_addition = get_template_prompt(template, tone, industry) if template else ''
         
         topic_for_optimization = user_input[:100]
-        enhanced_prompt = apply_medium_practices_to_prompt(prompt, topic_for_optimization)
-        
-        print(f"Calling AI manager with model: {model}")
-        response = get_ai_manager().generate_content(enhanced_prompt, content_context, model)
+        enhanced_prompt = apply_medium_practices_to_prompt(base_prompt, topic_for_optimization, template_addition)
+        
+        response = None
+        if outline_first_enabled(outline_first):
+            print(f"Generating outline-first with model: {model}")
+            response = write_outline_first(get_ai_manager(), enhanced_prompt, content_context, model,
+                                           on_outline=on_outline)
+        if not response:
+            print(f"Calling AI manager with model: {model}")
+            response = get_ai_manager().generate_content(enhanced_prompt, content_context, model, min_chars=100)
         print(f"AI response length: {len(response) if response else 0}")
         
         cleaned_content = clean_markdown(response)
@@ -789,8 +847,19 @@ def generate_blog_post_text(user_input, model, template=None, tone=None, industr
         
         # Apply transcript enhancement if we have YouTube content
         if has_youtube_content and content_context and len(content_context) > 100:
-            print("Enhancing blog post with YouTube transcript...")
-            optimized_content = enhance_blog_with_transcript(optimized_content, content_context, model=model)
+            combined = None
+            if enhance and combined_enhancement_enabled():
+                print("Enhancing blog post with YouTube transcript and style in one pass...")
+                combined, report = enhance_combined(get_ai_manager(), optimized_content, content_context, model=model)
+                if enhancement is not None:
+                    enhancement.update(report)
+            if combined:
+                optimized_content = combined
+                if enhancement is not None:
+                    enhancement['style_applied'] = True
+            else:
+                print("Enhancing blog post with YouTube transcript...")
+                optimized_content = enhance_blog_with_transcript(optimized_content, content_context, model=model)
             print(f"Transcript-enhanced content length: {len(optimized_content) if optimized_content else 0}")
         
         return optimized_content
@@ -800,36 +869,11 @@ def generate_blog_post_text(user_input, model, template=None, tone=None, industr
 
 def enhance_blog_with_transcript(blog_text, transcript, model=None):
     try:
-        enhancement_prompt = f"""
-You are an expert editor specializing in transforming blog posts using video transcript insights.
-
-🚨 CRITICAL: The blog post and transcript MUST be about the SAME topic. Do not change the topic. Stay focused.
-
-Your task: Enhance the wording, depth, and accuracy of this Medium blog post using the YouTube video transcript.
-
-ENHANCEMENT INSTRUCTIONS:
-1. VERIFY the blog post is about the same topic as the transcript - if not, rewrite to match the transcript
-2. Use specific quotes, examples, and details from the transcript to enrich the content
-3. Replace generic statements with precise information from the video
-4. Add concrete examples and real-world scenarios mentioned in the transcript
-5. Incorporate exact statistics, numbers, and data points from the video
-6. Use the speaker's authentic voice and terminology where appropriate
-7. Expand sections with additional context from the transcript
-8. Ensure all claims are backed by transcript content
-9. Maintain the blog structure while deepening the content
-10. Target 1200-1800 words using transcript details
-11. Keep the writing style natural and engaging
-12. DO NOT deviate from the transcript topic - this is mandatory
-
-YouTube Transcript:
-{transcript[:8000]}
-
-Blog Post to Enhance:
-{blog_text}
-
-Return the enhanced blog post in Markdown format. No explanations or meta-commentary.
-"""
+        enhancement_prompt = get_transcript_enhancement_prompt(blog_text, transcript)
+        started = time.time()
         response = get_ai_manager().generate_content(enhancement_prompt, model=model)
+        if response:
+            record_chained_pass(enhancement_prompt, response, time.time() - started)
         return response if response else blog_text
     except Exception as e:
         print(f"Transcript enhancement error: {e}")
@@ -837,47 +881,148 @@ Return the enhanced blog post in Markdown format. No explanations or meta-commen
 
 def enhance_blog_post(blog_text, model=None):
     try:
-        enhancement_prompt = f"""
-You are an expert editor and writing coach. Enhance this Medium blog post to make it sound like it was written by a confident, clear, and direct human - not an AI.
-
-Apply these rules meticulously:
-
-HUMAN WRITING STYLE:
-- Write like humans speak. No corporate jargon or marketing fluff.
-- Be confident and direct. Remove softening phrases like "I think," "I believe," "maybe," or "could."
-- Use active voice over passive voice.
-- Use "you" more than "we" when addressing readers.
-- Use contractions like "I'll," "won't," and "can't" for a warmer tone.
-
-BANNED WORDS - REMOVE OR REPLACE:
-- Softening Hedges: "a bit," "a little," "just," "pretty," "quite," "rather," "really," "very," "arguably," "it seems," "sort of," "kind of"
-- Corporate Jargon: "agile," "assistance" (use "help"), "best practices" (use "proven approaches"), "blazing fast" (use metrics), "delve" (use "go into"), "disrupt," "facilitate" (use "help"), "game-changing," "innovative," "leverage" (use "use"), "robust" (use "strong"), "seamless" (use "automatic"), "utilize" (use "use")
-- AI Patterns: Never use "Let's dive into," "In today's fast-paced world," "In the ever-evolving landscape." Never end with "In conclusion," "Overall," "Hope this helps!"
-
-ENHANCEMENT FOCUS:
-1. Make the opening more compelling and hook readers immediately
-2. Add emotional hooks and relatable scenarios
-3. Improve flow and transitions between sections
-4. Strengthen the conclusion with clear action steps
-5. Replace vague language with specific facts and data
-6. Make content concrete, visual, and falsifiable
-7. Use realistic examples (no foo/bar/baz placeholders)
-8. Add code snippets, workflows, or visual explanations where helpful
-9. EXPAND content - do NOT compress or shorten
-10. If the post is under 1000 words, add more examples, case studies, and detailed explanations
-11. Target 1200-1800 words for comprehensive depth
-
-Original post:
-{blog_text}
-
-Return the enhanced version in Markdown format. No explanations or meta-commentary.
-"""
+        enhancement_prompt = get_style_enhancement_prompt(blog_text)
+        started = time.time()
         response = get_ai_manager().generate_content(enhancement_prompt, model=model)
+        if response:
+            record_chained_pass(enhancement_prompt, response, time.time() - started)
         return response if response else blog_text
     except Exception as e:
         print(f"Enhancement error: {e}")
         return blog_text
 
+def _pipeline_draft(user_input, model, template, tone, industry, outline_first, speculative_images, enhance, enhancement):
+    blog_post_text = generate_blog_post_text(user_input, model, template, tone, industry, outline_first,
+                                             on_outline=speculative_images.start,
+                                             enhance=enhance, enhancement=enhancement)
+    print(f"Generated blog post length: {len(blog_post_text) if blog_post_text else 0}")
+    if not blog_post_text or len(blog_post_text.strip()) < 100:
+        print(f"Blog post too short or empty: {blog_post_text[:100] if blog_post_text else 'None'}")
+        raise Exception("Failed to generate blog content. AI response was empty or too short.")
+    return blog_post_text
+
+def _pipeline_enhance(draft, model, enhance, enhancement):
+    if not enhance or enhancement.get('style_applied'):
+        return draft
+    print("Enhancing blog post...")
+    blog_post_text = enhance_blog_post(draft, model=model)
+    print(f"Enhanced blog post length: {len(blog_post_text) if blog_post_text else 0}")
+    return blog_post_text
+
+def _pipeline_images(title, blog_post_text, speculative_images):
+    # Posts carry blob keys; the bytes live once in the blob store
+    images = [store_image(image) for image in speculative_images.resolve(title, blog_post_text)]
+    schedule_variants(*images)
+    return images
+
+def _pipeline_image_field(images, index):
+    if images and images[index]:
+        print(f"✓ Image {index + 1} included: {images[index]}")
+        return images[index]
+    print(f"✗ Image {index + 1} not generated")
+    return None
+
+def _pipeline_blog_data(blog_post_text, title, metadata, seo, medium, html, images, tenant_id):
+    seo_analysis = seo['analysis']
+    return {
+        'title': str(title) if title else '',
+        'blog_post_html': str(html) if html else '',
+        'blog_post_markdown': str(blog_post_text) if blog_post_text else '',
+        'image_data': _pipeline_image_field(images, 0),
+        'image_data_2': _pipeline_image_field(images, 1),
+        'reading_time': metadata['reading_time'],
+        'key_quotes': list(metadata['key_quotes']) if metadata['key_quotes'] else [],
+        'engagement_score': int(metadata['engagement_score']) if metadata['engagement_score'] else 0,
+        'word_count': int(metadata['word_count']),
+        'seo_score': int(seo_analysis.get('seo_score', 0)),
+        'viral_potential': int(seo_analysis.get('viral_potential', 0)),
+        'readability_score': int(seo_analysis.get('readability_score', 0)),
+        'seo_recommendations': list(seo['recommendations']) if seo['recommendations'] else [],
+        'medium_readiness_score': medium.get('medium_readiness_score', 0),
+        'medium_recommendations': medium.get('recommendations', []),
+        'tenant_id': tenant_id
+    }
+
+def _pipeline_temp_write(blog_data, post_id, tenant_id):
+    temp_file = temp_post_store.write(post_id, blog_data, tenant_id)
+    print(f"Temp file written: {temp_file} ({temp_file.stat().st_size} bytes)")
+    return str(temp_file)
+
+def _pipeline_supabase_save(blog_post_text, title, metadata, seo, medium, html, images, user_id, tenant_id):
+    db = get_supabase_manager()
+    if not db:
+        print("Supabase not configured, skipping database save")
+        return None
+    seo_analysis = seo['analysis']
+    result = db.queue_blog_post({
+        'title': title,
+        'html_content': html,
+        'markdown_content': blog_post_text,
+        'image_header': images[0],
+        'image_content': images[1],
+        'reading_time': metadata['reading_time'],
+        'key_quotes': metadata['key_quotes'],
+        'engagement_score': metadata['engagement_score'],
+        'word_count': metadata['word_count'],
+        'seo_score': seo_analysis.get('seo_score', 0),
+        'viral_potential': seo_analysis.get('viral_potential', 0),
+        'readability_score': seo_analysis.get('readability_score', 0),
+        'seo_recommendations': seo['recommendations'],
+        'medium_readiness_score': medium.get('medium_readiness_score', 0),
+        'medium_recommendations': medium.get('recommendations', [])
+    }, user_id=user_id, tenant_id=tenant_id)
+    if result:
+        print(f"Blog post queued for Supabase with ID: {result.get('id')}")
+    else:
+        print("Supabase save returned None")
+    return result
+
+def build_blog_generation_pipeline():
+    """
+    Stage graph shared by /generate and the /blog form: images start as soon
+    as the title exists (or earlier, from the outline title, when outline-first
+    generation is on), the analysis and HTML stages overlap them, and the
+    temp-file write runs alongside the Supabase save.
+    """
+    pipeline = StagePipeline('blog_generation')
+    pipeline.stage('draft', _pipeline_draft,
+                   requires=['user_input', 'model', 'template', 'tone', 'industry', 'outline_first',
+                             'speculative_images', 'enhance', 'enhancement'])
+    pipeline.stage('blog_post_text', _pipeline_enhance, requires=['draft', 'model', 'enhance', 'enhancement'])
+    add_analysis_stages(pipeline)
+    pipeline.stage('images', _pipeline_images, requires=['title', 'blog_post_text', 'speculative_images'],
+                   default=lambda: [None, None])
+    pipeline.stage('blog_data', _pipeline_blog_data,
+                   requires=['blog_post_text', 'title', 'metadata', 'seo', 'medium', 'html', 'images', 'tenant_id'])
+    pipeline.stage('temp_file', _pipeline_temp_write, requires=['blog_data', 'post_id', 'tenant_id'])
+    pipeline.stage('db_post', _pipeline_supabase_save,
+                   requires=['blog_post_text', 'title', 'metadata', 'seo', 'medium', 'html', 'images', 'user_id', 'tenant_id'],
+                   default=None)
+    return pipeline
+
+def run_blog_generation(user_input, model, template=None, tone=None, industry=None, enhance=False, outline_first=None):
+    post_id = str(uuid.uuid4())
+    print(f"Generated post_id: {post_id}")
+    speculative_images = SpeculativeImages(generate_images_for_blog)
+    enhancement = {}
+    result = build_blog_generation_pipeline().run(
+        user_input=user_input,
+        model=model,
+        template=template,
+        tone=tone,
+        industry=industry,
+        enhance=enhance,
+        outline_first=outline_first,
+        speculative_images=speculative_images,
+        enhancement=enhancement,
+        post_id=post_id,
+        user_id=g.user_id,
+        tenant_id=g.tenant_id
+    )
+    result.results['speculative_images'] = speculative_images.get_stats()
+    result.results['enhancement'] = enhancement
+    return post_id, result
+
 @app.route('/api/generate-with-content', methods=['POST'])
 @require_session
 def generate_with_content():
@@ -1071,7 +1216,7 @@ def surprise_me():
         db = get_supabase_manager()
         if db:
             try:
-                db.save_generation_log({
+                db.queue_generation_log({
                     'user_input': 'surprise_me_v2',
                     'input_type': 'surprise_me_cards',
                     'model': DEFAULT_MODEL,
@@ -1154,7 +1299,7 @@ def surprise_me_prompt():
         if db:
             try:
                 meta = sanitized.get('meta') if isinstance(sanitized, dict) else {}
-                db.save_generation_log({
+                db.queue_generation_log({
                     'user_input': str(meta.get('topic') if isinstance(meta, dict) else ''),
                     'input_type': 'surprise_full_prompt',
                     'model': DEFAULT_MODEL,
@@ -1215,6 +1360,7 @@ def generate_blog():
             template = request.form.get('template', None)
             tone = request.form.get('tone', None)
             industry = request.form.get('industry', None)
+            outline_first = request.form.get('outline_first', None)
         else:
             data = request.get_json()
             print(f"Request JSON data: {data}")
@@ -1225,6 +1371,7 @@ def generate_blog():
             template = data.get('template', None)
             tone = data.get('tone', None)
             industry = data.get('industry', None)
+            outline_first = data.get('outline_first', None)
         
         print(f"Parsed parameters:")
         print(f"  - user_input: {user_input[:100] if user_input else 'None'}")
@@ -1239,194 +1386,17 @@ def generate_blog():
         
         input_type = detect_input_type(user_input)
         
-        blog_post_text = generate_blog_post_text(user_input, model, template, tone, industry)
-        print(f"Generated blog post length: {len(blog_post_text) if blog_post_text else 0}")
-        
-        if not blog_post_text or len(blog_post_text.strip()) < 100:
-            print(f"Blog post too short or empty: {blog_post_text[:100] if blog_post_text else 'None'}")
-            raise Exception("Failed to generate blog content. AI response was empty or too short.")
-        
-        if enhance:
-            print("Enhancing blog post...")
-            blog_post_text = enhance_blog_post(blog_post_text, model=model)
-            print(f"Enhanced blog post length: {len(blog_post_text) if blog_post_text else 0}")
-        
-        print("Extracting title from markdown...")
-        title = extract_title_from_markdown(blog_post_text)
-        print(f"Extracted title: {title}")
-        
-        print("Generating images...")
-        try:
-            images = generate_images_for_blog(title, blog_post_text)
-            print(f"Images generated: {len([img for img in images if img])} of 2")
-            if images[0]:
-                print(f"Image 1 size: {len(images[0])} chars")
-            else:
-                print("Image 1 is None")
-            if images[1]:
-                print(f"Image 2 size: {len(images[1])} chars")
-            else:
-                print("Image 2 is None")
-        except Exception as img_error:
-            print(f"Warning: Image generation failed: {img_error}")
-            import traceback
-            traceback.print_exc()
-            images = [None, None]
-        
-        print("Calculating metadata...")
-        reading_time = estimate_reading_time(blog_post_text)
-        print(f"Reading time: {reading_time}")
-        key_quotes = extract_key_quotes(blog_post_text)
-        print(f"Key quotes: {len(key_quotes) if key_quotes else 0}")
-        engagement_score = calculate_engagement_score(blog_post_text)
-        print(f"Engagement score: {engagement_score}")
-        
-        print("Analyzing SEO...")
-        seo_analysis = analyze_seo(blog_post_text, title)
-        print(f"SEO analysis: {seo_analysis}")
-        seo_recommendations = generate_seo_recommendations(seo_analysis)
-        print(f"SEO recommendations: {len(seo_recommendations) if seo_recommendations else 0}")
-        
-        print("Converting markdown to HTML...")
-        
-        cleaned_markdown = blog_post_text.replace('```', '')
-        cleaned_markdown = re.sub(r'`([^`]+)`', r'\1', cleaned_markdown)
-        
-        blog_post_html = markdown.markdown(
-            cleaned_markdown, 
-            extensions=[
-                "markdown.extensions.tables",
-                "markdown.extensions.fenced_code",
-                "markdown.extensions.nl2br",
-                "markdown.extensions.codehilite",
-                "markdown.extensions.extra",
-                "markdown.extensions.sane_lists"
-            ],
-            extension_configs={
-                'markdown.extensions.codehilite': {
-                    'css_class': 'highlight',
-                    'linenums': False
-                }
-            }
-        )
-        
-        print(f"HTML conversion result length: {len(blog_post_html)}")
-        
-        blog_post_html = re.sub(r'<div[^>]*>', '', blog_post_html)
-        blog_post_html = blog_post_html.replace('</div>', '')
-        blog_post_html = re.sub(r'<pre[^>]*>', '', blog_post_html)
-        blog_post_html = blog_post_html.replace('</pre>', '')
-        blog_post_html = re.sub(r'<code[^>]*>', '', blog_post_html)
-        blog_post_html = blog_post_html.replace('</code>', '')
-        blog_post_html = re.sub(r' class="[^"]*"', '', blog_post_html)
-        blog_post_html = re.sub(r' id="[^"]*"', '', blog_post_html)
-        blog_post_html = re.sub(r'<p>\s*</p>', '', blog_post_html)
-        blog_post_html = re.sub(r'<span[^>]*>', '', blog_post_html)
-        blog_post_html = blog_post_html.replace('</span>', '')
-        blog_post_html = blog_post_html.strip()
-        
-        print(f"Final HTML length: {len(blog_post_html)}")
+        outline_enabled = outline_first_enabled(outline_first)
+        post_id, pipeline_result = run_blog_generation(user_input, model, template, tone, industry, enhance, outline_enabled)
+        print(f"Extracted title: {pipeline_result['title']}")
+        print(f"Final HTML length: {len(pipeline_result['html'])}")
         
         generation_time = time.time() - start_time
         print(f"Generation time: {generation_time:.2f}s")
         
-        post_id = str(uuid.uuid4())
-        temp_file = get_tenant_temp_file(post_id)
-        print(f"Generated post_id: {post_id}")
-        print(f"Temp file path: {temp_file}")
-        
-        reading_time_int = 0
-        if reading_time:
-            if isinstance(reading_time, str):
-                reading_time_int = int(reading_time.split()[0])
-            else:
-                reading_time_int = int(reading_time)
-        
-        print("Analyzing Medium readiness...")
-        medium_analysis = analyze_medium_readiness(blog_post_text)
-        print(f"Medium readiness score: {medium_analysis.get('medium_readiness_score', 0)}")
-        
-        print("Preparing full blog data for storage...")
-        
-        image_1_data = None
-        image_2_data = None
-        if images and images[0]:
-            img_str = str(images[0])
-            if len(img_str) < 5000000:
-                image_1_data = img_str
-                print(f"✓ Image 1 included: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-            else:
-                print(f"✗ Image 1 too large, skipping: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-        else:
-            print("✗ Image 1 not generated")
-        if images and images[1]:
-            img_str = str(images[1])
-            if len(img_str) < 5000000:
-                image_2_data = img_str
-                print(f"✓ Image 2 included: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-            else:
-                print(f"✗ Image 2 too large, skipping: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-        else:
-            print("✗ Image 2 not generated")
-        
-        full_blog_data = {
-            'title': str(title) if title else '',
-            'blog_post_html': str(blog_post_html) if blog_post_html else '',
-            'blog_post_markdown': str(blog_post_text) if blog_post_text else '',
-            'image_data': image_1_data,
-            'image_data_2': image_2_data,
-            'reading_time': reading_time,
-            'key_quotes': list(key_quotes) if key_quotes else [],
-            'engagement_score': int(engagement_score) if engagement_score else 0,
-            'word_count': int(len(blog_post_text.split())),
-            'seo_score': int(seo_analysis.get('seo_score', 0)),
-            'viral_potential': int(seo_analysis.get('viral_potential', 0)),
-            'readability_score': int(seo_analysis.get('readability_score', 0)),
-            'seo_recommendations': list(seo_recommendations) if seo_recommendations else [],
-            'medium_readiness_score': medium_analysis.get('medium_readiness_score', 0),
-            'medium_recommendations': medium_analysis.get('recommendations', [])
-        }
-        
-        print(f"Writing to temp file: {temp_file}")
-        print(f"Temp directory exists: {TEMP_STORAGE_DIR.exists()}")
-        print(f"Temp directory writable: {os.access(TEMP_STORAGE_DIR, os.W_OK)}")
-        
-        with open(temp_file, 'w', encoding='utf-8') as f:
-            json.dump(full_blog_data, f, ensure_ascii=False)
-        
-        print(f"File written successfully")
-        print(f"File exists after write: {temp_file.exists()}")
-        print(f"File size: {temp_file.stat().st_size if temp_file.exists() else 0} bytes")
-        
-        print("Attempting to save to Supabase...")
-        db = get_supabase_manager()
-        if db:
-            print("Supabase manager available, saving blog post...")
-            try:
-                result = db.save_blog_post({
-                    'title': title,
-                    'html_content': blog_post_html,
-                    'markdown_content': blog_post_text,
-                    'image_header': images[0],
-                    'image_content': images[1],
-                    'reading_time': reading_time,
-                    'key_quotes': key_quotes,
-                    'engagement_score': engagement_score,
-                    'word_count': len(blog_post_text.split()),
-                    'seo_score': seo_analysis.get('seo_score', 0),
-                    'viral_potential': seo_analysis.get('viral_potential', 0),
-                    'readability_score': seo_analysis.get('readability_score', 0),
-                    'seo_recommendations': seo_recommendations
-                }, user_id=g.user_id, tenant_id=g.tenant_id)
-                if result:
-                    tenant_set('db_post_id', result.get('id'))
-                    print(f"Blog post saved to Supabase successfully with ID: {result.get('id')}")
-                else:
-                    print("Supabase save returned None")
-            except Exception as e:
-                print(f"Supabase save failed (non-critical): {str(e)[:200]}")
-        else:
-            print("Supabase not configured, skipping database save")
+        db_post = pipeline_result.get('db_post')
+        if db_post:
+            tenant_set('db_post_id', db_post.get('id'))
         
         session.permanent = True
         tenant_set('current_post_id', post_id)
@@ -1435,7 +1405,8 @@ def generate_blog():
             'template': template,
             'tone': tone,
             'industry': industry,
-            'enhance': enhance
+            'enhance': enhance,
+            'outline_first': outline_enabled
         })
         session.modified = True
         
@@ -1444,9 +1415,10 @@ def generate_blog():
         print(f"Session modified: {session.modified}")
         print(f"Session data: {dict(session)}")
         
+        db = get_supabase_manager()
         if db:
             try:
-                result = db.save_generation_log({
+                result = db.queue_generation_log({
                     'user_input': user_input,
                     'input_type': input_type,
                     'model': model,
@@ -1457,14 +1429,16 @@ def generate_blog():
                     'generation_time': generation_time
                 }, user_id=g.user_id, tenant_id=g.tenant_id)
                 if result:
-                    print("Generation log saved successfully")
+                    print("Generation log queued")
             except Exception as db_error:
                 print(f"Generation log save failed (non-critical): {str(db_error)[:200]}")
         
         response = jsonify({
             'success': True,
             'redirect': f'/blog?post_id={post_id}',
-            'post_id': post_id
+            'post_id': post_id,
+            'stage_timings': pipeline_result.timings,
+            'enhancement': pipeline_result.get('enhancement')
         })
         
         print(f"Response redirect URL: /blog?post_id={post_id}")
@@ -1487,7 +1461,7 @@ def generate_blog():
         db = get_supabase_manager()
         if db:
             try:
-                db.save_generation_log({
+                db.queue_generation_log({
                     'user_input': user_input if 'user_input' in locals() else 'unknown',
                     'input_type': input_type if 'input_type' in locals() else 'unknown',
                     'model': model if 'model' in locals() else 'unknown',
@@ -1553,148 +1527,15 @@ def blog_post():
         enhance = request.form.get('enhance') == 'on'
         template = request.form.get('template', None)
         tone = request.form.get('tone', None)
+        outline_first = request.form.get('outline_first', None)
         print(f"Form input: {user_input[:100] if user_input else 'None'}")
         
         if not user_input:
             return render_template('index.html', error='Please enter a URL or topic')
         
         try:
-            blog_post_text = generate_blog_post_text(user_input, model, template, tone)
-            
-            if not blog_post_text or len(blog_post_text.strip()) < 100:
-                return render_template('index.html', error='Failed to generate blog content. Please try again.')
-            
-            if enhance:
-                blog_post_text = enhance_blog_post(blog_post_text, model=model)
-            
-            title = extract_title_from_markdown(blog_post_text)
-            
-            try:
-                images = generate_images_for_blog(title, blog_post_text)
-            except Exception as img_error:
-                print(f"Warning: Image generation failed: {img_error}")
-                images = [None, None]
-            
-            reading_time = estimate_reading_time(blog_post_text)
-            key_quotes = extract_key_quotes(blog_post_text)
-            engagement_score = calculate_engagement_score(blog_post_text)
-            
-            seo_analysis = analyze_seo(blog_post_text, title)
-            seo_recommendations = generate_seo_recommendations(seo_analysis)
-            
-            cleaned_markdown = blog_post_text.replace('```', '')
-            cleaned_markdown = re.sub(r'`([^`]+)`', r'\1', cleaned_markdown)
-            
-            blog_post_html = markdown.markdown(
-                cleaned_markdown,
-                extensions=[
-                    "markdown.extensions.tables",
-                    "markdown.extensions.fenced_code",
-                    "markdown.extensions.nl2br",
-                    "markdown.extensions.codehilite",
-                    "markdown.extensions.extra",
-                    "markdown.extensions.sane_lists"
-                ],
-                extension_configs={
-                    'markdown.extensions.codehilite': {
-                        'css_class': 'highlight',
-                        'linenums': False
-                    }
-                }
-            )
-            
-            blog_post_html = re.sub(r'<div[^>]*>', '', blog_post_html)
-            blog_post_html = blog_post_html.replace('</div>', '')
-            blog_post_html = re.sub(r'<pre[^>]*>', '', blog_post_html)
-            blog_post_html = blog_post_html.replace('</pre>', '')
-            blog_post_html = re.sub(r'<code[^>]*>', '', blog_post_html)
-            blog_post_html = blog_post_html.replace('</code>', '')
-            blog_post_html = re.sub(r' class="[^"]*"', '', blog_post_html)
-            blog_post_html = re.sub(r' id="[^"]*"', '', blog_post_html)
-            blog_post_html = re.sub(r'<p>\s*</p>', '', blog_post_html)
-            blog_post_html = re.sub(r'<span[^>]*>', '', blog_post_html)
-            blog_post_html = blog_post_html.replace('</span>', '')
-            blog_post_html = blog_post_html.strip()
-            
-            post_id = str(uuid.uuid4())
-            temp_file = get_tenant_temp_file(post_id)
-            
-            reading_time_int = 0
-            if reading_time:
-                if isinstance(reading_time, str):
-                    reading_time_int = int(reading_time.split()[0])
-                else:
-                    reading_time_int = int(reading_time)
-            
-            medium_analysis = analyze_medium_readiness(blog_post_text)
-            
-            image_1_data = None
-            image_2_data = None
-            if images and images[0]:
-                img_str = str(images[0])
-                if len(img_str) < 5000000:
-                    image_1_data = img_str
-                    print(f"✓ Image 1 included: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-                else:
-                    print(f"✗ Image 1 too large: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-            else:
-                print("✗ Image 1 not generated")
-            if images and images[1]:
-                img_str = str(images[1])
-                if len(img_str) < 5000000:
-                    image_2_data = img_str
-                    print(f"✓ Image 2 included: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-                else:
-                    print(f"✗ Image 2 too large: {len(img_str)} chars ({len(img_str)/1000000:.2f}MB)")
-            else:
-                print("✗ Image 2 not generated")
-            
-            full_blog_data = {
-                'title': str(title) if title else '',
-                'blog_post_html': str(blog_post_html) if blog_post_html else '',
-                'blog_post_markdown': str(blog_post_text) if blog_post_text else '',
-                'image_data': image_1_data,
-                'image_data_2': image_2_data,
-                'reading_time': reading_time,
-                'key_quotes': list(key_quotes) if key_quotes else [],
-                'engagement_score': int(engagement_score) if engagement_score else 0,
-                'word_count': int(len(blog_post_text.split())),
-                'seo_score': int(seo_analysis.get('seo_score', 0)),
-                'viral_potential': int(seo_analysis.get('viral_potential', 0)),
-                'readability_score': int(seo_analysis.get('readability_score', 0)),
-                'seo_recommendations': list(seo_recommendations) if seo_recommendations else [],
-                'medium_readiness_score': medium_analysis.get('medium_readiness_score', 0),
-                'medium_recommendations': medium_analysis.get('recommendations', []),
-                'tenant_id': g.tenant_id
-            }
-            
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(full_blog_data, f, ensure_ascii=False)
-            
-            db = get_supabase_manager()
-            if db:
-                try:
-                    result = db.save_blog_post({
-                        'title': title,
-                        'html_content': blog_post_html,
-                        'markdown_content': blog_post_text,
-                        'image_header': images[0],
-                        'image_content': images[1],
-                        'reading_time': reading_time,
-                        'key_quotes': key_quotes,
-                        'engagement_score': engagement_score,
-                        'word_count': len(blog_post_text.split()),
-                        'seo_score': seo_analysis.get('seo_score', 0),
-                        'viral_potential': seo_analysis.get('viral_potential', 0),
-                        'readability_score': seo_analysis.get('readability_score', 0),
-                        'seo_recommendations': seo_recommendations,
-                        'medium_readiness_score': medium_analysis.get('medium_readiness_score', 0),
-                        'medium_recommendations': medium_analysis.get('recommendations', [])
-                    }, user_id=g.user_id, tenant_id=g.tenant_id)
-                    if result:
-                        print(f"Supabase save successful")
-                except Exception as e:
-                    print(f"Supabase save failed (non-critical): {str(e)[:200]}")
+            post_id, pipeline_result = run_blog_generation(user_input, model, template, tone, enhance=enhance,
+                                                           outline_first=outline_first)
             
             tenant_set('current_post_id', post_id)
             
@@ -1726,7 +1567,11 @@ def health():
         'timestamp': datetime.now().isoformat(),
         'database': 'connected' if db else 'not_configured',
         'temp_storage': str(TEMP_STORAGE_DIR),
-        'temp_files_count': temp_files_count
+        'temp_files_count': temp_files_count,
+        'supabase_pool': get_supabase_pool().get_stats() if db else None,
+        'auth_verifier': get_token_verifier().get_stats() if get_token_verifier() else None,
+        'write_behind': get_write_behind().get_stats() if db and get_write_behind() else None,
+        'supabase_queries': query_stats.get_stats() if db else None
     }
     return jsonify(status), 200
 
@@ -2002,7 +1847,7 @@ def title_alternatives():
         content = data.get('content', '')
         
         prompt = get_title_alternatives_prompt(current_title, content)
-        alternatives = get_ai_manager().generate_content(prompt)
+        alternatives = get_ai_manager().generate_content(prompt, task='title_alternatives')
         
         return jsonify({
             'success': True,
@@ -2019,7 +1864,7 @@ def meta_description():
         content = data.get('content', '')
         
         prompt = get_meta_description_prompt(title, content)
-        description = get_ai_manager().generate_content(prompt)
+        description = get_ai_manager().generate_content(prompt, task='meta_description')
         
         return jsonify({
             'success': True,
@@ -2028,6 +1873,33 @@ def meta_description():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def analyze_editor_content(content, title=''):
+    """Score a post for the editor; unchanged sections come from the section cache."""
+    doc = get_document(content)
+    key = ('editor_analysis', title)
+    if key not in doc.derived:
+        seo = analyze_seo(doc, title)
+        doc.derived[key] = {
+            'word_count': doc.word_count,
+            'reading_time': estimate_reading_time(doc),
+            'readability_score': round(seo['readability_score'], 1),
+            'seo_score': seo['seo_score'],
+            'engagement_score': calculate_engagement_score(doc),
+            'medium_readiness_score': analyze_medium_readiness(doc)['medium_readiness_score'],
+        }
+    return dict(doc.derived[key])
+
+def apply_section_edit(data, original, replacement):
+    """Splice an edited section into the optional full `post` and rescore it."""
+    post = data.get('post')
+    if not post or not original or original not in post:
+        return {}
+    updated = post.replace(original, replacement, 1)
+    return {
+        'post': updated,
+        'analysis': analyze_editor_content(updated, data.get('title', ''))
+    }
+
 @app.route('/api/rewrite-section', methods=['POST'])
 def rewrite_section():
     try:
@@ -2040,7 +1912,8 @@ def rewrite_section():
         
         return jsonify({
             'success': True,
-            'rewritten': rewritten
+            'rewritten': rewritten,
+            **apply_section_edit(data, section, rewritten)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2057,7 +1930,8 @@ def adjust_tone():
         
         return jsonify({
             'success': True,
-            'adjusted': adjusted
+            'adjusted': adjusted,
+            **apply_section_edit(data, content, adjusted)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2074,7 +1948,8 @@ def expand_section():
         
         return jsonify({
             'success': True,
-            'expanded': expanded
+            'expanded': expanded,
+            **apply_section_edit(data, section, expanded)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2091,7 +1966,8 @@ def compress_section():
         
         return jsonify({
             'success': True,
-            'compressed': compressed
+            'compressed': compressed,
+            **apply_section_edit(data, section, compressed)
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -2116,7 +1992,8 @@ def generate_storyboard():
         if storyboard_image and storyboard_image[0]:
             return jsonify({
                 'success': True,
-                'image': storyboard_image[0]
+                'image': url_for('serve_blob', key=storyboard_image[0]),
+                'image_key': storyboard_image[0]
             })
         else:
             return jsonify({'error': 'Failed to generate storyboard'}), 500
@@ -2261,27 +2138,40 @@ def batch():
 def history():
     db = get_supabase_manager()
     posts = []
+    next_page = None
+    next_cursor = None
+    cursor = request.args.get('cursor')
     if db:
-        posts = db.get_recent_posts(user_id=g.user_id, tenant_id=g.tenant_id, limit=50)
-    if not posts:
-        posts = get_all_temp_posts()
+        posts, next_cursor = db.get_posts_page(user_id=g.user_id, tenant_id=g.tenant_id, limit=HISTORY_PAGE_SIZE,
+                                               cursor=cursor)
+    if not posts and not cursor:
+        page = max(request.args.get('page', 1, type=int), 1)
+        # One extra row tells whether an older page exists
+        posts = get_temp_posts(limit=HISTORY_PAGE_SIZE + 1, offset=(page - 1) * HISTORY_PAGE_SIZE)
+        if len(posts) > HISTORY_PAGE_SIZE:
+            posts = posts[:HISTORY_PAGE_SIZE]
+            next_page = page + 1
 
     print(f"History route: Found {len(posts) if posts else 0} posts")
     if posts:
         print(f"First post: {posts[0].get('title', 'No title')}")
 
-    return render_template('history.html', posts=posts if posts else [], user=g.user, tenant_id=g.tenant_id)
+    return render_template('history.html', posts=posts if posts else [], next_page=next_page,
+                           next_cursor=next_cursor, user=g.user, tenant_id=g.tenant_id)
 
 @app.route('/api/posts/recent')
 @require_session
 def api_recent_posts():
     db = get_supabase_manager()
     posts = []
+    next_cursor = None
+    cursor = request.args.get('cursor')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
     if db:
-        posts = db.get_recent_posts(user_id=g.user_id, tenant_id=g.tenant_id, limit=20)
-    if not posts:
-        posts = get_all_temp_posts()
-    return jsonify({'success': True, 'posts': posts})
+        posts, next_cursor = db.get_posts_page(user_id=g.user_id, tenant_id=g.tenant_id, limit=limit, cursor=cursor)
+    if not posts and not cursor:
+        posts = get_temp_posts(limit=limit, offset=max(request.args.get('offset', 0, type=int), 0))
+    return jsonify({'success': True, 'posts': posts, 'next_cursor': next_cursor})
 
 @app.route('/api/posts/<post_id>')
 @require_session
@@ -2408,8 +2298,10 @@ def api_search_posts():
     if not db:
         return jsonify({'error': 'Database not configured'}), 503
     
-    results = db.search_posts(query, user_id=g.user_id, tenant_id=g.tenant_id)
-    return jsonify({'success': True, 'results': results})
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 100)
+    results, next_cursor = db.search_posts_page(query, user_id=g.user_id, tenant_id=g.tenant_id, limit=limit,
+                                                cursor=request.args.get('cursor'))
+    return jsonify({'success': True, 'results': results, 'next_cursor': next_cursor})
 
 @app.route('/api/drafts', methods=['GET', 'POST'])
 @require_session
@@ -2541,6 +2433,25 @@ def api_job_stats():
     stats = queue.get_queue_stats(tenant_id=g.tenant_id)
     return jsonify({'success': True, 'stats': stats})
 
+@app.route('/api/ai/prompt-cache-stats')
+@require_session
+def api_prompt_cache_stats():
+    return jsonify({'success': True, 'stats': get_prompt_cache_stats().get_stats()})
+
+@app.route('/api/images/stats')
+@require_session
+def api_image_stats():
+    return jsonify({
+        'success': True,
+        'variants': get_variant_pool().get_stats(),
+        'cache': get_image_cache().get_stats()
+    })
+
+@app.route('/api/ai/router-stats')
+@require_session
+def api_router_stats():
+    return jsonify({'success': True, 'stats': get_model_router().get_stats()})
+
 @app.route('/api/cache/clear', methods=['POST'])
 @require_session
 @rate_limit_check(max_requests=5, window=300)
@@ -2561,13 +2472,27 @@ def api_progress(job_id):
 @app.route('/api/progress/<job_id>/stream')
 @require_session
 def api_progress_stream(job_id):
+    tenant_id = g.tenant_id
+    heartbeat_seconds = int(os.environ.get('PROGRESS_HEARTBEAT_SECONDS', '15'))
+    max_stream_seconds = int(os.environ.get('PROGRESS_STREAM_MAX_SECONDS', '300'))
+    
     def generate():
         tracker = get_progress_tracker()
-        max_checks = 300
-        check_count = 0
-        
-        while check_count < max_checks:
-            progress = tracker.get_progress(job_id, tenant_id=g.tenant_id)
+        deadline = time.monotonic() + max_stream_seconds
+        version = -1
+        
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            new_version, progress = tracker.wait_for_update(
+                job_id, version, timeout=min(heartbeat_seconds, remaining), tenant_id=tenant_id
+            )
+            if new_version == version:
+                yield ": heartbeat\n\n"
+                continue
+            version = new_version
+            
             if progress:
                 yield f"data: {json.dumps(progress)}\n\n"
                 
@@ -2575,13 +2500,13 @@ def api_progress_stream(job_id):
                     break
             else:
                 yield f"data: {json.dumps({'stage': 'waiting', 'progress': 0, 'message': 'Waiting for progress...'})}\n\n"
-            
-            time.sleep(1)
-            check_count += 1
         
         yield f"data: {json.dumps({'stage': 'done', 'progress': 100, 'message': 'Complete'})}\n\n"
     
-    return app.response_class(generate(), mimetype='text/event-stream')
+    response = app.response_class(generate(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @app.route('/kario-socials')
 @require_session
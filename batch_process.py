@@ -2,39 +2,98 @@ import os
 import sys
 import csv
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 import prompts
 from util import (
-    extract_title_from_markdown,
     validate_youtube_url,
-    clean_markdown,
-    estimate_reading_time,
-    calculate_engagement_score
+    clean_markdown
 )
 from ai_providers import AIProviderManager, get_youtube_transcript, detect_input_type, scrape_web_content, research_trending_topic
-from seo_analyzer import analyze_seo
+from blog_pipeline import StagePipeline, add_analysis_stages
+from job_queue import get_job_queue
 
 load_dotenv()
 
-def generate_blog_post(ai_manager, user_input):
+# Seconds between checks on a batch item's final stage
+POLL_SECONDS = 0.5
+
+def ingest_content(ai_manager, user_input):
     input_type = detect_input_type(user_input)
     
     if input_type == 'youtube':
-        content_context = get_youtube_transcript(user_input)
-    elif input_type == 'url':
-        content_context = scrape_web_content(user_input)
-    else:
-        if any(keyword in user_input.lower() for keyword in ['trending', 'latest', 'today', 'recent', 'current']):
-            content_context = research_trending_topic(user_input, ai_manager)
-        else:
-            content_context = f"User Request: {user_input}\n\nCreate comprehensive, well-researched content based on this topic or prompt."
-    
+        return get_youtube_transcript(user_input)
+    if input_type == 'url':
+        return scrape_web_content(user_input)
+    if any(keyword in user_input.lower() for keyword in ['trending', 'latest', 'today', 'recent', 'current']):
+        return research_trending_topic(user_input, ai_manager)
+    return f"User Request: {user_input}\n\nCreate comprehensive, well-researched content based on this topic or prompt."
+
+def generate_text(ai_manager, content_context):
     prompt = prompts.get_blog_gen_prompt()
     response = ai_manager.generate_content(prompt, content_context)
     return clean_markdown(response)
 
+def generate_blog_post(ai_manager, user_input):
+    return generate_text(ai_manager, ingest_content(ai_manager, user_input))
+
+def write_markdown_file(blog_post_text, title, output_path, file_prefix):
+    safe_title = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in title)
+    safe_title = safe_title[:100]
+    
+    filename = f"{file_prefix}_{safe_title}.md"
+    with open(output_path / filename, 'w', encoding='utf-8') as f:
+        f.write(blog_post_text)
+    return filename
+
+def analyze_text(blog_post_text):
+    """Title, metadata and SEO; the pipeline runs the independent analyses concurrently."""
+    result = add_analysis_stages(StagePipeline('batch_analysis'), html=False).run(blog_post_text=blog_post_text)
+    return {**result.results, 'timings': result.timings}
+
+def _ingest_stage(ai_manager, user_input, dependency_results):
+    return ingest_content(ai_manager, user_input)
+
+def _text_stage(ai_manager, dependency_results):
+    return generate_text(ai_manager, dependency_results['ingest'])
+
+def _analysis_stage(dependency_results):
+    return analyze_text(dependency_results['text'])
+
+def _persist_stage(output_path, file_prefix, dependency_results):
+    title = dependency_results['analysis']['title']
+    return write_markdown_file(dependency_results['text'], title, output_path, file_prefix)
+
+def batch_item_stages(ai_manager, user_input, output_path, file_prefix):
+    """
+    The JobQueue stage graph for one batch item: ingest -> text -> analysis -> persist.
+    Stage results are cached by input, so re-running a batch after a late failure
+    skips the transcript fetch and generation that already succeeded.
+    """
+    return {
+        'ingest': {'function': _ingest_stage, 'args': (ai_manager, user_input)},
+        'text': {'function': _text_stage, 'args': (ai_manager,), 'depends_on': ['ingest']},
+        'analysis': {'function': _analysis_stage, 'depends_on': ['text'], 'job_type': 'analysis'},
+        # The file name carries this run's prefix, so it is always rewritten
+        'persist': {'function': _persist_stage, 'args': (output_path, file_prefix),
+                    'depends_on': ['text', 'analysis'], 'cache': False}
+    }
+
+def batch_cache_key(user_input):
+    return f"batch:{user_input.strip()}"
+
+def wait_for_item(job_queue, job_ids):
+    """Block until the item's persist stage finishes; returns its status and the stage results so far."""
+    while True:
+        final = job_queue.get_job_status(job_ids['persist'])
+        if final['status'] in ('completed', 'failed', 'cancelled'):
+            break
+        time.sleep(POLL_SECONDS)
+    stages = {name: job_queue.get_job_status(job_id) for name, job_id in job_ids.items()}
+    return final, stages
+
 def process_batch(input_file, output_dir='output'):
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
@@ -53,6 +112,7 @@ def process_batch(input_file, output_dir='output'):
             urls = [line.strip() for line in f if line.strip()]
     
     ai_manager = AIProviderManager()
+    job_queue = get_job_queue()
     total = len(urls)
     
     print(f"📝 Processing {total} items...")
@@ -60,10 +120,18 @@ def process_batch(input_file, output_dir='output'):
     print("🤖 Using AI providers: OpenAI (primary) → Gemini (secondary) → Anthropic (fallback)")
     print("=" * 60)
     
+    # Every item's stages go on the queue up front, so items run concurrently
+    pipelines = {}
+    for idx, item in enumerate(urls, 1):
+        if not item or len(item.strip()) < 3:
+            continue
+        stages = batch_item_stages(ai_manager, item, output_path, f"{timestamp}_{idx:03d}")
+        pipelines[idx] = job_queue.enqueue_pipeline(stages, cache_key=batch_cache_key(item))
+    
     for idx, item in enumerate(urls, 1):
         print(f"\n[{idx}/{total}] Processing: {item}")
         
-        if not item or len(item.strip()) < 3:
+        if idx not in pipelines:
             print(f"   ❌ Invalid input, skipping")
             results.append({
                 'input': item,
@@ -72,48 +140,49 @@ def process_batch(input_file, output_dir='output'):
             })
             continue
         
-        try:
-            blog_text = generate_blog_post(ai_manager, item)
-            title = extract_title_from_markdown(blog_text)
-            
-            safe_title = "".join(c if c.isalnum() or c in (' ', '-', '_') else '_' for c in title)
-            safe_title = safe_title[:100]
-            
-            filename = f"{timestamp}_{idx:03d}_{safe_title}.md"
-            filepath = output_path / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(blog_text)
-            
-            word_count = len(blog_text.split())
-            reading_time = estimate_reading_time(blog_text)
-            engagement_score = calculate_engagement_score(blog_text)
-            
-            seo_analysis = analyze_seo(blog_text, title)
-            seo_score = seo_analysis.get('seo_score', 0)
-            viral_potential = seo_analysis.get('viral_potential', 0)
-            
-            print(f"   ✅ Generated: {filename}")
-            print(f"   📊 Words: {word_count} | Engagement: {engagement_score}/100 | SEO: {seo_score}/100 | Viral: {viral_potential}/100")
-            
+        final, stages = wait_for_item(job_queue, pipelines[idx])
+        stage_status = {name: job['status'] for name, job in stages.items()}
+        if final['status'] != 'completed':
+            failed = [name for name, job in stages.items() if job['status'] == 'failed']
+            error = stages[failed[0]]['error'] if failed else final.get('error')
+            print(f"   ❌ Error in {failed[0] if failed else 'persist'} stage: {error}")
             results.append({
-                'url': url,
-                'status': 'success',
-                'filename': filename,
-                'title': title,
-                'word_count': word_count,
-                'engagement_score': engagement_score,
-                'seo_score': seo_score,
-                'viral_potential': viral_potential
-            })
-            
-        except Exception as e:
-            print(f"   ❌ Error: {str(e)}")
-            results.append({
-                'url': url,
+                'input': item,
                 'status': 'failed',
-                'error': str(e)
+                'error': error,
+                'stages': stage_status,
+                'job_ids': pipelines[idx]
             })
+            continue
+        
+        analysis = stages['analysis']['result']
+        filename = final['result']
+        title = analysis['title']
+        metadata = analysis['metadata']
+        word_count = metadata['word_count']
+        engagement_score = metadata['engagement_score']
+        
+        seo_analysis = analysis['seo']['analysis']
+        seo_score = seo_analysis.get('seo_score', 0)
+        viral_potential = seo_analysis.get('viral_potential', 0)
+        cached = [name for name, job in stages.items() if job.get('cached')]
+        
+        print(f"   ✅ Generated: {filename}" + (f" (cached: {', '.join(cached)})" if cached else ""))
+        print(f"   📊 Words: {word_count} | Engagement: {engagement_score}/100 | SEO: {seo_score}/100 | Viral: {viral_potential}/100")
+        
+        results.append({
+            'input': item,
+            'status': 'success',
+            'filename': filename,
+            'title': title,
+            'word_count': word_count,
+            'engagement_score': engagement_score,
+            'seo_score': seo_score,
+            'viral_potential': viral_potential,
+            'stages': stage_status,
+            'cached_stages': cached,
+            'stage_timings': analysis.get('timings')
+        })
     
     report_file = output_path / f"batch_report_{timestamp}.json"
     with open(report_file, 'w', encoding='utf-8') as f:
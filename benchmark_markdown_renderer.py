@@ -0,0 +1,77 @@
+import re
+import sys
+import time
+
+import markdown
+
+from markdown_renderer import MarkdownRenderer
+from benchmark_text_analysis import WORD_COUNTS, build_post
+
+ROUNDS = 20
+
+CODE_BLOCK = "\n\n```python\ndef handler(event):\n    return {'ok': True}\n```\n\nUse `handler` in the `main` module.\n\n| Stage | Seconds |\n|---|---|\n| fetch | 1.2 |\n| write | 3.4 |"
+
+
+def legacy_render(blog_post_text):
+    cleaned_markdown = blog_post_text.replace('```', '')
+    cleaned_markdown = re.sub(r'`([^`]+)`', r'\1', cleaned_markdown)
+
+    blog_post_html = markdown.markdown(
+        cleaned_markdown,
+        extensions=[
+            "markdown.extensions.tables",
+            "markdown.extensions.fenced_code",
+            "markdown.extensions.nl2br",
+            "markdown.extensions.codehilite",
+            "markdown.extensions.extra",
+            "markdown.extensions.sane_lists"
+        ],
+        extension_configs={
+            'markdown.extensions.codehilite': {
+                'css_class': 'highlight',
+                'linenums': False
+            }
+        }
+    )
+
+    blog_post_html = re.sub(r'<div[^>]*>', '', blog_post_html)
+    blog_post_html = blog_post_html.replace('</div>', '')
+    blog_post_html = re.sub(r'<pre[^>]*>', '', blog_post_html)
+    blog_post_html = blog_post_html.replace('</pre>', '')
+    blog_post_html = re.sub(r'<code[^>]*>', '', blog_post_html)
+    blog_post_html = blog_post_html.replace('</code>', '')
+    blog_post_html = re.sub(r' class="[^"]*"', '', blog_post_html)
+    blog_post_html = re.sub(r' id="[^"]*"', '', blog_post_html)
+    blog_post_html = re.sub(r'<p>\s*</p>', '', blog_post_html)
+    blog_post_html = re.sub(r'<span[^>]*>', '', blog_post_html)
+    blog_post_html = blog_post_html.replace('</span>', '')
+    return blog_post_html.strip()
+
+
+def time_ms(func, post):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        func(post)
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+print("=" * 60)
+print("MARKDOWN RENDERER BENCHMARK")
+print("=" * 60)
+print(f"{ROUNDS} rounds per size\n")
+print(f"{'words':>8} {'legacy ms':>11} {'renderer ms':>13} {'cached ms':>11} {'same html':>10}")
+
+uncached = MarkdownRenderer(cache_size=0)
+cached = MarkdownRenderer()
+mismatches = 0
+
+for word_count in WORD_COUNTS:
+    post = build_post(word_count) + CODE_BLOCK
+    same = legacy_render(post) == uncached.render(post)
+    mismatches += 0 if same else 1
+    legacy = time_ms(legacy_render, post)
+    fresh = time_ms(uncached.render, post)
+    warm = time_ms(cached.render, post)
+    print(f"{word_count:>8} {legacy:>11.2f} {fresh:>13.2f} {warm:>11.3f} {'yes' if same else 'NO':>10}")
+
+sys.exit(1 if mismatches else 0)
@@ -0,0 +1,113 @@
+import random
+import sys
+import time
+
+import text_analysis
+from util import calculate_engagement_score, estimate_reading_time
+from seo_analyzer import analyze_seo
+from medium_research_agent import analyze_medium_readiness
+from advanced_analytics import (
+    analyze_keywords, analyze_sentence_structure, analyze_tone_sentiment,
+    analyze_engagement_potential, calculate_viral_potential
+)
+
+WORD_COUNTS = [1000, 2500, 5000, 10000]
+ROUNDS = 20
+TITLE = "How to Master the Hidden Truth About Content Pipelines"
+
+VOCAB = (
+    "the content pipeline system writers really need great strategy process "
+    "people often struggle with difficult problems but simple tools help "
+    "implement optimize analyze readers engage amazing results quickly"
+).split()
+
+
+def build_post(word_count, seed=42):
+    rng = random.Random(seed)
+    blocks = [f"# {TITLE}"]
+    written = 0
+    while written < word_count:
+        roll = rng.random()
+        if roll < 0.08:
+            blocks.append(f"## Section {len(blocks)}")
+        elif roll < 0.12:
+            blocks.append("* first point\n* second point\n1. numbered step")
+        elif roll < 0.14:
+            blocks.append("> A quote worth **remembering** https://example.com")
+        else:
+            length = rng.randint(20, 80)
+            words = [rng.choice(VOCAB) for _ in range(length)]
+            for i in range(rng.randint(6, 14), length, rng.randint(8, 16)):
+                words[i] += rng.choice(['.', '.', '?', '!'])
+            blocks.append(' '.join(words) + '.')
+            written += length
+    return '\n\n'.join(blocks)
+
+
+def score_post(text, shared):
+    scorers = [
+        lambda: calculate_engagement_score(text),
+        lambda: estimate_reading_time(text),
+        lambda: analyze_seo(text, TITLE),
+        lambda: analyze_medium_readiness(text),
+        lambda: analyze_keywords(text),
+        lambda: analyze_sentence_structure(text),
+        lambda: analyze_tone_sentiment(text),
+        lambda: analyze_engagement_potential(text, TITLE),
+        lambda: calculate_viral_potential(text, TITLE, 70),
+    ]
+    for scorer in scorers:
+        if not shared:
+            text_analysis.clear_cache()
+        scorer()
+
+
+def time_section_edit(text, incremental):
+    sections = text_analysis.split_sections(text)
+    middle = len(sections) // 2
+    text_analysis.clear_cache()
+    score_post(text, shared=True)
+    start = time.perf_counter()
+    for i in range(ROUNDS):
+        if not incremental:
+            text_analysis.clear_cache()
+        edited = list(sections)
+        edited[middle] = f"{sections[middle]} Edit number {i}."
+        score_post('\n\n'.join(edited), shared=True)
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def time_scoring(text, shared):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        text_analysis.clear_cache()
+        score_post(text, shared)
+    return (time.perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    print("=" * 60)
+    print("TEXT ANALYSIS BENCHMARK")
+    print("=" * 60)
+    print(f"{ROUNDS} rounds per size, all scorers per round\n")
+    print(f"{'words':>8} {'per-scorer ms':>15} {'shared ms':>12} {'speedup':>9}")
+
+    for word_count in WORD_COUNTS:
+        post = build_post(word_count)
+        cold = time_scoring(post, shared=False)
+        warm = time_scoring(post, shared=True)
+        print(f"{word_count:>8} {cold:>15.2f} {warm:>12.2f} {cold / warm:>8.1f}x")
+
+    print(f"\nRescoring after a one-section edit\n")
+    print(f"{'words':>8} {'full ms':>15} {'incremental ms':>15} {'speedup':>9}")
+
+    for word_count in WORD_COUNTS:
+        post = build_post(word_count)
+        full = time_section_edit(post, incremental=False)
+        incremental = time_section_edit(post, incremental=True)
+        print(f"{word_count:>8} {full:>15.2f} {incremental:>15.2f} {full / incremental:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
+    sys.exit(0)
@@ -0,0 +1,222 @@
+import os
+import re
+import json
+import base64
+import hashlib
+import uuid
+import threading
+from pathlib import Path
+from typing import Iterable, Optional
+
+BLOB_DIR = Path(os.environ.get('BLOB_STORE_PATH') or Path(__file__).parent / 'blob_store')
+BLOB_CHUNK_SIZE = 64 * 1024
+BLOB_KEY_RE = re.compile(r'^[0-9a-f]{64}\.(png|jpg|webp|avif|gif)$')
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'webp': 'image/webp',
+    'avif': 'image/avif',
+    'gif': 'image/gif'
+}
+
+
+def detect_extension(data: bytes) -> str:
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return 'png'
+    if data[:3] == b'\xff\xd8\xff':
+        return 'jpg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'webp'
+    if data[4:12] in (b'ftypavif', b'ftypavis'):
+        return 'avif'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    return 'png'
+
+
+def is_blob_key(value) -> bool:
+    return isinstance(value, str) and bool(BLOB_KEY_RE.match(value))
+
+
+def content_type_for(key: str) -> str:
+    return CONTENT_TYPES.get(key.rsplit('.', 1)[-1], 'application/octet-stream')
+
+
+class BlobStore:
+    """
+    Content-addressed storage for image bytes. Keys are '<sha256>.<ext>', so
+    the same image is stored once and a key never changes meaning.
+    Backends implement _write, get, exists and delete.
+    """
+
+    def put(self, data: bytes, extension: Optional[str] = None) -> str:
+        key = f"{hashlib.sha256(data).hexdigest()}.{extension or detect_extension(data)}"
+        if not self.exists(key):
+            self._write(key, data)
+        return key
+
+    def put_stream(self, chunks: Iterable[bytes], extension: Optional[str] = None) -> str:
+        """Store an iterable of byte chunks. Backends that can write incrementally override this."""
+        return self.put(b''.join(chunks), extension)
+
+    def _write(self, key: str, data: bytes):
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[Path]:
+        """Filesystem path for backends that have one, so it can be served directly."""
+        return None
+
+    def put_manifest(self, key: str, manifest: dict):
+        """Small JSON document describing a blob, such as its derived variants."""
+        raise NotImplementedError
+
+    def get_manifest(self, key: str) -> Optional[dict]:
+        raise NotImplementedError
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: Path = BLOB_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key: {key[:80]}")
+        return self.root / key[:2] / key
+
+    def _write(self, key: str, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def put_stream(self, chunks: Iterable[bytes], extension: Optional[str] = None) -> str:
+        # Hash while writing to a temp file so the image is never held in memory whole
+        digest = hashlib.sha256()
+        tmp_path = self.root / f"upload.{uuid.uuid4().hex}.tmp"
+        head = b''
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    if not chunk:
+                        continue
+                    if len(head) < 16:
+                        head += chunk[:16]
+                    digest.update(chunk)
+                    f.write(chunk)
+            if not head:
+                raise ValueError("Empty image stream")
+            key = f"{digest.hexdigest()}.{extension or detect_extension(head)}"
+            path = self._path(key)
+            if path.exists():
+                tmp_path.unlink()
+            else:
+                path.parent.mkdir(exist_ok=True)
+                os.replace(tmp_path, path)
+            return key
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self.local_path(key)
+        if not path:
+            return None
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return is_blob_key(key) and self._path(key).exists()
+
+    def delete(self, key: str) -> bool:
+        path = self.local_path(key)
+        if not path:
+            return False
+        path.unlink(missing_ok=True)
+        return True
+
+    def local_path(self, key: str) -> Optional[Path]:
+        if not self.exists(key):
+            return None
+        return self._path(key)
+
+    def _manifest_path(self, key: str) -> Path:
+        if not is_blob_key(key):
+            raise ValueError(f"Invalid blob key: {key[:80]}")
+        return self.root / 'manifests' / f"{key}.json"
+
+    def put_manifest(self, key: str, manifest: dict):
+        path = self._manifest_path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+
+    def get_manifest(self, key: str) -> Optional[dict]:
+        if not is_blob_key(key):
+            return None
+        path = self._manifest_path(key)
+        if not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+BLOB_BACKENDS = {
+    'local': LocalBlobStore
+}
+
+
+def register_blob_backend(name: str, backend_class):
+    BLOB_BACKENDS[name] = backend_class
+
+
+_blob_store = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                backend = os.environ.get('BLOB_STORE_BACKEND', 'local')
+                if backend not in BLOB_BACKENDS:
+                    print(f"[BlobStore] Unknown backend '{backend}', using local")
+                    backend = 'local'
+                _blob_store = BLOB_BACKENDS[backend]()
+    return _blob_store
+
+
+def store_image(image) -> Optional[str]:
+    """
+    Store an image given as raw bytes or as a base64 string and return its key.
+    Existing keys pass through unchanged.
+    """
+    if not image:
+        return None
+    if is_blob_key(image):
+        return image
+    if isinstance(image, str):
+        try:
+            image = base64.b64decode(image)
+        except Exception as e:
+            print(f"[BlobStore] Could not decode image: {e}")
+            return None
+    return get_blob_store().put(image)
@@ -0,0 +1,178 @@
+import os
+import time
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Iterable
+
+from util import extract_title_from_markdown, estimate_reading_time, extract_key_quotes, calculate_engagement_score
+from seo_analyzer import analyze_seo, generate_seo_recommendations
+from medium_research_agent import analyze_medium_readiness
+from markdown_renderer import render_markdown
+
+_REQUIRED = object()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_pipeline_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.environ.get('PIPELINE_WORKERS', 8))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='pipeline')
+    return _executor
+
+
+class PipelineResult:
+    def __init__(self, name):
+        self.name = name
+        self.results = {}
+        self.timings = {}
+        self.errors = {}
+        self.total_seconds = 0.0
+
+    def __getitem__(self, key):
+        return self.results[key]
+
+    def get(self, key, default=None):
+        return self.results.get(key, default)
+
+    def summary(self):
+        stages = ', '.join(f"{name}={t['seconds']:.2f}s" for name, t in
+                           sorted(self.timings.items(), key=lambda item: item[1]['started']))
+        return f"[Pipeline] {self.name} finished in {self.total_seconds:.2f}s ({stages})"
+
+
+class StagePipeline:
+    """
+    In-process stage graph for one piece of content.
+
+    Each stage names the inputs or earlier stages it needs and receives them
+    as keyword arguments; stages whose requirements are met run concurrently
+    on a shared thread pool. A stage added with a default is optional: if it
+    raises, the error is recorded and dependents receive the default.
+    """
+
+    def __init__(self, name='pipeline'):
+        self.name = name
+        self.stages = {}
+
+    def stage(self, name: str, func: Callable, requires: Iterable[str] = (), default=_REQUIRED):
+        self.stages[name] = {'func': func, 'requires': tuple(requires), 'default': default}
+        return self
+
+    def _validate(self, inputs):
+        for name, stage in self.stages.items():
+            for dep in stage['requires']:
+                if dep not in self.stages and dep not in inputs:
+                    raise ValueError(f"Stage '{name}' requires unknown stage or input '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name, path):
+            if name in done or name in inputs:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline cycle detected: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in self.stages[name]['requires']:
+                visit(dep, path + [name])
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name, [])
+
+    def _run_stage(self, name, kwargs):
+        started = time.time()
+        try:
+            return self.stages[name]['func'](**kwargs), None, started, time.time()
+        except Exception as e:
+            return None, e, started, time.time()
+
+    def run(self, **inputs) -> PipelineResult:
+        self._validate(inputs)
+        result = PipelineResult(self.name)
+        values = dict(inputs)
+        pending = dict(self.stages)
+        running = {}
+        executor = get_pipeline_executor()
+        run_started = time.time()
+
+        try:
+            while pending or running:
+                for name in [n for n, s in pending.items() if all(d in values for d in s['requires'])]:
+                    stage = pending.pop(name)
+                    kwargs = {dep: values[dep] for dep in stage['requires']}
+                    # Stage threads see the caller's Flask request/tenant context
+                    ctx = contextvars.copy_context()
+                    running[executor.submit(ctx.run, self._run_stage, name, kwargs)] = name
+
+                if not running:
+                    raise ValueError(f"Pipeline '{self.name}' stalled with stages {list(pending)}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    value, error, started, ended = future.result()
+                    result.timings[name] = {
+                        'started': round(started - run_started, 3),
+                        'seconds': round(ended - started, 3),
+                        'status': 'failed' if error else 'completed'
+                    }
+                    if error is not None:
+                        default = self.stages[name]['default']
+                        if default is _REQUIRED:
+                            raise error
+                        print(f"[Pipeline] Optional stage '{name}' failed: {error}")
+                        result.errors[name] = str(error)
+                        value = default() if callable(default) else default
+                    values[name] = value
+                    result.results[name] = value
+        finally:
+            for future in running:
+                future.cancel()
+            result.total_seconds = round(time.time() - run_started, 3)
+
+        print(result.summary())
+        return result
+
+
+def _title(blog_post_text):
+    return extract_title_from_markdown(blog_post_text)
+
+
+def _metadata(blog_post_text):
+    return {
+        'reading_time': estimate_reading_time(blog_post_text),
+        'key_quotes': extract_key_quotes(blog_post_text),
+        'engagement_score': calculate_engagement_score(blog_post_text),
+        'word_count': len(blog_post_text.split())
+    }
+
+
+def _seo(blog_post_text, title):
+    seo_analysis = analyze_seo(blog_post_text, title)
+    return {'analysis': seo_analysis, 'recommendations': generate_seo_recommendations(seo_analysis)}
+
+
+def _medium(blog_post_text):
+    return analyze_medium_readiness(blog_post_text)
+
+
+def _html(blog_post_text):
+    return render_markdown(blog_post_text)
+
+
+def add_analysis_stages(pipeline: StagePipeline, html=True) -> StagePipeline:
+    """Add the stages that only read the finished `blog_post_text`."""
+    pipeline.stage('title', _title, requires=['blog_post_text'])
+    pipeline.stage('metadata', _metadata, requires=['blog_post_text'])
+    pipeline.stage('seo', _seo, requires=['blog_post_text', 'title'])
+    pipeline.stage('medium', _medium, requires=['blog_post_text'])
+    if html:
+        pipeline.stage('html', _html, requires=['blog_post_text'])
+    return pipeline
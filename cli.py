@@ -4,14 +4,11 @@ import argparse
 from dotenv import load_dotenv
 import prompts
 from util import (
-    extract_title_from_markdown,
     validate_youtube_url,
-    clean_markdown,
-    estimate_reading_time,
-    calculate_engagement_score
+    clean_markdown
 )
 from ai_providers import AIProviderManager, get_youtube_transcript, detect_input_type, scrape_web_content, research_trending_topic
-from seo_analyzer import analyze_seo, generate_seo_recommendations
+from blog_pipeline import StagePipeline, add_analysis_stages
 from content_templates import TEMPLATES, get_template_prompt
 
 load_dotenv()
@@ -65,13 +62,14 @@ Return the enhanced version in Markdown format.
     return blog_text
 
 def print_stats(blog_text):
-    title = extract_title_from_markdown(blog_text)
-    reading_time = estimate_reading_time(blog_text)
-    engagement_score = calculate_engagement_score(blog_text)
-    word_count = len(blog_text.split())
-    
-    seo_analysis = analyze_seo(blog_text, title)
-    recommendations = generate_seo_recommendations(seo_analysis)
+    stats = add_analysis_stages(StagePipeline('cli_stats'), html=False).run(blog_post_text=blog_text)
+    title = stats['title']
+    reading_time = stats['metadata']['reading_time']
+    engagement_score = stats['metadata']['engagement_score']
+    word_count = stats['metadata']['word_count']
+    
+    seo_analysis = stats['seo']['analysis']
+    recommendations = stats['seo']['recommendations']
     
     print("=" * 60)
     print("📊 BLOG POST STATISTICS")
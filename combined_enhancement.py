@@ -0,0 +1,142 @@
+import os
+import re
+import time
+import threading
+
+import prompts
+from text_analysis import get_document
+from seo_analyzer import extract_keywords
+
+MIN_LENGTH_RATIO = float(os.environ.get('COMBINED_ENHANCEMENT_MIN_LENGTH_RATIO', 0.85))
+GROUNDING_KEYWORDS = 20
+CHARS_PER_TOKEN = 4
+RATE_ALPHA = 0.3
+
+META_OPENER_RE = re.compile(r"^\s*(here('s| is| are)|sure[,!]|certainly|below is|i've|i have)\b", re.I)
+AI_PHRASES = (
+    "let's dive into", "in today's fast-paced world", "in the ever-evolving landscape",
+    "in conclusion", "hope this helps", "delve", "leverage", "utilize", "seamless", "game-changing"
+)
+
+
+def combined_enhancement_enabled(flag=None):
+    if flag is None:
+        return os.environ.get('COMBINED_ENHANCEMENT', 'false').lower() == 'true'
+    if isinstance(flag, str):
+        return flag.lower() in ('true', '1', 'on', 'yes')
+    return bool(flag)
+
+
+def estimate_tokens(text):
+    return len(text or '') // CHARS_PER_TOKEN
+
+
+_chained_rate = None
+_chained_rate_lock = threading.Lock()
+
+
+def record_chained_pass(prompt, output, seconds):
+    """Feed a measured transcript or style pass into the seconds-per-token rate used to estimate savings."""
+    global _chained_rate
+    tokens = estimate_tokens(prompt) + estimate_tokens(output)
+    if tokens <= 0:
+        return
+    rate = seconds / tokens
+    with _chained_rate_lock:
+        _chained_rate = rate if _chained_rate is None else RATE_ALPHA * rate + (1 - RATE_ALPHA) * _chained_rate
+
+
+def _grounding(text, keywords):
+    if not keywords:
+        return 1.0
+    counter = get_document(text).alpha_word_counter
+    return sum(1 for word in keywords if counter.get(word)) / len(keywords)
+
+
+def _ai_phrase_count(text):
+    lower = text.lower()
+    return sum(lower.count(phrase) for phrase in AI_PHRASES)
+
+
+def check_enhancement(draft, enhanced, transcript):
+    """Return a list of reasons the combined output is worse than the draft (empty when it passes)."""
+    if not enhanced or not enhanced.strip():
+        return ['empty response']
+
+    issues = []
+    draft_doc, enhanced_doc = get_document(draft), get_document(enhanced)
+
+    if enhanced_doc.word_count < draft_doc.word_count * MIN_LENGTH_RATIO:
+        issues.append(f"shortened from {draft_doc.word_count} to {enhanced_doc.word_count} words")
+
+    draft_headings = draft_doc.h1_h3_count
+    if enhanced_doc.h1_h3_count < max(1, draft_headings // 2):
+        issues.append(f"lost structure ({draft_headings} -> {enhanced_doc.h1_h3_count} headings)")
+
+    if META_OPENER_RE.match(enhanced):
+        issues.append('meta-commentary before the post')
+
+    keywords = [word for word, _ in extract_keywords(transcript[:8000], GROUNDING_KEYWORDS)]
+    draft_grounding, enhanced_grounding = _grounding(draft, keywords), _grounding(enhanced, keywords)
+    if enhanced_grounding < draft_grounding * 0.9:
+        issues.append(f"transcript grounding dropped ({draft_grounding:.2f} -> {enhanced_grounding:.2f})")
+
+    if _ai_phrase_count(enhanced) > _ai_phrase_count(draft):
+        issues.append('more AI-pattern phrases than the draft')
+
+    return issues
+
+
+def enhance_combined(ai_manager, blog_text, transcript, model=None):
+    """
+    Transcript grounding and style enhancement as a single revision call.
+
+    Returns (text, report). text is None when the call fails or the output does
+    not pass check_enhancement, so the caller can fall back to the chained passes.
+    The report compares the call with the two chained passes it replaces; token
+    counts are estimated from prompt and output lengths, and the chained time
+    from measured chained passes when any have run (seconds_basis says which).
+    """
+    prompt = prompts.get_combined_enhancement_prompt(blog_text, transcript)
+    report = {'mode': 'combined', 'calls': 1}
+    started = time.time()
+    try:
+        enhanced = ai_manager.generate_content(prompt, model=model)
+    except Exception as e:
+        print(f"[Enhance] Combined enhancement failed: {e}")
+        enhanced = None
+    report['seconds'] = round(time.time() - started, 2)
+
+    issues = check_enhancement(blog_text, enhanced, transcript)
+    if issues:
+        print(f"[Enhance] Combined output rejected: {'; '.join(issues)}")
+        report.update({'mode': 'combined_rejected', 'issues': issues})
+        return None, report
+
+    combined_tokens = estimate_tokens(prompt) + estimate_tokens(enhanced)
+    # The chained passes send and regenerate the whole post twice
+    chained_tokens = (estimate_tokens(prompts.get_transcript_enhancement_prompt(blog_text, transcript))
+                      + estimate_tokens(prompts.get_style_enhancement_prompt(enhanced))
+                      + 2 * estimate_tokens(enhanced))
+    with _chained_rate_lock:
+        chained_rate = _chained_rate
+    if chained_rate is not None:
+        seconds_basis = 'measured_chained_passes'
+    else:
+        # Nothing measured yet: assume the chained passes run at this call's seconds per token
+        seconds_basis = 'scaled_from_combined_call'
+        chained_rate = report['seconds'] / combined_tokens if combined_tokens else 0
+    chained_seconds = round(chained_tokens * chained_rate, 2)
+    report.update({
+        'estimated_tokens': combined_tokens,
+        'estimated_chained_tokens': chained_tokens,
+        'estimated_tokens_saved': chained_tokens - combined_tokens,
+        'calls_saved': 1,
+        'estimated_chained_seconds': chained_seconds,
+        'estimated_seconds_saved': round(chained_seconds - report['seconds'], 2),
+        'seconds_basis': seconds_basis
+    })
+    print(f"[Enhance] Combined pass in {report['seconds']}s, ~{report['estimated_tokens_saved']} tokens "
+          f"and ~{report['estimated_seconds_saved']}s saved vs chained passes "
+          f"({seconds_basis})")
+    return enhanced, report
@@ -5,7 +5,9 @@ AVAILABLE_MODELS = {
         'best_for': 'All use cases, highest quality',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'openai'
+        'provider': 'openai',
+        'tier': 'flagship',
+        'context_tokens': 128000
     },
     'gpt-4o-mini': {
         'name': 'GPT-4o Mini',
@@ -13,7 +15,9 @@ AVAILABLE_MODELS = {
         'best_for': 'Quick generation, cost-effective',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'openai'
+        'provider': 'openai',
+        'tier': 'fast',
+        'context_tokens': 128000
     },
     'gemini-2.0-flash-exp': {
         'name': 'Gemini 2.0 Flash (Secondary)',
@@ -21,7 +25,9 @@ AVAILABLE_MODELS = {
         'best_for': 'Most use cases, balanced speed and quality',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'gemini'
+        'provider': 'gemini',
+        'tier': 'fast',
+        'context_tokens': 1048576
     },
     'gemini-1.5-pro': {
         'name': 'Gemini 1.5 Pro',
@@ -29,7 +35,9 @@ AVAILABLE_MODELS = {
         'best_for': 'Complex topics, long videos, maximum quality',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'gemini'
+        'provider': 'gemini',
+        'tier': 'flagship',
+        'context_tokens': 2097152
     },
     'gemini-1.5-flash': {
         'name': 'Gemini 1.5 Flash',
@@ -37,7 +45,9 @@ AVAILABLE_MODELS = {
         'best_for': 'Quick generation, shorter videos',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'gemini'
+        'provider': 'gemini',
+        'tier': 'fast',
+        'context_tokens': 1048576
     },
     'claude-4-sonnet-20250514': {
         'name': 'Claude 4 Sonnet (Extended Thinking)',
@@ -46,7 +56,9 @@ AVAILABLE_MODELS = {
         'max_tokens': 16000,
         'temperature': 1.0,
         'provider': 'anthropic',
-        'thinking_budget': 10000
+        'thinking_budget': 10000,
+        'tier': 'flagship',
+        'context_tokens': 200000
     },
     'claude-3-haiku-20240307': {
         'name': 'Claude 3 Haiku',
@@ -54,10 +66,33 @@ AVAILABLE_MODELS = {
         'best_for': 'Quick generation, backup option',
         'max_tokens': 8192,
         'temperature': 0.9,
-        'provider': 'anthropic'
+        'provider': 'anthropic',
+        'tier': 'fast',
+        'context_tokens': 200000
     }
 }
 
+# Model tier per task for the router in model_router.py; tasks not listed
+# here use the default provider chain (flagship models).
+TASK_ROUTING = {
+    'meta_description': {'tier': 'fast', 'max_output_tokens': 512},
+    'title_alternatives': {'tier': 'fast', 'max_output_tokens': 1024},
+    'linkedin_post': {'tier': 'fast', 'max_output_tokens': 2048},
+    'social_post': {'tier': 'fast', 'max_output_tokens': 2048},
+    'trending_research': {'tier': 'fast', 'max_output_tokens': 4096},
+    'outline': {'tier': 'fast', 'max_output_tokens': 2048}
+}
+
+# Fast-tier tasks with more input than this are routed to flagship models
+FAST_TIER_MAX_INPUT_TOKENS = 30000
+
+# Approximate USD list price per generated image, used to report image cache savings
+IMAGE_GENERATION_COSTS = {
+    'openai': 0.08,   # dall-e-3, 1792x1024 standard
+    'gemini': 0.03,   # imagen-3.0
+    'qwen': 0.0       # Hugging Face inference
+}
+
 IMAGEN_MODELS = {
     'imagen-3.0-generate-001': {
         'name': 'Imagen 3.0',
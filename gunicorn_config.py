@@ -2,7 +2,18 @@ import os
 
 bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
 workers = 2
-worker_class = "sync"
+# Progress streams park on a condition variable until an update arrives, so
+# they need a worker class that does not pin a whole process per connection.
+# gevent makes each stream nearly free but turns every thread in the app
+# (pipeline, image and write-behind pools) into a greenlet, so it is opt-in.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class == 'gevent':
+    # preload_app imports the app in the master, so patch first; otherwise its
+    # locks, sockets and condition variables would block whole workers
+    from gevent import monkey
+    monkey.patch_all()
+if worker_class == 'gthread':
+    threads = int(os.environ.get('GUNICORN_THREADS', '32'))
 worker_connections = 1000
 timeout = 300
 keepalive = 5
@@ -0,0 +1,120 @@
+import os
+import re
+import time
+import hashlib
+import threading
+
+from blob_store import get_blob_store
+from cache_manager import get_cache_manager
+from config import IMAGE_GENERATION_COSTS
+
+IMAGE_CACHE_TTL = int(os.environ.get('IMAGE_CACHE_TTL', 604800))
+LATENCY_ALPHA = 0.3
+
+
+def image_cache_enabled():
+    return os.environ.get('IMAGE_CACHE', 'true').lower() == 'true'
+
+
+def normalize_prompt(prompt):
+    return re.sub(r'\s+', ' ', prompt or '').strip().lower()
+
+
+def prompt_hash(prompt, provider, size):
+    identity = f"{provider}|{size}|{normalize_prompt(prompt)}"
+    return hashlib.sha256(identity.encode('utf-8')).hexdigest()
+
+
+class ImageCache:
+    """
+    Maps (normalized prompt, provider, size) to a blob store key.
+
+    Only the key goes through CacheManager; the image bytes stay in the blob
+    store, so Redis never holds base64. A hit is only served while its blob
+    still exists. Hits are credited with the provider's measured generation
+    time and list price to show what the cache saves.
+    """
+
+    def __init__(self, ttl=IMAGE_CACHE_TTL):
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.latency = {}
+        self.saved_seconds = 0.0
+        self.saved_cost = 0.0
+
+    def get(self, prompt, provider, size):
+        key = get_cache_manager().get_cached_image(prompt_hash(prompt, provider, size))
+        if key and get_blob_store().exists(key):
+            return key
+        return None
+
+    def put(self, prompt, provider, size, key):
+        if key:
+            get_cache_manager().cache_image(prompt_hash(prompt, provider, size), key, ttl=self.ttl)
+
+    def fetch_or_generate(self, provider, size, prompt, generate):
+        """Return a cached blob key for the prompt, or call generate(prompt) and cache its key."""
+        if not prompt:
+            return None
+        if not image_cache_enabled():
+            return generate(prompt)
+
+        key = self.get(prompt, provider, size)
+        if key:
+            self._record_hit(provider)
+            print(f"[ImageCache] Hit for {provider} {size}: {key}")
+            return key
+
+        started = time.time()
+        key = generate(prompt)
+        self._record_miss(provider, time.time() - started if key else None)
+        self.put(prompt, provider, size, key)
+        return key
+
+    def _record_hit(self, provider):
+        with self.lock:
+            self.hits[provider] = self.hits.get(provider, 0) + 1
+            self.saved_seconds += self.latency.get(provider, 0.0)
+            self.saved_cost += IMAGE_GENERATION_COSTS.get(provider, 0.0)
+
+    def _record_miss(self, provider, seconds):
+        with self.lock:
+            self.misses[provider] = self.misses.get(provider, 0) + 1
+            if seconds is not None:
+                previous = self.latency.get(provider)
+                self.latency[provider] = seconds if previous is None else (
+                    LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * previous)
+
+    def get_stats(self):
+        with self.lock:
+            hits = sum(self.hits.values())
+            lookups = hits + sum(self.misses.values())
+            return {
+                'enabled': image_cache_enabled(),
+                'hits': hits,
+                'misses': lookups - hits,
+                'hit_rate': round(hits / lookups, 3) if lookups else 0.0,
+                'by_provider': {
+                    provider: {'hits': self.hits.get(provider, 0), 'misses': self.misses.get(provider, 0),
+                               'avg_generation_seconds': round(self.latency[provider], 2)
+                               if provider in self.latency else None}
+                    for provider in sorted(set(self.hits) | set(self.misses))
+                },
+                'saved_seconds': round(self.saved_seconds, 1),
+                'saved_cost_usd': round(self.saved_cost, 2)
+            }
+
+
+_image_cache = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache():
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                _image_cache = ImageCache()
+    return _image_cache
@@ -0,0 +1,89 @@
+import os
+import re
+import threading
+import contextvars
+from difflib import SequenceMatcher
+from concurrent.futures import ThreadPoolExecutor
+
+SIMILARITY_THRESHOLD = float(os.environ.get('SPECULATIVE_IMAGE_SIMILARITY', 0.8))
+
+_NON_WORD_RE = re.compile(r'[^\w\s]')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    # Separate from the pipeline pool: the images stage blocks on these jobs
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                workers = int(os.environ.get('SPECULATIVE_IMAGE_WORKERS', 4))
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='speculative-images')
+    return _executor
+
+
+def normalize_title(title):
+    return ' '.join(_NON_WORD_RE.sub(' ', (title or '').lower()).split())
+
+
+def title_similarity(a, b):
+    a, b = normalize_title(a), normalize_title(b)
+    if not a or not b:
+        return 0.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class SpeculativeImages:
+    """
+    Image generation started from the title known before the post is finished.
+
+    start() is called once the outline exposes the title; resolve() is called
+    by the images stage with the final title and reuses the speculative result
+    when the titles are similar enough, otherwise generates again.
+    """
+
+    def __init__(self, generate, threshold=None):
+        self.generate = generate
+        self.threshold = SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.title = None
+        self.future = None
+        self.status = 'not_started'
+        self.similarity = None
+
+    def start(self, title, content_excerpt):
+        if self.future is not None or not title:
+            return
+        print(f"[SpecImages] Starting speculative images for: {title[:60]}")
+        self.title = title
+        self.status = 'running'
+        ctx = contextvars.copy_context()
+        self.future = _get_executor().submit(ctx.run, self.generate, title, content_excerpt)
+
+    def resolve(self, final_title, final_content):
+        if self.future is None:
+            self.status = 'not_started'
+            return self.generate(final_title, final_content)
+
+        self.similarity = round(title_similarity(self.title, final_title), 3)
+        if self.similarity >= self.threshold:
+            try:
+                images = self.future.result()
+            except Exception as e:
+                print(f"[SpecImages] Speculative generation failed: {e}")
+                images = None
+            if images and any(images):
+                self.status = 'reused'
+                print(f"[SpecImages] Reusing speculative images (similarity {self.similarity})")
+                return images
+            self.status = 'failed'
+        else:
+            self.status = 'discarded'
+            print(f"[SpecImages] Title changed (similarity {self.similarity}), regenerating images")
+            self.future.cancel()
+
+        return self.generate(final_title, final_content)
+
+    def get_stats(self):
+        return {'status': self.status, 'speculative_title': self.title, 'similarity': self.similarity}
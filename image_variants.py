@@ -0,0 +1,167 @@
+import io
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from blob_store import get_blob_store, is_blob_key
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = True
+except ImportError:
+    Image = None
+    features = None
+    PIL_AVAILABLE = False
+
+RESPONSIVE_WIDTHS = [int(w) for w in os.environ.get('IMAGE_VARIANT_WIDTHS', '480,960,1440').split(',') if w.strip()]
+THUMBNAIL_WIDTH = int(os.environ.get('IMAGE_THUMBNAIL_WIDTH', 320))
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+
+# Pillow save options per format; AVIF is skipped when Pillow lacks the codec
+FORMAT_OPTIONS = {
+    'avif': {'format': 'AVIF', 'quality': 50},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True}
+}
+FORMAT_EXTENSIONS = ('avif', 'webp', 'jpg')
+THUMBNAIL_FORMATS = ('webp', 'jpg')
+
+
+def _available_formats():
+    formats = []
+    for extension in FORMAT_EXTENSIONS:
+        if extension == 'avif' and not features.check('avif'):
+            continue
+        if extension == 'webp' and not features.check('webp'):
+            continue
+        formats.append(extension)
+    return formats
+
+
+def _encode(image, width, extension):
+    if width < image.width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+    buffer = io.BytesIO()
+    # Saving without exif/icc/info drops the source metadata
+    image.save(buffer, **FORMAT_OPTIONS[extension])
+    return buffer.getvalue(), image.width, image.height
+
+
+def build_variants(key):
+    """
+    Transcode a stored image into responsive widths and a thumbnail.
+
+    Runs in a worker process: reads the source from the blob store, writes
+    every variant back to it and records a manifest keyed by the source.
+    """
+    store = get_blob_store()
+    manifest = store.get_manifest(key)
+    if manifest:
+        return manifest
+
+    data = store.get(key)
+    if data is None:
+        raise ValueError(f"Blob not found: {key}")
+
+    with Image.open(io.BytesIO(data)) as source:
+        source.load()
+        image = source.convert('RGB')
+
+    widths = sorted({min(width, image.width) for width in RESPONSIVE_WIDTHS})
+    manifest = {'source': key, 'width': image.width, 'height': image.height,
+                'source_bytes': len(data), 'variants': {}, 'thumbnail': {}}
+    for extension in _available_formats():
+        entries = []
+        for width in widths:
+            encoded, out_width, out_height = _encode(image, width, extension)
+            entries.append({'key': store.put(encoded, extension), 'width': out_width,
+                            'height': out_height, 'bytes': len(encoded)})
+        manifest['variants'][extension] = entries
+        if extension in THUMBNAIL_FORMATS:
+            encoded, out_width, out_height = _encode(image, min(THUMBNAIL_WIDTH, image.width), extension)
+            manifest['thumbnail'][extension] = {'key': store.put(encoded, extension), 'width': out_width,
+                                                'height': out_height, 'bytes': len(encoded)}
+
+    store.put_manifest(key, manifest)
+    return manifest
+
+
+class ImageVariantPool:
+    """Process pool for build_variants, deduplicating sources already in flight."""
+
+    def __init__(self, workers=IMAGE_WORKERS):
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self):
+        if self.executor is None:
+            # spawn: forking a threaded web server is unsafe
+            self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        return self.executor
+
+    def schedule(self, key):
+        if not PIL_AVAILABLE or not is_blob_key(key):
+            return None
+        if get_blob_store().get_manifest(key):
+            return None
+        with self.lock:
+            if key in self.pending:
+                return self.pending[key]
+            future = self._get_executor().submit(build_variants, key)
+            self.pending[key] = future
+        future.add_done_callback(lambda done, key=key: self._finished(key, done))
+        return future
+
+    def _finished(self, key, future):
+        with self.lock:
+            self.pending.pop(key, None)
+            if future.exception():
+                self.failed += 1
+                if isinstance(future.exception(), BrokenProcessPool):
+                    # A crashed worker breaks the whole pool; start a fresh one next time
+                    self.executor = None
+                print(f"[ImageVariants] Failed for {key}: {future.exception()}")
+            else:
+                self.completed += 1
+                manifest = future.result()
+                smallest = min((entry['bytes'] for entries in manifest['variants'].values() for entry in entries),
+                               default=0)
+                print(f"[ImageVariants] {key}: {manifest['source_bytes']} bytes source, "
+                      f"{smallest} bytes smallest variant")
+
+    def get_stats(self):
+        with self.lock:
+            return {'workers': self.workers, 'pending': len(self.pending),
+                    'completed': self.completed, 'failed': self.failed}
+
+
+_variant_pool = None
+_variant_pool_lock = threading.Lock()
+
+
+def get_variant_pool():
+    global _variant_pool
+    if _variant_pool is None:
+        with _variant_pool_lock:
+            if _variant_pool is None:
+                _variant_pool = ImageVariantPool()
+    return _variant_pool
+
+
+def schedule_variants(*keys):
+    return [get_variant_pool().schedule(key) for key in keys if key]
+
+
+def get_variants(key):
+    """Manifest for a source image, or None until its variants have been built."""
+    if not is_blob_key(key):
+        return None
+    return get_blob_store().get_manifest(key)
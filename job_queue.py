@@ -2,56 +2,354 @@ import os
 import json
 import time
 import uuid
+import hashlib
+from collections import Counter, OrderedDict, defaultdict
 from datetime import datetime
+from pathlib import Path
 from threading import Thread, Lock
 from queue import Queue, Empty
 from typing import Optional, Dict, Callable, Any
 from tenant_context import current_tenant_id, normalize_tenant_id
 
-class JobQueue:
-    def __init__(self):
+CPU_JOB_TYPES = {'analysis', 'seo', 'readability', 'analytics', 'render'}
+FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+RESULTS_DIR = Path(__file__).parent / 'job_results'
+STAGE_CACHE_DIR = RESULTS_DIR / 'stages'
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+class WorkerPool:
+    def __init__(self, name: str, handler: Callable, min_workers: int, max_workers: int,
+                 idle_timeout: float = 60.0, max_wait: float = 2.0):
+        self.name = name
+        self.handler = handler
+        self.min_workers = max(0, min_workers)
+        self.max_workers = max(1, self.min_workers, max_workers)
+        self.idle_timeout = idle_timeout
+        self.max_wait = max_wait
         self.queue = Queue()
-        self.jobs = {}
         self.lock = Lock()
-        self.workers = []
+        self.workers = {}
+        self.waiting = {}
+        self.busy = 0
         self.running = True
-        self.num_workers = int(os.environ.get('JOB_WORKERS', '2'))
-        
-        self._start_workers()
-        print(f"[JobQueue] Started with {self.num_workers} workers")
+        self.spawned = 0
+        self.retired = 0
+        self.busy_seconds = 0.0
+        self.started_at = time.monotonic()
+    
+    def start(self):
+        with self.lock:
+            for _ in range(self.min_workers):
+                self._spawn()
+    
+    def submit(self, job_id: str):
+        with self.lock:
+            self.waiting[job_id] = time.monotonic()
+        self.queue.put(job_id)
+        self.autoscale()
     
-    def _start_workers(self):
-        for i in range(self.num_workers):
-            worker = Thread(target=self._worker, args=(i,), daemon=True)
-            worker.start()
-            self.workers.append(worker)
+    def autoscale(self):
+        with self.lock:
+            if not self.running:
+                return
+            depth = len(self.waiting)
+            idle = len(self.workers) - self.busy
+            oldest_wait = time.monotonic() - next(iter(self.waiting.values())) if self.waiting else 0
+            
+            wanted = 0
+            if depth > idle:
+                wanted = depth - idle
+            elif depth and oldest_wait >= self.max_wait:
+                wanted = 1
+            
+            for _ in range(min(wanted, self.max_workers - len(self.workers))):
+                self._spawn()
     
-    def _worker(self, worker_id: int):
+    def _spawn(self):
+        worker_id = f"{self.name}-{self.spawned}"
+        self.spawned += 1
+        worker = Thread(target=self._worker, args=(worker_id,), daemon=True)
+        self.workers[worker_id] = worker
+        worker.start()
+    
+    def _worker(self, worker_id: str):
         print(f"[JobQueue] Worker {worker_id} started")
+        last_active = time.monotonic()
         while self.running:
             try:
                 job_id = self.queue.get(timeout=1)
-                if job_id is None:
-                    continue
-                
+            except Empty:
                 with self.lock:
-                    if job_id not in self.jobs:
-                        continue
-                    job = self.jobs[job_id]
-                
-                if job['status'] == 'pending':
-                    self._execute_job(job_id, job, worker_id)
-                
+                    if len(self.workers) > self.min_workers and time.monotonic() - last_active >= self.idle_timeout:
+                        self.workers.pop(worker_id, None)
+                        self.retired += 1
+                        print(f"[JobQueue] Worker {worker_id} retired after {self.idle_timeout:.0f}s idle")
+                        return
+                continue
+            
+            if job_id is None:
                 self.queue.task_done()
-            except Empty:
                 continue
+            
+            with self.lock:
+                self.waiting.pop(job_id, None)
+                self.busy += 1
+            started = time.monotonic()
+            try:
+                self.handler(job_id, worker_id)
             except Exception as e:
                 print(f"[JobQueue] Worker {worker_id} error: {e}")
+            finally:
+                last_active = time.monotonic()
+                with self.lock:
+                    self.busy -= 1
+                    self.busy_seconds += last_active - started
+                self.queue.task_done()
+        
+        with self.lock:
+            self.workers.pop(worker_id, None)
+    
+    def get_stats(self) -> dict:
+        with self.lock:
+            size = len(self.workers)
+            uptime = max(time.monotonic() - self.started_at, 1e-6)
+            oldest_wait = time.monotonic() - next(iter(self.waiting.values())) if self.waiting else 0
+            return {
+                'size': size,
+                'min_workers': self.min_workers,
+                'max_workers': self.max_workers,
+                'busy': self.busy,
+                'idle': size - self.busy,
+                'utilization': round(self.busy / size * 100, 1) if size else 0,
+                'avg_utilization': round(min(self.busy_seconds / (uptime * self.max_workers), 1) * 100, 1),
+                'queue_size': len(self.waiting),
+                'oldest_wait_seconds': round(oldest_wait, 2),
+                'spawned': self.spawned,
+                'retired': self.retired
+            }
+    
+    def shutdown(self):
+        with self.lock:
+            self.running = False
+            workers = list(self.workers.values())
+        for _ in workers:
+            self.queue.put(None)
+        for worker in workers:
+            worker.join(timeout=5)
+
+class JobQueue:
+    def __init__(self):
+        self.jobs = {}
+        self.lock = Lock()
+        self.running = True
+        
+        self.status_counts = defaultdict(Counter)
+        self.resident_results = OrderedDict()
+        self.resident_bytes = 0
+        self.spilled_results = 0
+        self.max_resident_results = _env_int('JOB_RESULT_MAX_COUNT', 200)
+        self.max_resident_bytes = _env_int('JOB_RESULT_MAX_BYTES', 50 * 1024 * 1024)
+        self.spill_threshold_bytes = _env_int('JOB_RESULT_SPILL_BYTES', 256 * 1024)
+        self.retention_hours = _env_int('JOB_RESULT_TTL_HOURS', 24)
+        self.retention_interval = _env_int('JOB_RETENTION_INTERVAL', 300)
+        RESULTS_DIR.mkdir(exist_ok=True)
+        
+        default_max = _env_int('JOB_WORKERS', 2)
+        idle_timeout = _env_int('JOB_WORKER_IDLE_SECONDS', 60)
+        max_wait = _env_int('JOB_MAX_WAIT_SECONDS', 2)
+        self.pools = {
+            'io': WorkerPool(
+                'io', self._run_job,
+                min_workers=_env_int('JOB_IO_WORKERS_MIN', 1),
+                max_workers=_env_int('JOB_IO_WORKERS_MAX', max(default_max, 8)),
+                idle_timeout=idle_timeout, max_wait=max_wait
+            ),
+            'cpu': WorkerPool(
+                'cpu', self._run_job,
+                min_workers=_env_int('JOB_CPU_WORKERS_MIN', 0),
+                max_workers=_env_int('JOB_CPU_WORKERS_MAX', max(1, min(default_max, os.cpu_count() or 1))),
+                idle_timeout=idle_timeout, max_wait=max_wait
+            )
+        }
+        for pool in self.pools.values():
+            pool.start()
+        
+        self._monitor = Thread(target=self._autoscale_loop, daemon=True)
+        self._monitor.start()
+        self._retention = Thread(target=self._retention_loop, daemon=True)
+        self._retention.start()
+        bounds = ', '.join(f"{name}={pool.min_workers}-{pool.max_workers}" for name, pool in self.pools.items())
+        print(f"[JobQueue] Started elastic pools ({bounds})")
+    
+    @property
+    def num_workers(self) -> int:
+        return sum(len(pool.workers) for pool in self.pools.values())
+    
+    def _pool_for(self, job_type: str) -> WorkerPool:
+        return self.pools['cpu' if job_type in CPU_JOB_TYPES else 'io']
+    
+    def _autoscale_loop(self):
+        while self.running:
+            time.sleep(1)
+            for pool in self.pools.values():
+                pool.autoscale()
+    
+    def _retention_loop(self):
+        while self.running:
+            time.sleep(self.retention_interval)
+            try:
+                self.cleanup_old_jobs(self.retention_hours)
+                self._enforce_result_limits()
+                self._prune_stage_cache(self.retention_hours)
+            except Exception as e:
+                print(f"[JobQueue] Retention error: {e}")
+    
+    def _set_status(self, job: dict, status: str):
+        counts = self.status_counts[job['tenant_id']]
+        if job.get('status'):
+            counts[job['status']] -= 1
+        counts[status] += 1
+        job['status'] = status
+    
+    def _result_path(self, job_id: str) -> Path:
+        return RESULTS_DIR / f'{job_id}.json'
+    
+    def _spill_result(self, job_id: str, payload: str) -> Optional[Path]:
+        path = self._result_path(job_id)
+        try:
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            print(f"[JobQueue] Failed to spill result for {job_id}: {e}")
+            return None
+    
+    def _load_result(self, path: str) -> Any:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"[JobQueue] Failed to load spilled result {path}: {e}")
+            return None
+    
+    def _store_result(self, job_id: str, job: dict, result: Any) -> Optional[str]:
+        try:
+            payload = json.dumps(result, ensure_ascii=False, default=str)
+        except Exception:
+            payload = None
+        size = len(payload.encode('utf-8')) if payload is not None else 0
+        
+        if payload is not None and size > self.spill_threshold_bytes:
+            path = self._spill_result(job_id, payload)
+            if path:
+                with self.lock:
+                    job['result'] = None
+                    job['result_path'] = str(path)
+                    job['result_bytes'] = size
+                    self.spilled_results += 1
+                return payload
+        
+        with self.lock:
+            job['result'] = result
+            job['result_bytes'] = size
+            self.resident_results[job_id] = size
+            self.resident_bytes += size
+        self._enforce_result_limits()
+        return payload
+    
+    def _get_result(self, job: dict) -> Any:
+        with self.lock:
+            result = job.get('result')
+            result_path = job.get('result_path')
+        if result is None and result_path:
+            return self._load_result(result_path)
+        return result
     
-    def _execute_job(self, job_id: str, job: dict, worker_id: int):
+    def _stage_cache_path(self, tenant_id: str, cache_key: str, stage: str) -> Path:
+        digest = hashlib.sha256(cache_key.encode('utf-8')).hexdigest()[:32]
+        safe_stage = ''.join(c if c.isalnum() or c in '-_' else '_' for c in stage)
+        return STAGE_CACHE_DIR / tenant_id / digest / f'{safe_stage}.json'
+    
+    def _write_stage_cache(self, path: str, payload: str):
+        try:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[JobQueue] Failed to cache stage result {path}: {e}")
+    
+    def _prune_stage_cache(self, max_age_hours: int = 24):
+        if not STAGE_CACHE_DIR.exists():
+            return
+        cutoff = time.time() - max_age_hours * 3600
+        removed = 0
+        for path in STAGE_CACHE_DIR.glob('*/*/*.json'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            print(f"[JobQueue] Pruned {removed} cached stage results")
+    
+    def _enforce_result_limits(self):
+        victims = []
+        with self.lock:
+            count = len(self.resident_results)
+            total = self.resident_bytes
+            for job_id, size in self.resident_results.items():
+                if count <= self.max_resident_results and total <= self.max_resident_bytes:
+                    break
+                victims.append(job_id)
+                count -= 1
+                total -= size
+        
+        for job_id in victims:
+            with self.lock:
+                job = self.jobs.get(job_id)
+                result = job.get('result') if job else None
+            path = None
+            if job is not None and result is not None:
+                path = self._spill_result(job_id, json.dumps(result, ensure_ascii=False, default=str))
+            with self.lock:
+                size = self.resident_results.pop(job_id, None)
+                if size is None:
+                    continue
+                self.resident_bytes -= size
+                if job is not None and path:
+                    job['result'] = None
+                    job['result_path'] = str(path)
+                    self.spilled_results += 1
+        
+        if victims:
+            print(f"[JobQueue] Spilled {len(victims)} results to disk")
+    
+    def _run_job(self, job_id: str, worker_id: str):
+        with self.lock:
+            if job_id not in self.jobs:
+                return
+            job = self.jobs[job_id]
+        
+        if job['status'] == 'pending':
+            self._execute_job(job_id, job, worker_id)
+    
+    def _execute_job(self, job_id: str, job: dict, worker_id: str):
         try:
             with self.lock:
-                job['status'] = 'processing'
+                if job['status'] != 'pending':
+                    return
+                self._set_status(job, 'processing')
                 job['started_at'] = datetime.utcnow().isoformat()
                 job['worker_id'] = worker_id
             
@@ -59,20 +357,30 @@ class JobQueue:
             
             func = job['function']
             args = job.get('args', [])
-            kwargs = job.get('kwargs', {})
+            kwargs = dict(job.get('kwargs', {}))
             callback = job.get('callback')
             progress_callback = job.get('progress_callback')
             
             if progress_callback:
                 kwargs['progress_callback'] = lambda p: self.update_progress(job_id, p, tenant_id=job.get('tenant_id'))
             
+            if job.get('pass_dependency_results'):
+                kwargs['dependency_results'] = {
+                    self.jobs[dep_id].get('stage') or dep_id: self._get_result(self.jobs[dep_id])
+                    for dep_id in job['depends_on']
+                }
+            
             result = func(*args, **kwargs)
             
+            payload = self._store_result(job_id, job, result)
+            if payload is not None and job.get('stage_cache_path'):
+                self._write_stage_cache(job['stage_cache_path'], payload)
             with self.lock:
-                job['status'] = 'completed'
+                self._set_status(job, 'completed')
                 job['completed_at'] = datetime.utcnow().isoformat()
-                job['result'] = result
                 job['progress'] = 100
+                ready = self._release_dependents(job)
+            self._submit_ready(ready)
             
             if callback:
                 try:
@@ -87,17 +395,42 @@ class JobQueue:
             print(f"[JobQueue] Job {job_id} failed: {error_msg}")
             
             with self.lock:
-                job['status'] = 'failed'
+                self._set_status(job, 'failed')
                 job['completed_at'] = datetime.utcnow().isoformat()
                 job['error'] = error_msg
+                self._cancel_dependents(job)
     
-    def enqueue(self, func: Callable, args: tuple = (), kwargs: dict = None, 
-                callback: Callable = None, priority: int = 0, 
-                job_type: str = 'default', tenant_id: str = None) -> str:
+    def _release_dependents(self, job: dict) -> list:
+        ready = []
+        for dependent_id in job['dependents']:
+            dependent = self.jobs.get(dependent_id)
+            if not dependent or dependent['status'] != 'blocked':
+                continue
+            dependent['pending_deps'] -= 1
+            if dependent['pending_deps'] <= 0:
+                self._set_status(dependent, 'pending')
+                ready.append(dependent)
+        return ready
+    
+    def _cancel_dependents(self, job: dict):
+        stack = list(job['dependents'])
+        while stack:
+            dependent = self.jobs.get(stack.pop())
+            if not dependent or dependent['status'] not in ('blocked', 'pending'):
+                continue
+            self._set_status(dependent, 'cancelled')
+            dependent['completed_at'] = datetime.utcnow().isoformat()
+            dependent['error'] = f"Dependency {job.get('stage') or job['id']} did not complete"
+            stack.extend(dependent['dependents'])
+    
+    def _submit_ready(self, jobs: list):
+        for job in jobs:
+            self.pools[job['pool']].submit(job['id'])
+    
+    def _new_job(self, func: Callable, args: tuple, kwargs: dict, callback: Callable,
+                 priority: int, job_type: str, tenant_id: str) -> dict:
         job_id = str(uuid.uuid4())
-        tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-        
-        job = {
+        return {
             'id': job_id,
             'function': func,
             'args': args,
@@ -105,24 +438,165 @@ class JobQueue:
             'callback': callback,
             'priority': priority,
             'job_type': job_type,
-            'status': 'pending',
+            'status': None,
             'progress': 0,
             'created_at': datetime.utcnow().isoformat(),
             'started_at': None,
             'completed_at': None,
             'result': None,
+            'result_path': None,
+            'result_bytes': 0,
             'error': None,
             'worker_id': None,
-            'tenant_id': tenant_id
+            'tenant_id': tenant_id,
+            'pool': self._pool_for(job_type).name,
+            'depends_on': [],
+            'dependents': [],
+            'pending_deps': 0,
+            'pass_dependency_results': False,
+            'stage': None,
+            'stage_cache_path': None
         }
-        
+    
+    def _add_job(self, job: dict, depends_on: list = None):
+        depends_on = list(depends_on or [])
         with self.lock:
-            self.jobs[job_id] = job
+            missing = [dep_id for dep_id in depends_on if dep_id not in self.jobs]
+            if missing:
+                raise ValueError(f"Unknown dependency job(s): {', '.join(missing)}")
+            
+            job['depends_on'] = depends_on
+            self.jobs[job['id']] = job
+            dependencies = [self.jobs[dep_id] for dep_id in depends_on]
+            for dependency in dependencies:
+                dependency['dependents'].append(job['id'])
+            job['pending_deps'] = sum(1 for dep in dependencies if dep['status'] != 'completed')
+            
+            if any(dep['status'] in ('failed', 'cancelled') for dep in dependencies):
+                self._set_status(job, 'cancelled')
+                job['completed_at'] = datetime.utcnow().isoformat()
+                job['error'] = 'Dependency did not complete'
+                return
+            self._set_status(job, 'blocked' if job['pending_deps'] else 'pending')
+            ready = job['status'] == 'pending'
         
-        self.queue.put(job_id)
-        print(f"[JobQueue] Job {job_id} enqueued (type: {job_type})")
+        if ready:
+            self._submit_ready([job])
+    
+    def enqueue(self, func: Callable, args: tuple = (), kwargs: dict = None, 
+                callback: Callable = None, priority: int = 0, 
+                job_type: str = 'default', tenant_id: str = None,
+                depends_on: list = None, pass_dependency_results: bool = False) -> str:
+        tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+        job = self._new_job(func, args, kwargs, callback, priority, job_type, tenant_id)
+        job['pass_dependency_results'] = pass_dependency_results
+        
+        self._add_job(job, depends_on)
+        print(f"[JobQueue] Job {job['id']} enqueued (type: {job_type}, pool: {job['pool']}, deps: {len(job['depends_on'])})")
+        
+        return job['id']
+    
+    def enqueue_pipeline(self, stages: Dict[str, dict], cache_key: str = None,
+                         tenant_id: str = None) -> Dict[str, str]:
+        """
+        Enqueue a DAG of stages and return a mapping of stage name to job id.
+        
+        Each stage is a dict with 'function' plus optional 'args', 'kwargs',
+        'depends_on' (stage names), 'job_type', 'callback' and 'cache' (False
+        keeps a stage with side effects out of the stage cache). A stage receives
+        the results of its upstream stages as the `dependency_results` kwarg,
+        keyed by stage name. Stages without a path between them run in parallel.
+        
+        When cache_key is given, each completed stage result is cached on disk so
+        re-enqueuing the same pipeline skips stages that already succeeded.
+        """
+        tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+        
+        order = []
+        visiting = set()
+        visited = set()
         
-        return job_id
+        def visit(name, path):
+            if name not in stages:
+                raise ValueError(f"Stage '{path[-1]}' depends on unknown stage '{name}'")
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Pipeline has a dependency cycle: {' -> '.join(path + [name])}")
+            visiting.add(name)
+            for dep in stages[name].get('depends_on', []):
+                visit(dep, path + [name])
+            visiting.discard(name)
+            visited.add(name)
+            order.append(name)
+        
+        for name in stages:
+            visit(name, [])
+        
+        job_ids = {}
+        for name in order:
+            spec = stages[name]
+            job_type = spec.get('job_type', 'default')
+            job = self._new_job(spec['function'], spec.get('args', ()), spec.get('kwargs'),
+                                spec.get('callback'), spec.get('priority', 0), job_type, tenant_id)
+            job['stage'] = name
+            job['pass_dependency_results'] = True
+            
+            if cache_key and spec.get('cache', True):
+                cache_path = self._stage_cache_path(tenant_id, cache_key, name)
+                job['stage_cache_path'] = str(cache_path)
+                if cache_path.exists():
+                    job['result_path'] = str(cache_path)
+                    job['result_bytes'] = cache_path.stat().st_size
+                    job['completed_at'] = datetime.utcnow().isoformat()
+                    job['progress'] = 100
+                    job['cached'] = True
+                    with self.lock:
+                        self.jobs[job['id']] = job
+                        self._set_status(job, 'completed')
+                    job_ids[name] = job['id']
+                    print(f"[JobQueue] Stage '{name}' served from cache")
+                    continue
+            
+            self._add_job(job, [job_ids[dep] for dep in spec.get('depends_on', [])])
+            job_ids[name] = job['id']
+        
+        print(f"[JobQueue] Pipeline enqueued with {len(job_ids)} stages")
+        return job_ids
+    
+    def retry_job(self, job_id: str, tenant_id: str = None) -> bool:
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or (tenant_id and normalize_tenant_id(job.get('tenant_id')) != normalize_tenant_id(tenant_id)):
+                return False
+            if job['status'] not in ('failed', 'cancelled'):
+                return False
+            if any(self.jobs.get(dep_id, {}).get('status') != 'completed' for dep_id in job['depends_on']):
+                return False
+            
+            ready = []
+            stack = [job_id]
+            while stack:
+                current = self.jobs.get(stack.pop())
+                if not current or current['status'] not in ('failed', 'cancelled'):
+                    continue
+                current['error'] = None
+                current['completed_at'] = None
+                current['progress'] = 0
+                current['pending_deps'] = sum(
+                    1 for dep_id in current['depends_on']
+                    if self.jobs.get(dep_id, {}).get('status') != 'completed'
+                )
+                if current is job or current['pending_deps'] == 0:
+                    self._set_status(current, 'pending')
+                    ready.append(current)
+                else:
+                    self._set_status(current, 'blocked')
+                stack.extend(current['dependents'])
+        
+        self._submit_ready(ready)
+        print(f"[JobQueue] Job {job_id} requeued for retry")
+        return True
     
     def get_job_status(self, job_id: str, tenant_id: str = None) -> Optional[dict]:
         with self.lock:
@@ -132,12 +606,18 @@ class JobQueue:
             job = self.jobs[job_id].copy()
             if tenant_id and normalize_tenant_id(job.get('tenant_id')) != normalize_tenant_id(tenant_id):
                 return None
-            job.pop('function', None)
-            job.pop('callback', None)
-            job.pop('args', None)
-            job.pop('kwargs', None)
-            
-            return job
+        
+        job.pop('function', None)
+        job.pop('callback', None)
+        job.pop('args', None)
+        job.pop('kwargs', None)
+        job.pop('dependents', None)
+        job.pop('stage_cache_path', None)
+        result_path = job.pop('result_path', None)
+        if job.get('result') is None and result_path:
+            job['result'] = self._load_result(result_path)
+        
+        return job
     
     def update_progress(self, job_id: str, progress: int, tenant_id: str = None):
         with self.lock:
@@ -148,36 +628,54 @@ class JobQueue:
         with self.lock:
             if job_id in self.jobs and (not tenant_id or normalize_tenant_id(self.jobs[job_id].get('tenant_id')) == normalize_tenant_id(tenant_id)):
                 job = self.jobs[job_id]
-                if job['status'] == 'pending':
-                    job['status'] = 'cancelled'
+                if job['status'] in ('pending', 'blocked'):
+                    self._set_status(job, 'cancelled')
                     job['completed_at'] = datetime.utcnow().isoformat()
+                    # Dependents can never run now; cancel them so they do not stay blocked
+                    self._cancel_dependents(job)
                     return True
         return False
     
     def get_queue_stats(self, tenant_id: str = None) -> dict:
         with self.lock:
-            jobs = [j for j in self.jobs.values() if not tenant_id or normalize_tenant_id(j.get('tenant_id')) == normalize_tenant_id(tenant_id)]
-            pending = sum(1 for j in jobs if j['status'] == 'pending')
-            processing = sum(1 for j in jobs if j['status'] == 'processing')
-            completed = sum(1 for j in jobs if j['status'] == 'completed')
-            failed = sum(1 for j in jobs if j['status'] == 'failed')
-            
-            return {
-                'total_jobs': len(jobs),
-                'pending': pending,
-                'processing': processing,
-                'completed': completed,
-                'failed': failed,
-                'workers': self.num_workers,
-                'queue_size': self.queue.qsize()
+            if tenant_id:
+                counts = Counter(self.status_counts.get(normalize_tenant_id(tenant_id) or 'legacy', {}))
+            else:
+                counts = sum(self.status_counts.values(), Counter())
+            resident_results = len(self.resident_results)
+            resident_bytes = self.resident_bytes
+            spilled_results = self.spilled_results
+        
+        return {
+            'total_jobs': sum(counts.values()),
+            'pending': counts['pending'],
+            'processing': counts['processing'],
+            'blocked': counts['blocked'],
+            'completed': counts['completed'],
+            'failed': counts['failed'],
+            'cancelled': counts['cancelled'],
+            'workers': self.num_workers,
+            'queue_size': sum(len(pool.waiting) for pool in self.pools.values()),
+            'pools': {name: pool.get_stats() for name, pool in self.pools.items()},
+            'results': {
+                'resident': resident_results,
+                'resident_bytes': resident_bytes,
+                'spilled': spilled_results,
+                'max_resident': self.max_resident_results,
+                'max_resident_bytes': self.max_resident_bytes
             }
+        }
     
     def cleanup_old_jobs(self, max_age_hours: int = 24):
         current_time = datetime.utcnow()
+        paths_to_remove = []
         with self.lock:
             jobs_to_remove = []
             for job_id, job in self.jobs.items():
-                if job['status'] in ['completed', 'failed', 'cancelled']:
+                if job['status'] in FINISHED_STATUSES:
+                    if any(self.jobs.get(dependent_id, {}).get('status') in ('blocked', 'pending', 'processing')
+                           for dependent_id in job['dependents']):
+                        continue
                     if job.get('completed_at'):
                         completed_time = datetime.fromisoformat(job['completed_at'])
                         age_hours = (current_time - completed_time).total_seconds() / 3600
@@ -185,18 +683,29 @@ class JobQueue:
                             jobs_to_remove.append(job_id)
             
             for job_id in jobs_to_remove:
-                del self.jobs[job_id]
-            
-            if jobs_to_remove:
-                print(f"[JobQueue] Cleaned up {len(jobs_to_remove)} old jobs")
+                job = self.jobs.pop(job_id)
+                self.status_counts[job['tenant_id']][job['status']] -= 1
+                size = self.resident_results.pop(job_id, None)
+                if size is not None:
+                    self.resident_bytes -= size
+                if job.get('result_path') and not job.get('cached'):
+                    paths_to_remove.append(job['result_path'])
+                    self.spilled_results -= 1
+        
+        for path in paths_to_remove:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        
+        if jobs_to_remove:
+            print(f"[JobQueue] Cleaned up {len(jobs_to_remove)} old jobs")
     
     def shutdown(self):
         print("[JobQueue] Shutting down...")
         self.running = False
-        for _ in range(self.num_workers):
-            self.queue.put(None)
-        for worker in self.workers:
-            worker.join(timeout=5)
+        for pool in self.pools.values():
+            pool.shutdown()
 
 _job_queue = None
 
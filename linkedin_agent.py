@@ -108,7 +108,7 @@ def generate_linkedin_post(medium_title, medium_content, ai_manager):
         linkedin_post = ai_manager.generate_content(
             prompt,
             medium_content[:1000],
-            'gpt-4o'
+            task='linkedin_post'
         )
         return linkedin_post.strip()
     except Exception as e:
@@ -0,0 +1,119 @@
+import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
+
+import markdown
+
+MARKDOWN_EXTENSIONS = [
+    "markdown.extensions.tables",
+    "markdown.extensions.fenced_code",
+    "markdown.extensions.nl2br",
+    "markdown.extensions.codehilite",
+    "markdown.extensions.extra",
+    "markdown.extensions.sane_lists"
+]
+
+MARKDOWN_EXTENSION_CONFIGS = {
+    'markdown.extensions.codehilite': {
+        'css_class': 'highlight',
+        'linenums': False
+    }
+}
+
+INLINE_CODE_RE = re.compile(r'`([^`]+)`')
+
+# Wrapper tags and attributes the post templates style themselves. Span tags
+# are stripped in the second pass so that <p><span></span></p> survives as
+# <p></p>, exactly as the old sequential chain left it.
+STRIP_MARKUP_RE = re.compile(
+    r'<div[^>]*>|</div>|<pre[^>]*>|</pre>|<code[^>]*>|</code>| class="[^"]*"| id="[^"]*"'
+)
+STRIP_EMPTY_AND_SPANS_RE = re.compile(r'<p>\s*</p>|<span[^>]*>|</span>')
+
+
+class MarkdownRenderer:
+    def __init__(self, cache_size=None):
+        self.cache_size = cache_size if cache_size is not None else int(os.environ.get('MARKDOWN_CACHE_SIZE', 256))
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_markdown(self):
+        md = getattr(self.local, 'md', None)
+        if md is None:
+            md = markdown.Markdown(
+                extensions=MARKDOWN_EXTENSIONS,
+                extension_configs=MARKDOWN_EXTENSION_CONFIGS
+            )
+            self.local.md = md
+        return md
+
+    def to_html(self, markdown_text):
+        md = self._get_markdown()
+        try:
+            return md.convert(markdown_text)
+        finally:
+            md.reset()
+
+    def sanitize(self, html):
+        html = STRIP_MARKUP_RE.sub('', html)
+        html = STRIP_EMPTY_AND_SPANS_RE.sub('', html)
+        return html.strip()
+
+    def render(self, markdown_text):
+        """Render a blog post's markdown to the sanitized HTML stored with the post."""
+        key = hashlib.sha256(markdown_text.encode('utf-8')).hexdigest()
+        with self.lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return self.cache[key]
+            self.misses += 1
+
+        cleaned_markdown = markdown_text.replace('```', '')
+        cleaned_markdown = INLINE_CODE_RE.sub(r'\1', cleaned_markdown)
+        html = self.sanitize(self.to_html(cleaned_markdown))
+
+        if self.cache_size > 0:
+            with self.lock:
+                self.cache[key] = html
+                self.cache.move_to_end(key)
+                while len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+        return html
+
+    def clear_cache(self):
+        with self.lock:
+            self.cache.clear()
+
+    def get_stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                'cached_entries': len(self.cache),
+                'cache_size': self.cache_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0
+            }
+
+
+_markdown_renderer = None
+_markdown_renderer_lock = threading.Lock()
+
+
+def get_markdown_renderer() -> MarkdownRenderer:
+    global _markdown_renderer
+    if _markdown_renderer is None:
+        with _markdown_renderer_lock:
+            if _markdown_renderer is None:
+                _markdown_renderer = MarkdownRenderer()
+    return _markdown_renderer
+
+
+def render_markdown(markdown_text):
+    return get_markdown_renderer().render(markdown_text)
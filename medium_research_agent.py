@@ -1,6 +1,9 @@
 import re
 from typing import Dict, List
 
+from text_analysis import get_document
+from prompts import CACHE_BOUNDARY
+
 MEDIUM_BEST_PRACTICES = {
     "structure": {
         "hook_types": ["Bold claim", "Personal story", "Surprising stat", "Question", "Misconception"],
@@ -70,16 +73,15 @@ CREDIBILITY:
 APPLY TO EVERY SECTION OF THE POST.
 """
 
-def apply_medium_practices_to_prompt(base_prompt: str, topic: str) -> str:
+def apply_medium_practices_to_prompt(base_prompt: str, topic: str, post_instructions: str = '') -> str:
     enhancement = get_medium_style_enhancement()
+    # Per-post details go after CACHE_BOUNDARY so the instructions stay a stable prefix
+    post_specific = f"{post_instructions}\n\n" if post_instructions else ""
     
     return f"""{base_prompt}
 
 {enhancement}
 
-SPECIFIC FOR THIS POST:
-Topic: {topic}
-
 REQUIREMENTS:
 1. Start with a hook that stops scrolling
 2. Use transformation framework (problem → solution → result)
@@ -92,6 +94,8 @@ REQUIREMENTS:
 9. Write ONLY about the topic in the provided content - DO NOT substitute with a different topic
 
 Make this IRRESISTIBLE to Medium readers with 2000+ clap potential.
+{CACHE_BOUNDARY}{post_specific}SPECIFIC FOR THIS POST:
+Topic: {topic}
 """
 
 def get_viral_title_formulas(topic: str) -> List[str]:
@@ -165,19 +169,14 @@ def add_strategic_formatting(content: str) -> str:
     return '\n'.join(formatted)
 
 def analyze_medium_readiness(content: str) -> Dict:
-    words = len(content.split())
-    paragraphs = [p for p in content.split('\n\n') if p.strip() and not p.strip().startswith('#')]
-    
-    sentences_per_para = []
-    for para in paragraphs:
-        sentences = [s for s in re.split(r'[.!?]+', para) if s.strip()]
-        sentences_per_para.append(len(sentences))
+    doc = get_document(content)
+    words = doc.word_count
+    sentences_per_para = doc.body_paragraph_sentence_counts
     
     avg_sentences = sum(sentences_per_para) / len(sentences_per_para) if sentences_per_para else 0
     
-    h2_count = content.count('\n## ')
-    h3_count = content.count('\n### ')
-    bold_count = content.count('**') // 2
+    h2_count = doc.count('\n## ')
+    bold_count = doc.count('**') // 2
     
     heading_frequency = words / (h2_count + 1) if h2_count > 0 else words
     
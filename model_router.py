@@ -0,0 +1,129 @@
+import os
+import time
+import threading
+from collections import deque
+
+from config import AVAILABLE_MODELS, TASK_ROUTING, FAST_TIER_MAX_INPUT_TOKENS
+
+CHARS_PER_TOKEN = 4
+LATENCY_ALPHA = 0.3
+ERROR_WINDOW = 10
+ERROR_PENALTY = 4.0
+COOLDOWN_ERROR_RATE = 0.5
+COOLDOWN_SECONDS = int(os.environ.get('MODEL_ROUTER_COOLDOWN_SECONDS', 60))
+
+
+def model_routing_enabled():
+    return os.environ.get('MODEL_ROUTING', 'true').lower() == 'true'
+
+
+class ModelRouter:
+    """
+    Picks models for a task from the capability table in config.
+
+    A task's tier (fast or flagship) comes from TASK_ROUTING and is escalated
+    to flagship for large inputs. Within a tier, models are ordered by measured
+    latency for that task, penalised by their recent error rate. A model whose
+    recent calls mostly failed sorts behind healthy ones, and one that keeps
+    failing is moved to the back for COOLDOWN_SECONDS.
+    """
+
+    def __init__(self, models=None, tasks=None):
+        self.models = models or AVAILABLE_MODELS
+        self.tasks = tasks or TASK_ROUTING
+        self.lock = threading.Lock()
+        self.latency = {}
+        self.outcomes = {}
+        self.cooldown_until = {}
+        self.routed = {}
+
+    def get_route(self, task):
+        return self.tasks.get(task)
+
+    def route(self, task, input_chars=0, providers=None):
+        route = self.get_route(task)
+        if not route:
+            return []
+
+        input_tokens = input_chars // CHARS_PER_TOKEN
+        tier = route['tier']
+        if tier == 'fast' and input_tokens > FAST_TIER_MAX_INPUT_TOKENS:
+            tier = 'flagship'
+        needed_tokens = input_tokens + route.get('max_output_tokens', 0)
+
+        candidates = [
+            model for model, caps in self.models.items()
+            if caps.get('tier') == tier
+            and (providers is None or caps['provider'] in providers)
+            and needed_tokens < caps.get('context_tokens', 0)
+        ]
+
+        now = time.monotonic()
+        with self.lock:
+            measured = [self.latency[(task, model)] for model in candidates if (task, model) in self.latency]
+            # A model that has been called but never succeeded is assumed as slow as the slowest measured one
+            failed_prior = max(measured, default=0)
+
+            def score(model):
+                cooling = self.cooldown_until.get(model, 0) > now
+                error_rate = self._error_rate(model)
+                latency = self.latency.get((task, model))
+                if latency is None:
+                    # Never-called models sort first so every candidate gets measured
+                    latency = failed_prior if model in self.outcomes else 0
+                # Mostly-failing models go behind healthy ones however fast they were, before any cooldown
+                failing = error_rate >= COOLDOWN_ERROR_RATE
+                return (cooling, failing, latency * (1 + ERROR_PENALTY * error_rate))
+
+            ordered = sorted(candidates, key=score)
+            if ordered:
+                key = (task, ordered[0])
+                self.routed[key] = self.routed.get(key, 0) + 1
+        return ordered
+
+    def _error_rate(self, model):
+        outcomes = self.outcomes.get(model)
+        if not outcomes:
+            return 0.0
+        return outcomes.count(False) / len(outcomes)
+
+    def record(self, model, seconds, ok, task=None):
+        with self.lock:
+            outcomes = self.outcomes.setdefault(model, deque(maxlen=ERROR_WINDOW))
+            outcomes.append(ok)
+            if ok and task:
+                previous = self.latency.get((task, model))
+                self.latency[(task, model)] = seconds if previous is None else (
+                    LATENCY_ALPHA * seconds + (1 - LATENCY_ALPHA) * previous)
+            if not ok and len(outcomes) >= 3 and self._error_rate(model) >= COOLDOWN_ERROR_RATE:
+                self.cooldown_until[model] = time.monotonic() + COOLDOWN_SECONDS
+                print(f"[Router] {model} cooling down for {COOLDOWN_SECONDS}s after repeated errors")
+
+    def get_stats(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                'models': {
+                    model: {
+                        'recent_calls': len(outcomes),
+                        'error_rate': round(self._error_rate(model), 3),
+                        'cooling_down': self.cooldown_until.get(model, 0) > now
+                    }
+                    for model, outcomes in self.outcomes.items()
+                },
+                'latency': {f"{task}:{model}": round(seconds, 2) for (task, model), seconds in self.latency.items()},
+                'routed': {f"{task}:{model}": count for (task, model), count in self.routed.items()}
+            }
+
+
+_model_router = None
+_model_router_lock = threading.Lock()
+
+
+def get_model_router():
+    global _model_router
+    if _model_router is None:
+        with _model_router_lock:
+            if _model_router is None:
+                _model_router = ModelRouter()
+    return _model_router
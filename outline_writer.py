@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+import prompts
+
+MIN_OUTLINE_SECTIONS = 3
+MAX_OUTLINE_SECTIONS = 10
+SECTION_CONTEXT_CHARS = int(os.environ.get('OUTLINE_SECTION_CONTEXT_CHARS', 20000))
+SECTION_WORKERS = int(os.environ.get('OUTLINE_SECTION_WORKERS', 6))
+
+HEADING_LINE_RE = re.compile(r'^(#{1,6})\s+(.*)$')
+
+
+def outline_first_enabled(flag=None):
+    if flag is None:
+        return os.environ.get('OUTLINE_FIRST_GENERATION', 'false').lower() == 'true'
+    if isinstance(flag, str):
+        return flag.lower() in ('true', '1', 'on', 'yes')
+    return bool(flag)
+
+
+def parse_outline(raw):
+    parsed = None
+    try:
+        parsed = json.loads(raw)
+    except Exception:
+        if isinstance(raw, str):
+            first = raw.find("{")
+            last = raw.rfind("}")
+            if first != -1 and last != -1 and last > first:
+                try:
+                    parsed = json.loads(raw[first:last + 1])
+                except Exception:
+                    parsed = None
+
+    if not isinstance(parsed, dict) or not isinstance(parsed.get('sections'), list):
+        return None
+
+    sections = []
+    for section in parsed['sections'][:MAX_OUTLINE_SECTIONS]:
+        if not isinstance(section, dict) or not str(section.get('heading', '')).strip():
+            continue
+        key_points = section.get('key_points') or []
+        if not isinstance(key_points, list):
+            key_points = [str(key_points)]
+        try:
+            target_words = int(section.get('target_words') or 250)
+        except (TypeError, ValueError):
+            target_words = 250
+        sections.append({
+            'heading': str(section['heading']).strip().lstrip('#').strip(),
+            'key_points': [str(point) for point in key_points],
+            'target_words': max(100, min(600, target_words))
+        })
+
+    if len(sections) < MIN_OUTLINE_SECTIONS:
+        return None
+
+    return {
+        'title': str(parsed.get('title') or '').strip(),
+        'hook': str(parsed.get('hook') or '').strip(),
+        'sections': sections
+    }
+
+
+def format_outline(outline):
+    lines = []
+    for i, section in enumerate(outline['sections'], 1):
+        lines.append(f"{i}. {section['heading']}")
+        for point in section['key_points']:
+            lines.append(f"   - {point}")
+    return "\n".join(lines)
+
+
+def _clean_section(text, heading):
+    lines = text.strip().split('\n')
+    while lines and (not lines[0].strip() or HEADING_LINE_RE.match(lines[0].strip())):
+        match = HEADING_LINE_RE.match(lines[0].strip())
+        # Drop stray title lines and the writer's own copy of the heading;
+        # the outline heading is re-added below so every section has one H2
+        if match and len(match.group(1)) > 2 and match.group(2).strip().lower() != heading.lower():
+            break
+        lines.pop(0)
+    body = '\n'.join(lines).strip()
+    return f"## {heading}\n\n{body}" if body else ''
+
+
+def _clean_intro(text):
+    lines = [line for line in text.strip().split('\n') if not HEADING_LINE_RE.match(line.strip())]
+    return '\n'.join(lines).strip()
+
+
+def stitch_sections(title, intro, outline, section_texts):
+    """Light consistency pass: one H1, one H2 per outline section, no duplicated sections."""
+    parts = [f"# {title}"]
+    if intro:
+        parts.append(intro)
+
+    seen_headings = set()
+    for section, text in zip(outline['sections'], section_texts):
+        key = section['heading'].lower()
+        if key in seen_headings:
+            continue
+        seen_headings.add(key)
+        cleaned = _clean_section(text or '', section['heading'])
+        if cleaned:
+            parts.append(cleaned)
+    return '\n\n'.join(parts)
+
+
+def write_outline_first(ai_manager, style_prompt, content_context, model=None, on_outline=None):
+    """
+    Generate a post as outline + concurrently written sections.
+
+    on_outline(title, outline_text) is called as soon as the outline exists,
+    before any section is written. Returns None when the outline or any
+    section cannot be produced, so the caller can fall back to single-pass
+    generation.
+    """
+    started = time.time()
+    content_context = content_context or ''
+    # Planning is one short structured call, so it goes to a fast model; sections use the caller's model
+    raw_outline = ai_manager.generate_content(prompts.get_outline_prompt(style_prompt), content_context,
+                                              task='outline')
+    outline = parse_outline(raw_outline)
+    if not outline:
+        print("[Outline] Could not parse outline, falling back to single-pass generation")
+        return None
+
+    title = outline['title'] or outline['sections'][0]['heading']
+    outline_text = format_outline(outline)
+    print(f"[Outline] {len(outline['sections'])} sections planned in {time.time() - started:.2f}s")
+    if on_outline:
+        try:
+            on_outline(title, f"{outline['hook']}\n\n{outline_text}".strip())
+        except Exception as e:
+            print(f"[Outline] on_outline callback failed: {e}")
+
+    section_context = content_context[:SECTION_CONTEXT_CHARS]
+
+    total = len(outline['sections'])
+    jobs = [(prompts.get_intro_prompt(style_prompt, title, outline_text, outline['hook']), 'intro')]
+    for i, section in enumerate(outline['sections'], 1):
+        jobs.append((prompts.get_section_prompt(style_prompt, title, outline_text, section, i, total), section['heading']))
+
+    def write(job):
+        prompt, label = job
+        for attempt in range(2):
+            try:
+                text = ai_manager.generate_content(prompt, section_context, model)
+                if text and text.strip():
+                    return text
+            except Exception as e:
+                print(f"[Outline] Section '{label[:40]}' attempt {attempt + 1} failed: {e}")
+        return None
+
+    sections_started = time.time()
+    with ThreadPoolExecutor(max_workers=min(SECTION_WORKERS, len(jobs)), thread_name_prefix='outline') as executor:
+        futures = [executor.submit(contextvars.copy_context().run, write, job) for job in jobs]
+        results = [future.result() for future in futures]
+
+    if any(result is None for result in results[1:]):
+        print("[Outline] A section failed to generate, falling back to single-pass generation")
+        return None
+
+    intro = _clean_intro(results[0] or '')
+    post = stitch_sections(title, intro, outline, results[1:])
+    print(f"[Outline] {total} sections written in {time.time() - sections_started:.2f}s, "
+          f"total {time.time() - started:.2f}s, {len(post.split())} words")
+    return post
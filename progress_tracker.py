@@ -1,37 +1,305 @@
+import os
 import json
 import time
-from collections import defaultdict
-from threading import Lock
+import uuid
+import sqlite3
+from collections import OrderedDict, Counter
+from pathlib import Path
+from threading import Lock, Condition, Thread
 from tenant_context import current_tenant_id, normalize_tenant_id
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+PROGRESS_CHANNEL = 'progress_updates'
+PROGRESS_DB_PATH = Path(os.environ.get('PROGRESS_DB_PATH', Path(__file__).parent / 'progress.db'))
+
+class RedisProgressStore:
+    def __init__(self, client, ttl: int):
+        self.client = client
+        self.ttl = ttl
+    
+    def get(self, key: str):
+        value = self.client.get(f'progress:{key}')
+        return json.loads(value) if value else None
+    
+    def set(self, key: str, data: dict):
+        self.client.setex(f'progress:{key}', self.ttl, json.dumps(data))
+    
+    def delete(self, key: str):
+        self.client.delete(f'progress:{key}')
+    
+    def cleanup(self):
+        pass
+
+class SQLiteProgressStore:
+    def __init__(self, path: Path, ttl: int):
+        self.path = path
+        self.ttl = ttl
+        conn = self._connect()
+        try:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS progress (
+                    key TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_progress_expires ON progress (expires_at)')
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+    
+    def get(self, key: str):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT data FROM progress WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        finally:
+            conn.close()
+    
+    def set(self, key: str, data: dict):
+        conn = self._connect()
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO progress (key, data, expires_at) VALUES (?, ?, ?)',
+                (key, json.dumps(data), time.time() + self.ttl)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def delete(self, key: str):
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM progress WHERE key = ?', (key,))
+            conn.commit()
+        finally:
+            conn.close()
+    
+    def cleanup(self):
+        conn = self._connect()
+        try:
+            conn.execute('DELETE FROM progress WHERE expires_at <= ?', (time.time(),))
+            conn.commit()
+        finally:
+            conn.close()
+
 class ProgressTracker:
     def __init__(self):
-        self.progress_data = defaultdict(dict)
+        self.progress_data = OrderedDict()
+        self.versions = {}
         self.lock = Lock()
+        self.conditions = {}
+        self.waiters = Counter()
+        self.instance_id = uuid.uuid4().hex
+        self.ttl = int(os.environ.get('PROGRESS_TTL_SECONDS', '3600'))
+        self.max_entries = int(os.environ.get('PROGRESS_MAX_ENTRIES', '1000'))
+        self.poll_interval = float(os.environ.get('PROGRESS_POLL_SECONDS', '0.5'))
+        self.use_redis = False
+        self.redis_client = None
+        self.store = None
+        
+        if REDIS_AVAILABLE:
+            redis_url = os.environ.get('REDIS_URL')
+            if redis_url:
+                try:
+                    self.redis_client = redis.from_url(redis_url, decode_responses=True)
+                    self.redis_client.ping()
+                    self.use_redis = True
+                    self.store = RedisProgressStore(self.redis_client, self.ttl)
+                    Thread(target=self._listen, daemon=True).start()
+                    print("[Progress] Using Redis for shared progress and pub/sub updates")
+                except Exception as e:
+                    print(f"[Progress] Redis connection failed: {e}, falling back to SQLite")
+        
+        if not self.store:
+            try:
+                self.store = SQLiteProgressStore(PROGRESS_DB_PATH, self.ttl)
+                print(f"[Progress] Using shared SQLite progress store at {PROGRESS_DB_PATH}")
+            except Exception as e:
+                print(f"[Progress] SQLite progress store unavailable: {e}, using in-process memory only")
+        
+        Thread(target=self._expiry_loop, daemon=True).start()
     
     def _key(self, job_id: str, tenant_id=None):
         tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
         return f'{tenant_id}:{job_id}'
+    
+    def _apply(self, key: str, data):
+        with self.lock:
+            if data is None:
+                self.progress_data.pop(key, None)
+            else:
+                self.progress_data[key] = data
+                self.progress_data.move_to_end(key)
+                while len(self.progress_data) > self.max_entries:
+                    evicted, _ = self.progress_data.popitem(last=False)
+                    if evicted not in self.waiters:
+                        self.versions.pop(evicted, None)
+            self.versions[key] = self.versions.get(key, 0) + 1
+            condition = self.conditions.get(key)
+            if condition:
+                condition.notify_all()
+    
+    def _refresh(self, key: str):
+        if not self.store:
+            return
+        try:
+            data = self.store.get(key)
+        except Exception as e:
+            print(f"[Progress] Store read error: {e}")
+            return
+        with self.lock:
+            local = self.progress_data.get(key)
+        if data is None and local is None:
+            return
+        if data is None or local is None or data.get('timestamp') != local.get('timestamp'):
+            self._apply(key, data)
+    
+    def _publish(self, key: str, data):
+        if not self.use_redis:
+            return
+        try:
+            self.redis_client.publish(PROGRESS_CHANNEL, json.dumps({
+                'origin': self.instance_id,
+                'key': key,
+                'data': data
+            }))
+        except Exception as e:
+            print(f"[Progress] Redis publish error: {e}")
+    
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(PROGRESS_CHANNEL)
+                for message in pubsub.listen():
+                    try:
+                        payload = json.loads(message['data'])
+                    except (TypeError, ValueError):
+                        continue
+                    if payload.get('origin') != self.instance_id and payload.get('key'):
+                        self._apply(payload['key'], payload.get('data'))
+            except Exception as e:
+                print(f"[Progress] Redis subscriber error: {e}, reconnecting")
+                time.sleep(1)
+    
+    def _expiry_loop(self):
+        interval = max(10, min(300, self.ttl // 4))
+        while True:
+            time.sleep(interval)
+            try:
+                self.cleanup_old_progress(self.ttl)
+            except Exception as e:
+                print(f"[Progress] Cleanup error: {e}")
 
     def update_progress(self, job_id: str, stage: str, progress: int, message: str = "", tenant_id=None):
-        with self.lock:
-            self.progress_data[self._key(job_id, tenant_id)] = {
-                'stage': stage,
-                'progress': progress,
-                'message': message,
-                'timestamp': time.time(),
-                'tenant_id': normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            }
+        key = self._key(job_id, tenant_id)
+        now = time.time()
+        previous = self.get_progress(job_id, tenant_id=tenant_id) or {}
+        
+        stage_timings = dict(previous.get('stage_timings') or {})
+        stage_started_at = previous.get('stage_started_at', now)
+        if previous.get('stage') and previous.get('stage') != stage:
+            stage_timings[previous['stage']] = round(
+                stage_timings.get(previous['stage'], 0) + now - stage_started_at, 3
+            )
+            stage_started_at = now
+        
+        data = {
+            'stage': stage,
+            'progress': progress,
+            'message': message,
+            'timestamp': now,
+            'stage_started_at': stage_started_at,
+            'stage_timings': stage_timings,
+            'started_at': previous.get('started_at', now),
+            'tenant_id': normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+        }
+        if progress >= 100:
+            stage_timings[stage] = round(stage_timings.get(stage, 0) + now - stage_started_at, 3)
+            data['total_seconds'] = round(now - data['started_at'], 3)
+        
+        self._apply(key, data)
+        if self.store:
+            try:
+                self.store.set(key, data)
+            except Exception as e:
+                print(f"[Progress] Store write error: {e}")
+        self._publish(key, data)
     
     def get_progress(self, job_id: str, tenant_id=None):
+        key = self._key(job_id, tenant_id)
         with self.lock:
-            return self.progress_data.get(self._key(job_id, tenant_id))
+            local = self.progress_data.get(key)
+        if local is None or not self.use_redis:
+            self._refresh(key)
+            with self.lock:
+                local = self.progress_data.get(key)
+        if local and time.time() - local['timestamp'] > self.ttl:
+            return None
+        return local
+    
+    def wait_for_update(self, job_id: str, last_version: int = -1, timeout: float = 15, tenant_id=None):
+        """
+        Block until the progress for job_id changes past last_version or the
+        timeout elapses. Returns (version, progress); the version is unchanged
+        on timeout. Pass -1 to receive the current state immediately.
+        
+        With the SQLite store there is no cross-process signal, so the shared
+        file is re-read every poll_interval while waiting.
+        """
+        key = self._key(job_id, tenant_id)
+        deadline = time.monotonic() + timeout
+        poll = self.poll_interval if self.store and not self.use_redis else None
+        if not poll:
+            with self.lock:
+                cached = key in self.progress_data
+            if not cached:
+                self._refresh(key)
+        
+        while True:
+            if poll:
+                self._refresh(key)
+            with self.lock:
+                condition = self.conditions.get(key)
+                if condition is None:
+                    condition = self.conditions[key] = Condition(self.lock)
+                self.waiters[key] += 1
+                try:
+                    remaining = max(0, deadline - time.monotonic())
+                    changed = condition.wait_for(
+                        lambda: self.versions.get(key, 0) != last_version,
+                        timeout=min(remaining, poll) if poll else remaining
+                    )
+                    result = (self.versions.get(key, 0), self.progress_data.get(key))
+                finally:
+                    self.waiters[key] -= 1
+                    if self.waiters[key] <= 0:
+                        del self.waiters[key]
+                        self.conditions.pop(key, None)
+            if changed or time.monotonic() >= deadline:
+                return result
     
     def remove_progress(self, job_id: str, tenant_id=None):
-        with self.lock:
-            key = self._key(job_id, tenant_id)
-            if key in self.progress_data:
-                del self.progress_data[key]
+        key = self._key(job_id, tenant_id)
+        if self.store:
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                print(f"[Progress] Store delete error: {e}")
+        self._apply(key, None)
+        self._publish(key, None)
     
     def cleanup_old_progress(self, max_age_seconds: int = 3600):
         current_time = time.time()
@@ -43,6 +311,11 @@ class ProgressTracker:
             
             for job_id in jobs_to_remove:
                 del self.progress_data[job_id]
+                if job_id not in self.waiters:
+                    self.versions.pop(job_id, None)
+        
+        if self.store:
+            self.store.cleanup()
 
 _progress_tracker = None
 
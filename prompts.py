@@ -1,3 +1,7 @@
+# Prompts put their static instructions before this marker and per-request
+# details after it; ai_providers splits on it so the static part can be cached.
+CACHE_BOUNDARY = "\n<<cache-boundary>>\n"
+
 def get_blog_gen_prompt():
     return """
 🚨 CRITICAL INSTRUCTION - READ THIS FIRST 🚨
@@ -584,3 +588,193 @@ TECHNICAL REQUIREMENTS:
 
 The diagram should look like a professional system architecture diagram from a technical whitepaper or documentation, clearly explaining the structure and flow of the topic discussed in the article.
 """
+
+def get_outline_prompt(style_prompt):
+    return f"""
+{style_prompt}
+
+PLANNING STEP: Do not write the post yet. Plan it as a structured outline that several writers will expand in parallel.
+
+Return ONLY a raw JSON object with no markdown fences and no commentary, in this shape:
+{{
+  "title": "The post title (60-80 characters)",
+  "hook": "One or two sentences describing how the introduction grabs the reader",
+  "sections": [
+    {{"heading": "H2 heading text without #", "key_points": ["point", "point"], "target_words": 250}}
+  ]
+}}
+
+Rules:
+- 5-8 sections, in reading order, the last one being the closing section with clear action steps
+- Every fact, example and number in key_points must come from the source content
+- Sections must not overlap; each one covers distinct ground
+- target_words across all sections should add up to 1200-1800
+"""
+
+def get_section_prompt(style_prompt, title, outline_text, section, index, total):
+    key_points = "\n".join(f"- {point}" for point in section.get('key_points', []))
+    return f"""
+{style_prompt}
+
+You are writing ONE section of a longer Medium post. Other writers are writing the other sections at the same time from the same outline, so stay strictly inside your section.
+
+Post title: {title}
+
+Full outline:
+{outline_text}
+
+YOUR SECTION ({index} of {total}): {section.get('heading', '')}
+Key points to cover:
+{key_points}
+
+Target length: about {section.get('target_words', 250)} words.
+
+Rules:
+- Start with the line "## {section.get('heading', '')}" and write only this section's body after it
+- Do not write the post title, an introduction to the whole post, or other sections
+- Do not repeat points that belong to other sections of the outline
+- Only the final section may wrap up the post
+- Use only facts from the source content
+
+Return only the Markdown for this section.
+"""
+
+def get_intro_prompt(style_prompt, title, outline_text, hook):
+    return f"""
+{style_prompt}
+
+You are writing ONLY the opening of a longer Medium post. Other writers are writing the body sections at the same time from the same outline.
+
+Post title: {title}
+
+Full outline:
+{outline_text}
+
+Hook to deliver: {hook}
+
+Rules:
+- Write 2-4 short paragraphs (120-200 words) that hook the reader and set up the sections in the outline
+- No headings, no title line, no section content
+- Use only facts from the source content
+
+Return only the Markdown paragraphs.
+"""
+
+def get_transcript_enhancement_prompt(blog_text, transcript):
+    return f"""
+You are an expert editor specializing in transforming blog posts using video transcript insights.
+
+🚨 CRITICAL: The blog post and transcript MUST be about the SAME topic. Do not change the topic. Stay focused.
+
+Your task: Enhance the wording, depth, and accuracy of this Medium blog post using the YouTube video transcript.
+
+ENHANCEMENT INSTRUCTIONS:
+1. VERIFY the blog post is about the same topic as the transcript - if not, rewrite to match the transcript
+2. Use specific quotes, examples, and details from the transcript to enrich the content
+3. Replace generic statements with precise information from the video
+4. Add concrete examples and real-world scenarios mentioned in the transcript
+5. Incorporate exact statistics, numbers, and data points from the video
+6. Use the speaker's authentic voice and terminology where appropriate
+7. Expand sections with additional context from the transcript
+8. Ensure all claims are backed by transcript content
+9. Maintain the blog structure while deepening the content
+10. Target 1200-1800 words using transcript details
+11. Keep the writing style natural and engaging
+12. DO NOT deviate from the transcript topic - this is mandatory
+
+YouTube Transcript:
+{transcript[:8000]}
+
+Blog Post to Enhance:
+{blog_text}
+
+Return the enhanced blog post in Markdown format. No explanations or meta-commentary.
+"""
+
+def get_style_enhancement_prompt(blog_text):
+    return f"""
+You are an expert editor and writing coach. Enhance this Medium blog post to make it sound like it was written by a confident, clear, and direct human - not an AI.
+
+Apply these rules meticulously:
+
+HUMAN WRITING STYLE:
+- Write like humans speak. No corporate jargon or marketing fluff.
+- Be confident and direct. Remove softening phrases like "I think," "I believe," "maybe," or "could."
+- Use active voice over passive voice.
+- Use "you" more than "we" when addressing readers.
+- Use contractions like "I'll," "won't," and "can't" for a warmer tone.
+
+BANNED WORDS - REMOVE OR REPLACE:
+- Softening Hedges: "a bit," "a little," "just," "pretty," "quite," "rather," "really," "very," "arguably," "it seems," "sort of," "kind of"
+- Corporate Jargon: "agile," "assistance" (use "help"), "best practices" (use "proven approaches"), "blazing fast" (use metrics), "delve" (use "go into"), "disrupt," "facilitate" (use "help"), "game-changing," "innovative," "leverage" (use "use"), "robust" (use "strong"), "seamless" (use "automatic"), "utilize" (use "use")
+- AI Patterns: Never use "Let's dive into," "In today's fast-paced world," "In the ever-evolving landscape." Never end with "In conclusion," "Overall," "Hope this helps!"
+
+ENHANCEMENT FOCUS:
+1. Make the opening more compelling and hook readers immediately
+2. Add emotional hooks and relatable scenarios
+3. Improve flow and transitions between sections
+4. Strengthen the conclusion with clear action steps
+5. Replace vague language with specific facts and data
+6. Make content concrete, visual, and falsifiable
+7. Use realistic examples (no foo/bar/baz placeholders)
+8. Add code snippets, workflows, or visual explanations where helpful
+9. EXPAND content - do NOT compress or shorten
+10. If the post is under 1000 words, add more examples, case studies, and detailed explanations
+11. Target 1200-1800 words for comprehensive depth
+
+Original post:
+{blog_text}
+
+Return the enhanced version in Markdown format. No explanations or meta-commentary.
+"""
+
+def get_combined_enhancement_prompt(blog_text, transcript):
+    return f"""
+You are an expert editor and writing coach. In ONE pass, ground this Medium blog post in the YouTube video transcript AND make it read like it was written by a confident, clear, and direct human - not an AI.
+
+🚨 CRITICAL: The blog post and transcript MUST be about the SAME topic. Do not change the topic. Stay focused.
+
+GROUNDING IN THE TRANSCRIPT:
+1. Use specific quotes, examples, and details from the transcript to enrich the content
+2. Replace generic statements with precise information from the video
+3. Incorporate exact statistics, numbers, and data points from the video
+4. Use the speaker's authentic voice and terminology where appropriate
+5. Ensure all claims are backed by transcript content
+6. Maintain the blog structure (title and section headings) while deepening the content
+
+HUMAN WRITING STYLE:
+- Write like humans speak. No corporate jargon or marketing fluff.
+- Be confident and direct. Remove softening phrases like "I think," "I believe," "maybe," or "could."
+- Use active voice, "you" more than "we", and contractions like "I'll," "won't," and "can't".
+- Remove hedges ("a bit," "just," "pretty," "quite," "really," "very," "sort of," "kind of") and jargon ("delve," "leverage," "utilize," "robust," "seamless," "game-changing," "innovative," "facilitate").
+- Never use "Let's dive into," "In today's fast-paced world," "In the ever-evolving landscape." Never end with "In conclusion," "Overall," "Hope this helps!"
+
+ENHANCEMENT FOCUS:
+1. Make the opening hook readers immediately
+2. Improve flow and transitions between sections
+3. Strengthen the conclusion with clear action steps
+4. Use realistic examples (no foo/bar/baz placeholders)
+5. EXPAND content - do NOT compress or shorten; target 1200-1800 words
+
+YouTube Transcript:
+{transcript[:8000]}
+
+Blog Post to Enhance:
+{blog_text}
+
+Return the enhanced blog post in Markdown format. No explanations or meta-commentary.
+"""
+
+def get_continuation_prompt(original_prompt, partial_text):
+    return f"""{original_prompt}
+
+{'='*80}
+YOUR RESPONSE SO FAR (it was cut off by the output limit; only the end is shown):
+{'='*80}
+
+{partial_text}
+
+{'='*80}
+Continue EXACTLY where the response above stops, mid-sentence if needed.
+Output ONLY the missing remainder. Do not repeat anything already written, do not restart the post, and do not add commentary.
+"""
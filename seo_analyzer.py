@@ -1,70 +1,43 @@
-import re
 from collections import Counter
 import math
 
+from text_analysis import count_syllables, get_document
+
+STOP_WORDS = {
+    'this', 'that', 'with', 'from', 'have', 'will', 'your', 'their',
+    'which', 'about', 'would', 'there', 'these', 'those', 'when',
+    'where', 'what', 'make', 'been', 'more', 'than', 'some', 'could',
+    'into', 'time', 'very', 'only', 'just', 'know', 'take', 'people',
+    'them', 'then', 'well', 'also', 'back', 'after', 'most', 'even'
+}
+
 def calculate_readability_score(text):
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
-    words = text.split()
+    doc = get_document(text)
     
-    if not sentences or not words:
+    if not doc.sentence_count or not doc.word_count:
         return 0
     
-    total_sentences = len(sentences)
-    total_words = len(words)
-    syllables = sum(count_syllables(word) for word in words)
-    
-    if total_sentences == 0 or total_words == 0:
-        return 0
+    total_sentences = doc.sentence_count
+    total_words = doc.word_count
+    syllables = doc.syllable_count
     
     flesch_reading_ease = 206.835 - 1.015 * (total_words / total_sentences) - 84.6 * (syllables / total_words)
     return max(0, min(100, flesch_reading_ease))
 
-def count_syllables(word):
-    word = word.lower()
-    vowels = 'aeiouy'
-    syllable_count = 0
-    previous_was_vowel = False
-    
-    for char in word:
-        is_vowel = char in vowels
-        if is_vowel and not previous_was_vowel:
-            syllable_count += 1
-        previous_was_vowel = is_vowel
-    
-    if word.endswith('e'):
-        syllable_count -= 1
-    if word.endswith('le') and len(word) > 2 and word[-3] not in vowels:
-        syllable_count += 1
-    if syllable_count == 0:
-        syllable_count = 1
-        
-    return syllable_count
-
 def extract_keywords(text, top_n=10):
-    words = re.findall(r'\b[a-z]{4,}\b', text.lower())
-    
-    stop_words = {
-        'this', 'that', 'with', 'from', 'have', 'will', 'your', 'their',
-        'which', 'about', 'would', 'there', 'these', 'those', 'when',
-        'where', 'what', 'make', 'been', 'more', 'than', 'some', 'could',
-        'into', 'time', 'very', 'only', 'just', 'know', 'take', 'people',
-        'them', 'then', 'well', 'also', 'back', 'after', 'most', 'even'
-    }
-    
-    filtered_words = [w for w in words if w not in stop_words]
-    word_freq = Counter(filtered_words)
+    doc = get_document(text)
+    word_freq = Counter({w: n for w, n in doc.alpha_word_counter.items() if w not in STOP_WORDS})
     
     return word_freq.most_common(top_n)
 
 def calculate_keyword_density(text):
-    words = text.split()
-    total_words = len(words)
+    doc = get_document(text)
+    total_words = doc.word_count
     
     if total_words == 0:
         return {}
     
-    keywords = extract_keywords(text, 5)
+    keywords = extract_keywords(doc, 5)
     density = {}
     
     for word, count in keywords:
@@ -73,18 +46,19 @@ def calculate_keyword_density(text):
     return density
 
 def analyze_seo(text, title):
+    doc = get_document(text)
     analysis = {
-        'readability_score': calculate_readability_score(text),
-        'keywords': extract_keywords(text, 10),
-        'keyword_density': calculate_keyword_density(text),
-        'word_count': len(text.split()),
+        'readability_score': calculate_readability_score(doc),
+        'keywords': extract_keywords(doc, 10),
+        'keyword_density': calculate_keyword_density(doc),
+        'word_count': doc.word_count,
         'title_length': len(title),
         'title_optimal': 60 <= len(title) <= 80,
-        'has_questions': '?' in text,
-        'has_lists': bool(re.search(r'^\d+\.|^[-*]', text, re.MULTILINE)),
-        'paragraph_count': len(text.split('\n\n')),
-        'heading_count': len(re.findall(r'^#{2,3}\s', text, re.MULTILINE)),
-        'external_links': len(re.findall(r'https?://', text)),
+        'has_questions': '?' in doc.text,
+        'has_lists': doc.has_lists,
+        'paragraph_count': doc.paragraph_count,
+        'heading_count': doc.h2_h3_count,
+        'external_links': doc.link_count,
     }
     
     analysis['seo_score'] = calculate_seo_score(analysis)
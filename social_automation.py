@@ -71,7 +71,7 @@ class SocialAutomation:
                 generated = ai_manager.generate_content(
                     "You are a social media expert. Create engaging, platform-optimized content.",
                     prompt,
-                    'gpt-4o'
+                    task='social_post'
                 )
                 return generated
         except Exception as e:
@@ -1,9 +1,35 @@
 import os
-from supabase import create_client, Client
-from flask import session
+import uuid
+import base64
+import threading
+import weakref
+from supabase import create_client, Client, ClientOptions
+from postgrest.exceptions import APIError
+from flask import session, g, has_request_context, request
 from datetime import datetime
 import json
 from tenant_context import current_tenant_id, normalize_tenant_id, tenant_get, tenant_pop, tenant_set, tenant_key
+from write_behind import get_write_behind_buffer, write_behind_enabled
+
+# owner_key in the rollup tables for rows saved without a user
+ANONYMOUS_OWNER = 'anonymous'
+
+# SQLSTATE classes for rows Postgres will never accept: data exceptions,
+# integrity constraint violations, and undefined columns or types
+REJECTED_SQLSTATE_CLASSES = ('22', '23', '42')
+
+def is_rejected_write(error):
+    """Whether PostgREST refused the rows themselves, so retrying them cannot succeed."""
+    if not isinstance(error, APIError):
+        return False
+    code = str(error.code or '')
+    if len(code) == 3 and code.isdigit():
+        # An HTTP status, when the error body was not JSON
+        return code.startswith('4')
+    if code.startswith('PGRST'):
+        # PGRST1xx: malformed request; PGRST2xx: unknown table or column
+        return code[5:6] in ('1', '2')
+    return code[:2] in REJECTED_SQLSTATE_CLASSES
 
 class SupabaseAuthStorage:
     def __init__(self):
@@ -42,44 +68,246 @@ class SupabaseAuthStorage:
         tenant_pop(key, None)
         tenant_pop(f"sb-{key}", None)
 
-class SupabaseManager:
+# Columns each kind of read needs; post bodies and images are only fetched for a single post
+POST_DETAIL_COLUMNS = ('id, title, created_at, markdown_content, html_content, image_header, image_content, '
+                       'reading_time, word_count, engagement_score, seo_score, viral_potential, readability_score, '
+                       'key_quotes, seo_recommendations')
+POST_LIST_COLUMNS = 'id, title, created_at, word_count, engagement_score, seo_score, viral_potential'
+POST_SEARCH_COLUMNS = 'id, title, created_at, word_count, engagement_score'
+
+def encode_cursor(row):
+    """An opaque keyset cursor pointing just past row in (created_at, id) descending order."""
+    raw = json.dumps([row['created_at'], str(row['id'])]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """(created_at, id) from a cursor, or None when it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, post_id = json.loads(raw)
+        # Both end up inside a PostgREST filter, so only well-formed values get through
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(post_id))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+class QueryStats:
+    """
+    PostgREST round trips and response bytes, for the process and per request.
+
+    record() is an httpx response hook on each client's PostgREST session.
+    finish_request() folds the current request's counts into per-endpoint
+    totals, so get_stats() can report the cost of each page view.
+    """
+
     def __init__(self):
-        self._url = os.environ.get("SUPABASE_URL")
-        anon_key = os.environ.get("SUPABASE_KEY")
-        service_key = os.environ.get("SUPABASE_SERVICE_KEY")
+        self.lock = threading.Lock()
+        self.round_trips = 0
+        self.bytes = 0
+        self.endpoints = {}
+
+    def record(self, response):
+        response.read()
+        size = len(response.content)
+        with self.lock:
+            self.round_trips += 1
+            self.bytes += size
+        if has_request_context():
+            current = g.setdefault('supabase_queries', {'round_trips': 0, 'bytes': 0})
+            current['round_trips'] += 1
+            current['bytes'] += size
+
+    def finish_request(self, endpoint):
+        current = g.pop('supabase_queries', None) if has_request_context() else None
+        if not current:
+            return None
+        with self.lock:
+            totals = self.endpoints.setdefault(endpoint or 'unknown', {'requests': 0, 'round_trips': 0, 'bytes': 0})
+            totals['requests'] += 1
+            totals['round_trips'] += current['round_trips']
+            totals['bytes'] += current['bytes']
+        return current
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'round_trips': self.round_trips,
+                'bytes': self.bytes,
+                'per_request': {
+                    endpoint: {
+                        'requests': totals['requests'],
+                        'avg_round_trips': round(totals['round_trips'] / totals['requests'], 2),
+                        'avg_bytes': round(totals['bytes'] / totals['requests'])
+                    }
+                    for endpoint, totals in self.endpoints.items()
+                }
+            }
 
-        if not self._url or not anon_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+query_stats = QueryStats()
+
+def _instrumented(client):
+    """The client's PostgREST client with query_stats hooked in; it is rebuilt on auth events, so check each time."""
+    postgrest = client.postgrest
+    hooks = postgrest.session.event_hooks['response']
+    if query_stats.record not in hooks:
+        hooks.append(query_stats.record)
+    return postgrest
+
+def record_supabase_queries(response):
+    """after_request hook: report this request's PostgREST round trips and bytes."""
+    current = query_stats.finish_request(request.endpoint)
+    if current:
+        response.headers['X-Supabase-Round-Trips'] = str(current['round_trips'])
+        response.headers['X-Supabase-Bytes'] = str(current['bytes'])
+    return response
+
+SUPABASE_POOL_SIZE = int(os.environ.get('SUPABASE_POOL_SIZE', 8))
+
+class SupabaseClientPool:
+    """
+    Long-lived Supabase clients for this process.
+
+    The service-role client holds no per-user state, so all threads share it
+    and its HTTP connections. Anon-key clients carry per-request state (PKCE
+    storage, the user's bearer token), so each request leases one and hands it
+    back when done; up to SUPABASE_POOL_SIZE idle clients are kept for reuse.
+    """
+
+    def __init__(self, url, anon_key, service_key=None, size=SUPABASE_POOL_SIZE):
+        self.url = url
+        self.anon_key = anon_key
+        self.size = size
+        self.lock = threading.Lock()
+        self.idle = []
+        self.created = 0
+        self.reused = 0
+        self.leased = 0
 
         # Use service role key for database if available, BUT use anon key for auth.
         # Supabase OAuth/PKCE generally expects the anon/client key.
-        self._key = service_key or anon_key
-        self._anon_key = anon_key
-        self._using_service_role = bool(service_key)
-        
-        from supabase import ClientOptions
-        
-        # Initialize client with session-based storage for PKCE persistence
-        # We use the anon_key for the auth client specifically
-        self.client: Client = create_client(
-            self._url, 
-            self._anon_key if not self._using_service_role else self._anon_key, # Always use anon for auth-related client if possible
+        self.service_client = create_client(url, service_key) if service_key else None
+        if self.service_client:
+            print("Supabase: initialized with service role for DB and anon key for Auth")
+        else:
+            print("Supabase: using anon key for both Auth and DB")
+
+    def _create_client(self):
+        # Session-based storage for PKCE persistence
+        return create_client(
+            self.url,
+            self.anon_key,
             options=ClientOptions(
                 flow_type="pkce",
                 storage=SupabaseAuthStorage()
             )
         )
-        
-        # If we have a service role key, we'll create a separate internal client for DB operations
-        self._db_client = self.client
-        if self._using_service_role:
-            self._db_client = create_client(self._url, service_key)
-            print("Supabase: initialized with service role for DB and anon key for Auth")
-        else:
-            print("Supabase: using anon key for both Auth and DB")
-            access_token = tenant_get('access_token')
-            if access_token:
-                self._db_client.postgrest.auth(access_token)
+
+    def acquire(self):
+        with self.lock:
+            self.leased += 1
+            if self.idle:
+                self.reused += 1
+                return self.idle.pop()
+            self.created += 1
+        return self._create_client()
+
+    def release(self, client):
+        # Drop any user token the client picked up while leased
+        auth_header = f"Bearer {self.anon_key}"
+        client.options.headers['Authorization'] = auth_header
+        client.auth._headers['Authorization'] = auth_header
+        client.postgrest.auth(self.anon_key)
+        # A sign-in starts a refresh timer for that user's session; it must not outlive the lease
+        if client.auth._refresh_token_timer:
+            client.auth._refresh_token_timer.cancel()
+            client.auth._refresh_token_timer = None
+        with self.lock:
+            self.leased -= 1
+            if len(self.idle) < self.size:
+                self.idle.append(client)
+
+    def insert_records(self, table, records):
+        """Batch insert for the write-behind buffer; rows whose id already exists are skipped."""
+        _instrumented(self.service_client).from_(table).upsert(records, ignore_duplicates=True).execute()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'service_role': self.service_client is not None,
+                'clients_created': self.created,
+                'clients_reused': self.reused,
+                'leased': self.leased,
+                'idle': len(self.idle)
+            }
+
+_supabase_pool = None
+_supabase_pool_lock = threading.Lock()
+
+def get_supabase_pool():
+    global _supabase_pool
+    if _supabase_pool is None:
+        with _supabase_pool_lock:
+            if _supabase_pool is None:
+                url = os.environ.get("SUPABASE_URL")
+                anon_key = os.environ.get("SUPABASE_KEY")
+                if not url or not anon_key:
+                    raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+                _supabase_pool = SupabaseClientPool(url, anon_key, os.environ.get("SUPABASE_SERVICE_KEY"))
+    return _supabase_pool
+
+class SupabaseManager:
+    def __init__(self, pool=None):
+        self._pool = pool or get_supabase_pool()
+        self._using_service_role = self._pool.service_client is not None
+
+        # Auth always goes through a leased anon client; the DB uses the shared
+        # service-role client when there is one
+        self.client: Client = self._pool.acquire()
+        self._finalizer = weakref.finalize(self, self._pool.release, self.client)
+        self._db_client = self._pool.service_client or self.client
+        self._access_token = None
+        self.apply_request_auth()
+
+    def apply_request_auth(self):
+        """With the anon key, run DB queries as the session's user (for RLS)."""
+        if self._using_service_role or not has_request_context():
+            return
+        access_token = tenant_get('access_token')
+        if access_token and access_token != self._access_token:
+            self._db_client.postgrest.auth(access_token)
+            self._access_token = access_token
+
+    def close(self):
+        """Return the leased client to the pool; also runs when the manager is collected."""
+        self._finalizer()
+
+    def _table(self, name):
+        return _instrumented(self._db_client).from_(name)
+
+    def _owned(self, query, user_id, tenant_id):
+        """Scope to the tenant and, for a user, their posts plus the tenant's posts saved without one, in one query."""
+        if user_id:
+            query = query.or_(f"user_id.eq.{user_id},user_id.is.null")
+        return query.eq('tenant_id', tenant_id)
+
+    def _keyset_page(self, query, limit, cursor=None):
+        """
+        One page of rows, newest first, and the cursor for the next page (None on the last).
+        (created_at, id) is a total order, so rows are never skipped or repeated between pages.
+        """
+        if cursor:
+            position = decode_cursor(cursor)
+            if not position:
+                raise ValueError('Invalid cursor')
+            created_at, post_id = position
+            # created_at <= X and (created_at < X or id < Y), i.e. strictly after (X, Y)
+            query = query.lte('created_at', created_at).or_(f'created_at.lt."{created_at}",id.lt.{post_id}')
+        # One extra row tells whether an older page exists
+        result = query.order('created_at', desc=True).order('id', desc=True).limit(limit + 1).execute()
+        rows = result.data or []
+        if len(rows) > limit:
+            return rows[:limit], encode_cursor(rows[limit - 1])
+        return rows, None
 
     # ── Auth Methods ──────────────────────────────────────────────────
 
@@ -182,29 +410,33 @@ class SupabaseManager:
 
     # ── Data Methods ──────────────────────────────────────────────────
 
+    def _post_record(self, blog_data, user_id=None, tenant_id=None):
+        tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+        return {
+            # Assigned here so a retried write-behind insert is idempotent
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'tenant_id': tenant_id,
+            'title': blog_data.get('title'),
+            'markdown_content': blog_data.get('markdown_content') or blog_data.get('blog_post_markdown'),
+            'html_content': blog_data.get('html_content') or blog_data.get('blog_post_html'),
+            'image_header': blog_data.get('image_header') or blog_data.get('image_data'),
+            'image_content': blog_data.get('image_content') or blog_data.get('image_data_2'),
+            'reading_time': blog_data.get('reading_time'),
+            'word_count': blog_data.get('word_count'),
+            'engagement_score': blog_data.get('engagement_score'),
+            'seo_score': blog_data.get('seo_score'),
+            'viral_potential': blog_data.get('viral_potential'),
+            'readability_score': blog_data.get('readability_score'),
+            'key_quotes': json.dumps(blog_data.get('key_quotes', [])),
+            'seo_recommendations': json.dumps(blog_data.get('seo_recommendations', [])),
+            'created_at': datetime.utcnow().isoformat()
+        }
+
     def save_blog_post(self, blog_data, user_id=None, tenant_id=None):
         try:
-            tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            post_record = {
-                'user_id': user_id,
-                'tenant_id': tenant_id,
-                'title': blog_data.get('title'),
-                'markdown_content': blog_data.get('markdown_content') or blog_data.get('blog_post_markdown'),
-                'html_content': blog_data.get('html_content') or blog_data.get('blog_post_html'),
-                'image_header': blog_data.get('image_header') or blog_data.get('image_data'),
-                'image_content': blog_data.get('image_content') or blog_data.get('image_data_2'),
-                'reading_time': blog_data.get('reading_time'),
-                'word_count': blog_data.get('word_count'),
-                'engagement_score': blog_data.get('engagement_score'),
-                'seo_score': blog_data.get('seo_score'),
-                'viral_potential': blog_data.get('viral_potential'),
-                'readability_score': blog_data.get('readability_score'),
-                'key_quotes': json.dumps(blog_data.get('key_quotes', [])),
-                'seo_recommendations': json.dumps(blog_data.get('seo_recommendations', [])),
-                'created_at': datetime.utcnow().isoformat()
-            }
-
-            result = self._db_client.table('blog_posts').insert(post_record).execute()
+            post_record = self._post_record(blog_data, user_id, tenant_id)
+            result = self._table('blog_posts').insert(post_record).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error saving blog post: {e}")
@@ -212,98 +444,55 @@ class SupabaseManager:
 
     def get_blog_post_by_id(self, post_id, user_id=None, tenant_id=None):
         try:
-            query = self._db_client.table('blog_posts').select('*').eq('id', post_id)
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                result = query.eq('user_id', user_id).eq('tenant_id', tenant_id).execute()
-                if result.data:
-                    post = result.data[0]
-                    # Parse JSON fields safely
-                    for field in ('key_quotes', 'seo_recommendations'):
-                        raw = post.get(field)
-                        if isinstance(raw, str):
-                            post[field] = json.loads(raw)
-                        elif raw is None:
-                            post[field] = []
-                    return post
-
-                legacy_result = self._db_client.table('blog_posts').select('*').eq('id', post_id).is_('user_id', None).eq('tenant_id', tenant_id).execute()
-                if legacy_result.data:
-                    post = legacy_result.data[0]
-                    for field in ('key_quotes', 'seo_recommendations'):
-                        raw = post.get(field)
-                        if isinstance(raw, str):
-                            post[field] = json.loads(raw)
-                        elif raw is None:
-                            post[field] = []
-                    return post
-
+            query = self._table('blog_posts').select(POST_DETAIL_COLUMNS).eq('id', post_id)
+            result = self._owned(query, user_id, tenant_id).limit(1).execute()
+            if not result.data:
                 return None
-
-            result = query.eq('tenant_id', tenant_id).execute()
-            if result.data:
-                post = result.data[0]
-                # Parse JSON fields safely
-                for field in ('key_quotes', 'seo_recommendations'):
-                    raw = post.get(field)
-                    if isinstance(raw, str):
-                        post[field] = json.loads(raw)
-                    elif raw is None:
-                        post[field] = []
-                return post
-            return None
+            post = result.data[0]
+            # Parse JSON fields safely
+            for field in ('key_quotes', 'seo_recommendations'):
+                raw = post.get(field)
+                if isinstance(raw, str):
+                    post[field] = json.loads(raw)
+                elif raw is None:
+                    post[field] = []
+            return post
         except Exception as e:
             print(f"Error retrieving blog post: {e}")
             return None
 
-    def get_recent_posts(self, user_id=None, tenant_id=None, limit=20):
+    def get_posts_page(self, user_id=None, tenant_id=None, limit=20, cursor=None):
+        """(posts, next_cursor) for the newest posts, or the page after cursor."""
         try:
-            projection = 'id, title, created_at, word_count, engagement_score, seo_score, viral_potential'
-            query = self._db_client.table('blog_posts').select(projection)
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                user_result = query.eq('user_id', user_id).eq('tenant_id', tenant_id).order('created_at', desc=True).limit(limit).execute()
-                legacy_result = self._db_client.table('blog_posts').select(projection).is_('user_id', None).eq('tenant_id', tenant_id).order('created_at', desc=True).limit(limit).execute()
-
-                combined = []
-                seen_ids = set()
-
-                for row in (user_result.data or []) + (legacy_result.data or []):
-                    post_id = row.get('id')
-                    if post_id and post_id not in seen_ids:
-                        seen_ids.add(post_id)
-                        combined.append(row)
-
-                combined.sort(key=lambda x: x.get('created_at', ''), reverse=True)
-                return combined[:limit]
-
-            result = query.eq('tenant_id', tenant_id).order('created_at', desc=True).limit(limit).execute()
-            return result.data if result.data else []
+            query = self._owned(self._table('blog_posts').select(POST_LIST_COLUMNS), user_id, tenant_id)
+            return self._keyset_page(query, limit, cursor)
         except Exception as e:
             print(f"Error retrieving recent posts: {e}")
-            return []
+            return [], None
 
-    def search_posts(self, query_str, user_id=None, tenant_id=None):
+    def get_recent_posts(self, user_id=None, tenant_id=None, limit=20):
+        return self.get_posts_page(user_id=user_id, tenant_id=tenant_id, limit=limit)[0]
+
+    def search_posts_page(self, query_str, user_id=None, tenant_id=None, limit=20, cursor=None):
+        """(posts, next_cursor) for posts whose title contains query_str."""
         try:
-            q = self._db_client.table('blog_posts').select(
-                'id, title, created_at, word_count, engagement_score'
-            ).ilike('title', f'%{query_str}%')
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                q = q.eq('user_id', user_id)
-            q = q.eq('tenant_id', tenant_id)
-
-            result = q.order('created_at', desc=True).limit(20).execute()
-            return result.data if result.data else []
+            q = self._table('blog_posts').select(POST_SEARCH_COLUMNS).ilike('title', f'%{query_str}%')
+            return self._keyset_page(self._owned(q, user_id, tenant_id), limit, cursor)
         except Exception as e:
             print(f"Error searching posts: {e}")
-            return []
+            return [], None
+
+    def search_posts(self, query_str, user_id=None, tenant_id=None):
+        return self.search_posts_page(query_str, user_id=user_id, tenant_id=tenant_id)[0]
 
     def get_drafts_count(self, user_id, tenant_id=None):
         """Return the number of blog posts saved for the given user."""
         try:
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            result = self._db_client.table('blog_posts').select('id', count='exact').eq('user_id', user_id).eq('tenant_id', tenant_id).execute()
+            result = self._table('blog_posts').select('id', count='exact').eq('user_id', user_id).eq('tenant_id', tenant_id).execute()
             return result.count if result.count is not None else 0
         except Exception as e:
             print(f"Error getting drafts count: {e}")
@@ -311,42 +500,33 @@ class SupabaseManager:
 
     def delete_post(self, post_id, user_id=None, tenant_id=None):
         try:
-            query = self._db_client.table('blog_posts').delete().eq('id', post_id)
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                result = query.eq('user_id', user_id).eq('tenant_id', tenant_id).execute()
-                if getattr(result, 'data', None):
-                    return True
-
-                self._db_client.table('blog_posts').delete().eq('id', post_id).is_('user_id', None).eq('tenant_id', tenant_id).execute()
-                return True
-
-            query.eq('tenant_id', tenant_id).execute()
+            self._owned(self._table('blog_posts').delete().eq('id', post_id), user_id, tenant_id).execute()
             return True
         except Exception as e:
             print(f"Error deleting post: {e}")
             return False
 
+    def _rollup_rows(self, table, owner_keys, tenant_id):
+        query = self._table(table).select('*').eq('tenant_id', tenant_id)
+        if owner_keys:
+            query = query.in_('owner_key', owner_keys)
+        return query.execute().data or []
+
     def get_analytics(self, user_id=None, tenant_id=None):
+        """Post totals from the post_rollups table; see supabase_schema.sql."""
         try:
-            query = self._db_client.table('blog_posts').select('*')
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                user_result = query.eq('user_id', user_id).eq('tenant_id', tenant_id).execute()
-                legacy_result = self._db_client.table('blog_posts').select('*').is_('user_id', None).eq('tenant_id', tenant_id).execute()
-
-                posts = []
-                seen_ids = set()
-                for row in (user_result.data or []) + (legacy_result.data or []):
-                    post_id = row.get('id')
-                    if post_id and post_id not in seen_ids:
-                        seen_ids.add(post_id)
-                        posts.append(row)
-            else:
-                result = query.eq('tenant_id', tenant_id).execute()
-                posts = result.data or []
-
-            if not posts:
+            # A user also sees the tenant's posts saved without an owner
+            owner_keys = [str(user_id), ANONYMOUS_OWNER] if user_id else None
+            try:
+                rows = self._rollup_rows('post_rollups', owner_keys, tenant_id)
+            except Exception as e:
+                print(f"Post rollups unavailable, scanning posts: {e}")
+                return self._scan_analytics(user_id, tenant_id)
+
+            total_posts = sum(row.get('post_count') or 0 for row in rows)
+            if total_posts <= 0:
                 return {
                     'total_posts': 0,
                     'avg_engagement_score': 0,
@@ -356,28 +536,55 @@ class SupabaseManager:
                     'recent_posts': []
                 }
 
-            total_posts = len(posts)
-
-            avg_engagement = sum(p.get('engagement_score', 0) for p in posts) / total_posts
-            avg_seo = sum(p.get('seo_score', 0) for p in posts) / total_posts
-            avg_viral = sum(p.get('viral_potential', 0) for p in posts) / total_posts
-            total_words = sum(p.get('word_count', 0) for p in posts)
+            def total(column):
+                return sum(row.get(column) or 0 for row in rows)
 
             return {
                 'total_posts': total_posts,
-                'avg_engagement_score': round(avg_engagement, 1),
-                'avg_seo_score': round(avg_seo, 1),
-                'avg_viral_potential': round(avg_viral, 1),
-                'total_words_written': total_words,
-                'recent_posts': sorted(posts, key=lambda x: x.get('created_at', ''), reverse=True)[:5]
+                'avg_engagement_score': round(total('total_engagement') / total_posts, 1),
+                'avg_seo_score': round(total('total_seo') / total_posts, 1),
+                'avg_viral_potential': round(total('total_viral') / total_posts, 1),
+                'total_words_written': total('total_words'),
+                'recent_posts': self.get_recent_posts(user_id=user_id, tenant_id=tenant_id, limit=5)
             }
         except Exception as e:
             print(f"Error getting analytics: {e}")
             return None
 
+    def _scan_analytics(self, user_id, tenant_id):
+        """Fallback for databases without the rollup tables; reads score columns only."""
+        result = self._owned(self._table('blog_posts').select(POST_LIST_COLUMNS), user_id, tenant_id).execute()
+        posts = result.data or []
+
+        if not posts:
+            return {
+                'total_posts': 0,
+                'avg_engagement_score': 0,
+                'avg_seo_score': 0,
+                'avg_viral_potential': 0,
+                'total_words_written': 0,
+                'recent_posts': []
+            }
+
+        total_posts = len(posts)
+
+        avg_engagement = sum(p.get('engagement_score') or 0 for p in posts) / total_posts
+        avg_seo = sum(p.get('seo_score') or 0 for p in posts) / total_posts
+        avg_viral = sum(p.get('viral_potential') or 0 for p in posts) / total_posts
+        total_words = sum(p.get('word_count') or 0 for p in posts)
+
+        return {
+            'total_posts': total_posts,
+            'avg_engagement_score': round(avg_engagement, 1),
+            'avg_seo_score': round(avg_seo, 1),
+            'avg_viral_potential': round(avg_viral, 1),
+            'total_words_written': total_words,
+            'recent_posts': sorted(posts, key=lambda x: x.get('created_at', ''), reverse=True)[:5]
+        }
+
     def update_post(self, post_id, updates, user_id=None, tenant_id=None):
         try:
-            query = self._db_client.table('blog_posts').update(updates).eq('id', post_id)
+            query = self._table('blog_posts').update(updates).eq('id', post_id)
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
             if user_id:
                 query = query.eq('user_id', user_id)
@@ -389,74 +596,155 @@ class SupabaseManager:
             print(f"Error updating post: {e}")
             return None
 
+    def _log_record(self, log_data, user_id=None, tenant_id=None):
+        tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+        return {
+            'id': str(uuid.uuid4()),
+            'user_id': user_id,
+            'tenant_id': tenant_id,
+            'user_input': log_data.get('user_input'),
+            'input_type': log_data.get('input_type'),
+            'model_used': log_data.get('model'),
+            'template': log_data.get('template'),
+            'tone': log_data.get('tone'),
+            'enhanced': log_data.get('enhanced', False),
+            'success': log_data.get('success', True),
+            'error_message': log_data.get('error'),
+            'generation_time': log_data.get('generation_time'),
+            'created_at': datetime.utcnow().isoformat()
+        }
+
     def save_generation_log(self, log_data, user_id=None, tenant_id=None):
         try:
-            tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            log_record = {
-                'user_id': user_id,
-                'tenant_id': tenant_id,
-                'user_input': log_data.get('user_input'),
-                'input_type': log_data.get('input_type'),
-                'model_used': log_data.get('model'),
-                'template': log_data.get('template'),
-                'tone': log_data.get('tone'),
-                'enhanced': log_data.get('enhanced', False),
-                'success': log_data.get('success', True),
-                'error_message': log_data.get('error'),
-                'generation_time': log_data.get('generation_time'),
-                'created_at': datetime.utcnow().isoformat()
-            }
-
-            result = self._db_client.table('generation_logs').insert(log_record).execute()
+            log_record = self._log_record(log_data, user_id, tenant_id)
+            result = self._table('generation_logs').insert(log_record).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error saving generation log: {e}")
             return None
 
+    def queue_blog_post(self, blog_data, user_id=None, tenant_id=None):
+        """
+        Save through the write-behind buffer when there is one, else inline.
+        Returns the queued record, whose id is final.
+        """
+        write_behind = get_write_behind()
+        if not write_behind:
+            return self.save_blog_post(blog_data, user_id=user_id, tenant_id=tenant_id)
+        post_record = self._post_record(blog_data, user_id, tenant_id)
+        write_behind.add('blog_posts', post_record)
+        return post_record
+
+    def queue_generation_log(self, log_data, user_id=None, tenant_id=None):
+        write_behind = get_write_behind()
+        if not write_behind:
+            return self.save_generation_log(log_data, user_id=user_id, tenant_id=tenant_id)
+        log_record = self._log_record(log_data, user_id, tenant_id)
+        write_behind.add('generation_logs', log_record)
+        return log_record
+
     def get_generation_stats(self, user_id=None, tenant_id=None):
+        """Generation totals from the generation_rollups table; see supabase_schema.sql."""
         try:
-            query = self._db_client.table('generation_logs').select('*')
             tenant_id = normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
-            if user_id:
-                query = query.eq('user_id', user_id)
-            query = query.eq('tenant_id', tenant_id)
-
-            result = query.execute()
-            if not result.data:
+            try:
+                rows = self._rollup_rows('generation_rollups', [str(user_id)] if user_id else None, tenant_id)
+            except Exception as e:
+                print(f"Generation rollups unavailable, scanning logs: {e}")
+                return self._scan_generation_stats(user_id, tenant_id)
+
+            total_generations = sum(row.get('total_generations') or 0 for row in rows)
+            if total_generations <= 0:
                 return None
-
-            logs = result.data
-            total_generations = len(logs)
-            successful = sum(1 for l in logs if l.get('success', True))
+            successful = sum(row.get('successful_generations') or 0 for row in rows)
 
             templates_used = {}
             models_used = {}
-            for log in logs:
-                template = log.get('template', 'default')
-                templates_used[template] = templates_used.get(template, 0) + 1
-                model = log.get('model_used', 'unknown')
-                if model:
-                    models_used[model] = models_used.get(model, 0) + 1
-
-            top_model = max(models_used, key=models_used.get) if models_used else None
-
-            return {
-                'total_generations': total_generations,
-                'successful_generations': successful,
-                'failed_generations': total_generations - successful,
-                'success_rate': round((successful / total_generations * 100), 1) if total_generations > 0 else 0,
-                'templates_used': templates_used,
-                'models_used': models_used,
-                'top_model': top_model,
-            }
+            for row in rows:
+                for template, count in (row.get('templates_used') or {}).items():
+                    templates_used[template] = templates_used.get(template, 0) + count
+                for model, count in (row.get('models_used') or {}).items():
+                    models_used[model] = models_used.get(model, 0) + count
+            templates_used = {template: count for template, count in templates_used.items() if count > 0}
+            models_used = {model: count for model, count in models_used.items() if count > 0}
+
+            return self._generation_stats(total_generations, successful, templates_used, models_used)
         except Exception as e:
             print(f"Error getting generation stats: {e}")
             return None
 
+    def _generation_stats(self, total_generations, successful, templates_used, models_used):
+        top_model = max(models_used, key=models_used.get) if models_used else None
+
+        return {
+            'total_generations': total_generations,
+            'successful_generations': successful,
+            'failed_generations': total_generations - successful,
+            'success_rate': round((successful / total_generations * 100), 1) if total_generations > 0 else 0,
+            'templates_used': templates_used,
+            'models_used': models_used,
+            'top_model': top_model,
+        }
+
+    def _scan_generation_stats(self, user_id, tenant_id):
+        """Fallback for databases without the rollup tables; reads the counted columns only."""
+        query = self._table('generation_logs').select('success, template, model_used')
+        if user_id:
+            query = query.eq('user_id', user_id)
+        query = query.eq('tenant_id', tenant_id)
+
+        result = query.execute()
+        if not result.data:
+            return None
+
+        logs = result.data
+        successful = sum(1 for l in logs if l.get('success', True))
+
+        templates_used = {}
+        models_used = {}
+        for log in logs:
+            template = log.get('template') or 'default'
+            templates_used[template] = templates_used.get(template, 0) + 1
+            model = log.get('model_used')
+            if model:
+                models_used[model] = models_used.get(model, 0) + 1
+
+        return self._generation_stats(len(logs), successful, templates_used, models_used)
+
+def get_write_behind():
+    """
+    The process's write-behind buffer, or None when it is disabled or there is no
+    service-role client: anon-key inserts need the user's token, which cannot be
+    replayed later.
+    """
+    if not write_behind_enabled():
+        return None
+    pool = get_supabase_pool()
+    if not pool.service_client:
+        return None
+    return get_write_behind_buffer(pool.insert_records, is_rejected_write)
 
 def get_supabase_manager():
+    """
+    Within a request, one SupabaseManager is shared by every call and released by
+    release_supabase_manager at teardown. Elsewhere each call gets its own manager,
+    which returns its client to the pool when it is garbage collected.
+    """
     try:
+        if has_request_context():
+            manager = g.get('supabase_manager')
+            if manager is None:
+                manager = g.supabase_manager = SupabaseManager()
+            else:
+                # The session may have signed in since the manager was created
+                manager.apply_request_auth()
+            return manager
         return SupabaseManager()
     except Exception as e:
         print(f"Warning: Supabase not configured: {e}")
         return None
+
+def release_supabase_manager(exc=None):
+    manager = g.pop('supabase_manager', None)
+    if manager:
+        manager.close()
@@ -42,6 +42,8 @@ CREATE INDEX IF NOT EXISTS idx_generation_logs_tenant_id ON generation_logs(tena
 
 CREATE INDEX IF NOT EXISTS idx_blog_posts_user_tenant ON blog_posts(user_id, tenant_id);
 CREATE INDEX IF NOT EXISTS idx_blog_posts_created_at ON blog_posts(created_at DESC);
+-- Keyset pagination: history and search page on (created_at, id) within a tenant's owner
+CREATE INDEX IF NOT EXISTS idx_blog_posts_tenant_user_keyset ON blog_posts(tenant_id, user_id, created_at DESC, id DESC);
 CREATE INDEX IF NOT EXISTS idx_blog_posts_title ON blog_posts USING gin(to_tsvector('english', title));
 CREATE INDEX IF NOT EXISTS idx_generation_logs_created_at ON generation_logs(created_at DESC);
 
@@ -85,3 +87,147 @@ CREATE POLICY "Users can update their own logs" ON generation_logs
 
 CREATE POLICY "Users can delete their own logs" ON generation_logs
     FOR DELETE USING (auth.uid() = user_id);
+
+-- Analytics rollups per tenant and owner, kept current by triggers so /analytics
+-- reads a few rows instead of every post and log. owner_key is the user id, or
+-- 'anonymous' for rows saved without one.
+CREATE TABLE IF NOT EXISTS post_rollups (
+    tenant_id TEXT NOT NULL,
+    owner_key TEXT NOT NULL,
+    post_count BIGINT NOT NULL DEFAULT 0,
+    total_words BIGINT NOT NULL DEFAULT 0,
+    total_engagement BIGINT NOT NULL DEFAULT 0,
+    total_seo BIGINT NOT NULL DEFAULT 0,
+    total_viral BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tenant_id, owner_key)
+);
+
+CREATE TABLE IF NOT EXISTS generation_rollups (
+    tenant_id TEXT NOT NULL,
+    owner_key TEXT NOT NULL,
+    total_generations BIGINT NOT NULL DEFAULT 0,
+    successful_generations BIGINT NOT NULL DEFAULT 0,
+    templates_used JSONB NOT NULL DEFAULT '{}'::jsonb,
+    models_used JSONB NOT NULL DEFAULT '{}'::jsonb,
+    PRIMARY KEY (tenant_id, owner_key)
+);
+
+CREATE OR REPLACE FUNCTION apply_post_rollup(p_tenant TEXT, p_user UUID, p_sign INTEGER, p_words INTEGER,
+                                             p_engagement INTEGER, p_seo INTEGER, p_viral INTEGER)
+RETURNS VOID AS $$
+BEGIN
+    INSERT INTO post_rollups AS r (tenant_id, owner_key, post_count, total_words, total_engagement, total_seo, total_viral)
+    VALUES (COALESCE(p_tenant, 'legacy'), COALESCE(p_user::text, 'anonymous'), p_sign,
+            p_sign * COALESCE(p_words, 0), p_sign * COALESCE(p_engagement, 0),
+            p_sign * COALESCE(p_seo, 0), p_sign * COALESCE(p_viral, 0))
+    ON CONFLICT (tenant_id, owner_key) DO UPDATE SET
+        post_count = r.post_count + EXCLUDED.post_count,
+        total_words = r.total_words + EXCLUDED.total_words,
+        total_engagement = r.total_engagement + EXCLUDED.total_engagement,
+        total_seo = r.total_seo + EXCLUDED.total_seo,
+        total_viral = r.total_viral + EXCLUDED.total_viral;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION update_post_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM apply_post_rollup(OLD.tenant_id, OLD.user_id, -1, OLD.word_count,
+                                  OLD.engagement_score, OLD.seo_score, OLD.viral_potential);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM apply_post_rollup(NEW.tenant_id, NEW.user_id, 1, NEW.word_count,
+                                  NEW.engagement_score, NEW.seo_score, NEW.viral_potential);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER;
+
+CREATE TRIGGER update_blog_posts_rollups
+AFTER INSERT OR DELETE OR UPDATE OF tenant_id, user_id, word_count, engagement_score, seo_score, viral_potential
+ON blog_posts FOR EACH ROW EXECUTE FUNCTION update_post_rollups();
+
+CREATE OR REPLACE FUNCTION apply_generation_rollup(p_tenant TEXT, p_user UUID, p_sign INTEGER, p_success BOOLEAN,
+                                                   p_template TEXT, p_model TEXT)
+RETURNS VOID AS $$
+DECLARE
+    template_key TEXT := COALESCE(p_template, 'default');
+BEGIN
+    INSERT INTO generation_rollups AS r (tenant_id, owner_key, total_generations, successful_generations,
+                                         templates_used, models_used)
+    VALUES (COALESCE(p_tenant, 'legacy'), COALESCE(p_user::text, 'anonymous'), p_sign,
+            CASE WHEN p_success THEN p_sign ELSE 0 END,
+            jsonb_build_object(template_key, p_sign),
+            CASE WHEN p_model IS NULL THEN '{}'::jsonb ELSE jsonb_build_object(p_model, p_sign) END)
+    ON CONFLICT (tenant_id, owner_key) DO UPDATE SET
+        total_generations = r.total_generations + EXCLUDED.total_generations,
+        successful_generations = r.successful_generations + EXCLUDED.successful_generations,
+        templates_used = jsonb_set(r.templates_used, ARRAY[template_key],
+                                   to_jsonb(COALESCE((r.templates_used->>template_key)::bigint, 0) + p_sign)),
+        models_used = CASE WHEN p_model IS NULL THEN r.models_used
+                      ELSE jsonb_set(r.models_used, ARRAY[p_model],
+                                     to_jsonb(COALESCE((r.models_used->>p_model)::bigint, 0) + p_sign)) END;
+END;
+$$ language 'plpgsql';
+
+CREATE OR REPLACE FUNCTION update_generation_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        PERFORM apply_generation_rollup(OLD.tenant_id, OLD.user_id, -1, OLD.success, OLD.template, OLD.model_used);
+    ELSE
+        PERFORM apply_generation_rollup(NEW.tenant_id, NEW.user_id, 1, NEW.success, NEW.template, NEW.model_used);
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql' SECURITY DEFINER;
+
+CREATE TRIGGER update_generation_logs_rollups
+AFTER INSERT OR DELETE ON generation_logs
+FOR EACH ROW EXECUTE FUNCTION update_generation_rollups();
+
+-- Backfill (or repair) the rollups from existing rows; safe to re-run
+INSERT INTO post_rollups (tenant_id, owner_key, post_count, total_words, total_engagement, total_seo, total_viral)
+SELECT COALESCE(tenant_id, 'legacy'), COALESCE(user_id::text, 'anonymous'), COUNT(*),
+       COALESCE(SUM(word_count), 0), COALESCE(SUM(engagement_score), 0),
+       COALESCE(SUM(seo_score), 0), COALESCE(SUM(viral_potential), 0)
+FROM blog_posts GROUP BY 1, 2
+ON CONFLICT (tenant_id, owner_key) DO UPDATE SET
+    post_count = EXCLUDED.post_count,
+    total_words = EXCLUDED.total_words,
+    total_engagement = EXCLUDED.total_engagement,
+    total_seo = EXCLUDED.total_seo,
+    total_viral = EXCLUDED.total_viral;
+
+INSERT INTO generation_rollups (tenant_id, owner_key, total_generations, successful_generations,
+                                templates_used, models_used)
+SELECT t.tenant_id, t.owner_key, t.total, t.successful,
+       COALESCE((SELECT jsonb_object_agg(template_key, n) FROM (
+           SELECT COALESCE(l.template, 'default') AS template_key, COUNT(*) AS n FROM generation_logs l
+           WHERE COALESCE(l.tenant_id, 'legacy') = t.tenant_id AND COALESCE(l.user_id::text, 'anonymous') = t.owner_key
+           GROUP BY 1) templates), '{}'::jsonb),
+       COALESCE((SELECT jsonb_object_agg(model_used, n) FROM (
+           SELECT l.model_used, COUNT(*) AS n FROM generation_logs l
+           WHERE l.model_used IS NOT NULL
+             AND COALESCE(l.tenant_id, 'legacy') = t.tenant_id AND COALESCE(l.user_id::text, 'anonymous') = t.owner_key
+           GROUP BY 1) models), '{}'::jsonb)
+FROM (
+    SELECT COALESCE(tenant_id, 'legacy') AS tenant_id, COALESCE(user_id::text, 'anonymous') AS owner_key,
+           COUNT(*) AS total, COUNT(*) FILTER (WHERE success) AS successful
+    FROM generation_logs GROUP BY 1, 2
+) t
+ON CONFLICT (tenant_id, owner_key) DO UPDATE SET
+    total_generations = EXCLUDED.total_generations,
+    successful_generations = EXCLUDED.successful_generations,
+    templates_used = EXCLUDED.templates_used,
+    models_used = EXCLUDED.models_used;
+
+ALTER TABLE post_rollups ENABLE ROW LEVEL SECURITY;
+ALTER TABLE generation_rollups ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own post rollups" ON post_rollups
+    FOR SELECT USING (auth.uid()::text = owner_key);
+
+CREATE POLICY "Users can view their own generation rollups" ON generation_rollups
+    FOR SELECT USING (auth.uid()::text = owner_key);
@@ -0,0 +1,250 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from pathlib import Path
+from datetime import datetime
+from tenant_context import current_tenant_id, normalize_tenant_id
+
+from blob_store import is_blob_key
+
+TEMP_POST_MAX_AGE = 86400
+
+# Columns copied from a post's JSON into the index
+INDEX_FIELDS = ('title', 'word_count', 'engagement_score', 'seo_score', 'viral_potential', 'readability_score',
+                'reading_time')
+
+
+def _tenant_id(tenant_id=None):
+    return normalize_tenant_id(tenant_id or current_tenant_id()) or 'legacy'
+
+
+class TempPostStore:
+    """
+    Temp posts as JSON files per tenant, plus a SQLite index of their metadata.
+
+    Listing and analytics read only the index; the JSON body (with its images)
+    is parsed only when a single post is loaded. Files that appear or change
+    outside write() are picked up by sync(), which compares directory mtimes
+    with the index the first time a tenant is read in this process.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(exist_ok=True)
+        self.db_path = self.root / 'index.db'
+        self.lock = threading.Lock()
+        self.synced = set()
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS temp_posts (
+                    tenant_id TEXT NOT NULL,
+                    id TEXT NOT NULL,
+                    title TEXT,
+                    word_count INTEGER,
+                    engagement_score INTEGER,
+                    seo_score INTEGER,
+                    viral_potential INTEGER,
+                    readability_score INTEGER,
+                    reading_time TEXT,
+                    image_data TEXT,
+                    mtime REAL NOT NULL,
+                    PRIMARY KEY (tenant_id, id)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_temp_posts_mtime ON temp_posts (tenant_id, mtime DESC)')
+            self._create_rollups(conn)
+
+    def _create_rollups(self, conn):
+        """Per-tenant totals kept by triggers, so summary() reads one row."""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'temp_post_rollups'").fetchone()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS temp_post_rollups (
+                tenant_id TEXT PRIMARY KEY,
+                post_count INTEGER NOT NULL DEFAULT 0,
+                total_words INTEGER NOT NULL DEFAULT 0,
+                total_engagement INTEGER NOT NULL DEFAULT 0,
+                total_seo INTEGER NOT NULL DEFAULT 0,
+                total_viral INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        for name, event, row, sign in (('temp_posts_rollup_insert', 'INSERT', 'NEW', '+'),
+                                       ('temp_posts_rollup_delete', 'DELETE', 'OLD', '-'),
+                                       ('temp_posts_rollup_update_old', 'UPDATE', 'OLD', '-'),
+                                       ('temp_posts_rollup_update_new', 'UPDATE', 'NEW', '+')):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON temp_posts
+                BEGIN
+                    -- Not INSERT OR IGNORE: an outer statement's conflict policy would override it
+                    INSERT INTO temp_post_rollups (tenant_id) SELECT {row}.tenant_id
+                    WHERE NOT EXISTS (SELECT 1 FROM temp_post_rollups WHERE tenant_id = {row}.tenant_id);
+                    UPDATE temp_post_rollups SET
+                        post_count = post_count {sign} 1,
+                        total_words = total_words {sign} COALESCE({row}.word_count, 0),
+                        total_engagement = total_engagement {sign} COALESCE({row}.engagement_score, 0),
+                        total_seo = total_seo {sign} COALESCE({row}.seo_score, 0),
+                        total_viral = total_viral {sign} COALESCE({row}.viral_potential, 0)
+                    WHERE tenant_id = {row}.tenant_id;
+                END
+            ''')
+        if not exists:
+            # Index rows written before the rollups existed
+            conn.execute('''
+                INSERT OR REPLACE INTO temp_post_rollups
+                SELECT tenant_id, COUNT(*), COALESCE(SUM(word_count), 0), COALESCE(SUM(engagement_score), 0),
+                       COALESCE(SUM(seo_score), 0), COALESCE(SUM(viral_potential), 0)
+                FROM temp_posts GROUP BY tenant_id
+            ''')
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def tenant_dir(self, tenant_id=None):
+        tenant_dir = self.root / _tenant_id(tenant_id)
+        tenant_dir.mkdir(parents=True, exist_ok=True)
+        return tenant_dir
+
+    def path(self, post_id, tenant_id=None):
+        return self.tenant_dir(tenant_id) / f'{post_id}.json'
+
+    def _index_row(self, tenant_id, post_id, post, mtime):
+        image = post.get('image_data')
+        return {
+            'tenant_id': tenant_id,
+            'id': post_id,
+            **{field: post.get(field) for field in INDEX_FIELDS},
+            # Only blob keys are worth keeping; legacy base64 images stay in the body
+            'image_data': image if is_blob_key(image) else None,
+            'mtime': mtime
+        }
+
+    def _upsert(self, conn, row):
+        columns = ', '.join(row)
+        placeholders = ', '.join(f':{column}' for column in row)
+        # An upsert rather than INSERT OR REPLACE, whose implicit delete would skip the rollup triggers
+        updates = ', '.join(f'{column} = excluded.{column}' for column in row if column not in ('tenant_id', 'id'))
+        conn.execute(f'INSERT INTO temp_posts ({columns}) VALUES ({placeholders}) '
+                     f'ON CONFLICT (tenant_id, id) DO UPDATE SET {updates}', row)
+
+    def write(self, post_id, post, tenant_id=None):
+        tenant_id = _tenant_id(tenant_id)
+        path = self.path(post_id, tenant_id)
+        tmp_path = path.with_name(f'{path.name}.{uuid.uuid4().hex}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(post, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        with self._connect() as conn:
+            self._upsert(conn, self._index_row(tenant_id, post_id, post, path.stat().st_mtime))
+        return path
+
+    def load(self, post_id, tenant_id=None):
+        path = self.path(post_id, tenant_id)
+        if not path.exists():
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def delete(self, post_id, tenant_id=None):
+        tenant_id = _tenant_id(tenant_id)
+        self.path(post_id, tenant_id).unlink(missing_ok=True)
+        with self._connect() as conn:
+            conn.execute('DELETE FROM temp_posts WHERE tenant_id = ? AND id = ?', (tenant_id, post_id))
+
+    def sync(self, tenant_id=None):
+        """Reconcile the index with the tenant directory, parsing only new or changed files."""
+        tenant_id = _tenant_id(tenant_id)
+        on_disk = {}
+        with os.scandir(self.tenant_dir(tenant_id)) as entries:
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith('.json'):
+                    on_disk[entry.name[:-5]] = (Path(entry.path), entry.stat().st_mtime)
+
+        with self._connect() as conn:
+            indexed = dict(conn.execute('SELECT id, mtime FROM temp_posts WHERE tenant_id = ?', (tenant_id,)).fetchall())
+            stale = [post_id for post_id in indexed if post_id not in on_disk]
+            conn.executemany('DELETE FROM temp_posts WHERE tenant_id = ? AND id = ?',
+                             [(tenant_id, post_id) for post_id in stale])
+            changed = 0
+            for post_id, (path, mtime) in on_disk.items():
+                if indexed.get(post_id) == mtime:
+                    continue
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        post = json.load(f)
+                except Exception as e:
+                    print(f"[TempPosts] Error reading {path}: {e}")
+                    continue
+                self._upsert(conn, self._index_row(tenant_id, post_id, post, mtime))
+                changed += 1
+        if stale or changed:
+            print(f"[TempPosts] Synced index for {tenant_id}: {changed} indexed, {len(stale)} removed")
+
+    def _ensure_synced(self, tenant_id):
+        with self.lock:
+            if tenant_id in self.synced:
+                return
+            self.synced.add(tenant_id)
+        self.sync(tenant_id)
+
+    def list(self, limit=50, offset=0, tenant_id=None):
+        """Index rows for the newest posts, without parsing their bodies."""
+        tenant_id = _tenant_id(tenant_id)
+        self._ensure_synced(tenant_id)
+        with self._connect() as conn:
+            rows = conn.execute(
+                'SELECT * FROM temp_posts WHERE tenant_id = ? ORDER BY mtime DESC LIMIT ? OFFSET ?',
+                (tenant_id, limit, offset)
+            ).fetchall()
+        posts = []
+        for row in rows:
+            post = dict(row)
+            post['created_at'] = datetime.fromtimestamp(post.pop('mtime')).isoformat()
+            post.pop('tenant_id')
+            posts.append(post)
+        return posts
+
+    def summary(self, tenant_id=None):
+        tenant_id = _tenant_id(tenant_id)
+        self._ensure_synced(tenant_id)
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM temp_post_rollups WHERE tenant_id = ?', (tenant_id,)).fetchone()
+        total_posts = row['post_count'] if row else 0
+        if total_posts <= 0:
+            return {'total_posts': 0, 'total_words': 0, 'avg_engagement': 0, 'avg_seo': 0, 'avg_viral': 0}
+        return {
+            'total_posts': total_posts,
+            'total_words': row['total_words'],
+            'avg_engagement': row['total_engagement'] / total_posts,
+            'avg_seo': row['total_seo'] / total_posts,
+            'avg_viral': row['total_viral'] / total_posts
+        }
+
+    def prune(self, max_age=TEMP_POST_MAX_AGE):
+        """Delete temp posts older than max_age, including legacy files in the root directory."""
+        cutoff = time.time() - max_age
+        removed = 0
+        for path in list(self.root.glob('*.json')) + list(self.root.glob('*/*.json')):
+            if path.stat().st_mtime < cutoff:
+                path.unlink(missing_ok=True)
+                removed += 1
+        with self._connect() as conn:
+            conn.execute('DELETE FROM temp_posts WHERE mtime < ?', (cutoff,))
+        return removed
+
+
+_temp_post_store = None
+_temp_post_store_lock = threading.Lock()
+
+
+def get_temp_post_store(root=None):
+    global _temp_post_store
+    if _temp_post_store is None:
+        with _temp_post_store_lock:
+            if _temp_post_store is None:
+                _temp_post_store = TempPostStore(root or Path(__file__).parent / 'temp_posts')
+    return _temp_post_store
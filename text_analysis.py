@@ -0,0 +1,295 @@
+import re
+from collections import Counter
+from functools import cached_property, lru_cache
+
+SENTENCE_SPLIT_RE = re.compile(r'[.!?]+')
+ALPHA_WORD_RE = re.compile(r'\b[a-z]{4,}\b')
+WORD_TOKEN_RE = re.compile(r'\b\w+\b')
+PUNCTUATION_RE = re.compile(r'[^\w\s]')
+H1_H3_RE = re.compile(r'^#{1,3}\s', re.MULTILINE)
+H2_H3_RE = re.compile(r'^#{2,3}\s', re.MULTILINE)
+LIST_ITEM_RE = re.compile(r'^\d+\.|^[-*]', re.MULTILINE)
+BULLET_OR_NUMBERED_RE = re.compile(r'^\*\s|^\d+\.\s', re.MULTILINE)
+LINK_RE = re.compile(r'https?://')
+
+VOWELS = 'aeiouy'
+PARAGRAPH_SEPARATOR = '\n\n'
+SECTION_CACHE_SIZE = 2048
+
+
+@lru_cache(maxsize=65536)
+def count_syllables(word):
+    word = word.lower()
+    syllable_count = 0
+    previous_was_vowel = False
+
+    for char in word:
+        is_vowel = char in VOWELS
+        if is_vowel and not previous_was_vowel:
+            syllable_count += 1
+        previous_was_vowel = is_vowel
+
+    if word.endswith('e'):
+        syllable_count -= 1
+    if word.endswith('le') and len(word) > 2 and word[-3] not in VOWELS:
+        syllable_count += 1
+    if syllable_count == 0:
+        syllable_count = 1
+
+    return syllable_count
+
+
+def split_sentences(text):
+    return [s.strip() for s in SENTENCE_SPLIT_RE.split(text) if s.strip()]
+
+
+def split_sections(text):
+    """
+    Split a post into sections at paragraphs that start with a heading.
+
+    Sections are joined back with a blank line, so
+    '\\n\\n'.join(split_sections(text)) == text.
+    """
+    sections = []
+    current = []
+    for paragraph in text.split(PARAGRAPH_SEPARATOR):
+        if current and paragraph.startswith('#'):
+            sections.append(PARAGRAPH_SEPARATOR.join(current))
+            current = []
+        current.append(paragraph)
+    sections.append(PARAGRAPH_SEPARATOR.join(current))
+    return sections
+
+
+def _trailing_matches(pattern, text):
+    # Matches that only appear once the blank line after the section follows it
+    return len(pattern.findall(text + '\n')) - len(pattern.findall(text))
+
+
+class SectionStats:
+    """Additive statistics for one section, merged by TextDocument."""
+
+    def __init__(self, text):
+        self.text = text
+        self.counts = {}
+
+    @cached_property
+    def words(self):
+        return self.text.split()
+
+    @cached_property
+    def word_count(self):
+        return len(self.words)
+
+    @cached_property
+    def syllable_count(self):
+        return sum(count_syllables(word) for word in self.words)
+
+    @cached_property
+    def sentence_pieces(self):
+        # Word counts of every raw split piece, empty ones included, so the
+        # first and last piece can be joined with the neighbouring sections
+        return [len(piece.split()) for piece in SENTENCE_SPLIT_RE.split(self.text)]
+
+    @cached_property
+    def paragraphs(self):
+        return self.text.split(PARAGRAPH_SEPARATOR)
+
+    @cached_property
+    def short_paragraph_count(self):
+        return sum(1 for p in self.paragraphs if len(p.split()) < 50)
+
+    @cached_property
+    def body_paragraph_sentence_counts(self):
+        counts = []
+        for para in self.paragraphs:
+            stripped = para.strip()
+            if stripped and not stripped.startswith('#'):
+                counts.append(sum(1 for s in SENTENCE_SPLIT_RE.split(para) if s.strip()))
+        return counts
+
+    @cached_property
+    def h1_h3(self):
+        return len(H1_H3_RE.findall(self.text)), _trailing_matches(H1_H3_RE, self.text)
+
+    @cached_property
+    def h2_h3(self):
+        return len(H2_H3_RE.findall(self.text)), _trailing_matches(H2_H3_RE, self.text)
+
+    @cached_property
+    def bullet_or_numbered(self):
+        return (len(BULLET_OR_NUMBERED_RE.findall(self.text)),
+                _trailing_matches(BULLET_OR_NUMBERED_RE, self.text))
+
+    @cached_property
+    def has_lists(self):
+        return bool(LIST_ITEM_RE.search(self.text))
+
+    @cached_property
+    def link_count(self):
+        return len(LINK_RE.findall(self.text))
+
+    @cached_property
+    def lower(self):
+        return self.text.lower()
+
+    @cached_property
+    def alpha_word_counter(self):
+        return Counter(ALPHA_WORD_RE.findall(self.lower))
+
+    @cached_property
+    def token_counter(self):
+        return Counter(WORD_TOKEN_RE.findall(self.lower))
+
+    @cached_property
+    def bare_word_counter(self):
+        return Counter(PUNCTUATION_RE.sub('', self.lower).split())
+
+    def count(self, substring):
+        if substring not in self.counts:
+            self.counts[substring] = self.text.count(substring)
+        return self.counts[substring]
+
+
+@lru_cache(maxsize=SECTION_CACHE_SIZE)
+def section_stats(section_text):
+    """Return memoized SectionStats; unchanged sections are never re-scanned."""
+    return SectionStats(section_text)
+
+
+def _merge_counters(counters):
+    merged = Counter()
+    for counter in counters:
+        merged.update(counter)
+    return merged
+
+
+class TextDocument:
+    """
+    Tokenized view of one post shared by every scoring module.
+
+    The post is split into heading sections and every statistic is merged
+    from per-section results held in the section_stats cache, so after an
+    editor rewrites one section only that section is scanned again. The
+    merged values are identical to scanning the whole text. Module-specific
+    results can be kept in `derived`.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.derived = {}
+
+    @cached_property
+    def sections(self):
+        return [section_stats(section) for section in split_sections(self.text)]
+
+    def _sum(self, attribute):
+        return sum(getattr(section, attribute) for section in self.sections)
+
+    def _sum_with_trailing(self, attribute):
+        # The last section has no blank line after it
+        pairs = [getattr(section, attribute) for section in self.sections]
+        return sum(count for count, _ in pairs) + sum(extra for _, extra in pairs[:-1])
+
+    @cached_property
+    def word_count(self):
+        return self._sum('word_count')
+
+    @cached_property
+    def syllable_count(self):
+        return self._sum('syllable_count')
+
+    @cached_property
+    def sentence_lengths(self):
+        pieces = []
+        for section in self.sections:
+            section_pieces = section.sentence_pieces
+            if pieces:
+                pieces[-1] += section_pieces[0]
+                pieces.extend(section_pieces[1:])
+            else:
+                pieces.extend(section_pieces)
+        return [length for length in pieces if length]
+
+    @cached_property
+    def sentence_count(self):
+        return len(self.sentence_lengths)
+
+    @cached_property
+    def paragraph_count(self):
+        return sum(len(section.paragraphs) for section in self.sections)
+
+    @cached_property
+    def short_paragraph_count(self):
+        return self._sum('short_paragraph_count')
+
+    @cached_property
+    def body_paragraph_sentence_counts(self):
+        counts = []
+        for section in self.sections:
+            counts.extend(section.body_paragraph_sentence_counts)
+        return counts
+
+    @cached_property
+    def h1_h3_count(self):
+        return self._sum_with_trailing('h1_h3')
+
+    @cached_property
+    def h2_h3_count(self):
+        return self._sum_with_trailing('h2_h3')
+
+    @cached_property
+    def bullet_or_numbered_count(self):
+        return self._sum_with_trailing('bullet_or_numbered')
+
+    @cached_property
+    def has_lists(self):
+        return any(section.has_lists for section in self.sections)
+
+    @cached_property
+    def link_count(self):
+        return self._sum('link_count')
+
+    @cached_property
+    def alpha_word_counter(self):
+        return _merge_counters(section.alpha_word_counter for section in self.sections)
+
+    @cached_property
+    def token_counter(self):
+        return _merge_counters(section.token_counter for section in self.sections)
+
+    @cached_property
+    def bare_word_counter(self):
+        return _merge_counters(section.bare_word_counter for section in self.sections)
+
+    def count(self, substring):
+        key = ('count', substring)
+        if key not in self.derived:
+            total = sum(section.count(substring) for section in self.sections)
+            edge = len(substring) - 1
+            if edge > 0:
+                # Occurrences that straddle the blank line between sections
+                for before, after in zip(self.sections, self.sections[1:]):
+                    tail = before.text[-edge:]
+                    head = after.text[:edge]
+                    joined = tail + PARAGRAPH_SEPARATOR + head
+                    total += joined.count(substring) - tail.count(substring) - head.count(substring)
+            self.derived[key] = total
+        return self.derived[key]
+
+
+@lru_cache(maxsize=16)
+def analyze_text(text):
+    """Return the shared TextDocument for text, reusing it across callers."""
+    return TextDocument(text)
+
+
+def get_document(text_or_document):
+    if isinstance(text_or_document, TextDocument):
+        return text_or_document
+    return analyze_text(text_or_document or '')
+
+
+def clear_cache():
+    analyze_text.cache_clear()
+    section_stats.cache_clear()
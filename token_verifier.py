@@ -0,0 +1,157 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import jwt
+    from jwt import PyJWKClient
+    JWT_AVAILABLE = True
+except ImportError:
+    jwt = None
+    PyJWKClient = None
+    JWT_AVAILABLE = False
+
+TOKEN_CACHE_SECONDS = int(os.environ.get('AUTH_TOKEN_CACHE_SECONDS', 60))
+TOKEN_CACHE_SIZE = 2048
+JWKS_CACHE_SECONDS = int(os.environ.get('AUTH_JWKS_CACHE_SECONDS', 600))
+REVOCATION_CHECK_SECONDS = int(os.environ.get('AUTH_REVOCATION_CHECK_SECONDS', 300))
+ASYMMETRIC_ALGORITHMS = ['RS256', 'ES256', 'EdDSA']
+LEEWAY_SECONDS = 10
+
+
+def local_auth_enabled():
+    return os.environ.get('AUTH_LOCAL_VERIFY', 'true').lower() == 'true'
+
+
+class VerifiedUser:
+    """The parts of a Supabase user that live in its access token's claims."""
+
+    def __init__(self, claims):
+        self.claims = claims
+        self.id = claims['sub']
+        self.email = claims.get('email')
+        self.role = claims.get('role')
+        self.user_metadata = claims.get('user_metadata') or {}
+        self.app_metadata = claims.get('app_metadata') or {}
+
+
+def _token_key(token):
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+class TokenVerifier:
+    """
+    Verifies Supabase access tokens without calling Supabase Auth.
+
+    Asymmetrically signed tokens are checked against the project's JWKS
+    (fetched once and cached for JWKS_CACHE_SECONDS, refetched for an unknown
+    kid); legacy HS256 tokens against SUPABASE_JWT_SECRET. Verified tokens are
+    cached for TOKEN_CACHE_SECONDS, never past their exp. verify() returns None
+    whenever a token cannot be verified locally, and callers fall back to
+    the remote check.
+    """
+
+    def __init__(self, supabase_url, jwt_secret=None):
+        base = supabase_url.rstrip('/')
+        self.issuer = f"{base}/auth/v1"
+        self.jwt_secret = jwt_secret
+        self.jwks_client = PyJWKClient(f"{self.issuer}/.well-known/jwks.json", cache_jwk_set=True,
+                                       lifespan=JWKS_CACHE_SECONDS)
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.remote_checked = {}
+        self.stats = {'cache_hits': 0, 'verified': 0, 'rejected': 0, 'remote_checks': 0}
+
+    def _count(self, stat):
+        with self.lock:
+            self.stats[stat] += 1
+
+    def _decode(self, token):
+        header = jwt.get_unverified_header(token)
+        algorithm = header.get('alg')
+        if algorithm == 'HS256':
+            if not self.jwt_secret:
+                return None
+            key = self.jwt_secret
+        elif algorithm in ASYMMETRIC_ALGORITHMS:
+            key = self.jwks_client.get_signing_key_from_jwt(token).key
+        else:
+            return None
+        return jwt.decode(token, key, algorithms=[algorithm], audience='authenticated', issuer=self.issuer,
+                          leeway=LEEWAY_SECONDS, options={'require': ['exp', 'sub']})
+
+    def verify(self, token):
+        key = _token_key(token)
+        now = time.time()
+        with self.lock:
+            cached = self.cache.get(key)
+            if cached and cached[1] > now:
+                self.cache.move_to_end(key)
+                self.stats['cache_hits'] += 1
+                return cached[0]
+            self.cache.pop(key, None)
+
+        try:
+            claims = self._decode(token)
+        except jwt.PyJWKClientError as e:
+            print(f"[Auth] JWKS unavailable, falling back to remote check: {e}")
+            return None
+        except jwt.InvalidTokenError as e:
+            self._count('rejected')
+            print(f"[Auth] Token rejected locally: {e}")
+            return None
+        if not claims:
+            return None
+
+        user = VerifiedUser(claims)
+        with self.lock:
+            self.stats['verified'] += 1
+            self.cache[key] = (user, min(now + TOKEN_CACHE_SECONDS, claims['exp']))
+            while len(self.cache) > TOKEN_CACHE_SIZE:
+                evicted, _ = self.cache.popitem(last=False)
+                self.remote_checked.pop(evicted, None)
+        return user
+
+    def needs_remote_check(self, token):
+        """Whether the token is due a round trip to Supabase Auth to catch revoked sessions."""
+        with self.lock:
+            checked_at = self.remote_checked.get(_token_key(token))
+        return checked_at is None or time.time() - checked_at > REVOCATION_CHECK_SECONDS
+
+    def mark_remote_checked(self, token):
+        with self.lock:
+            self.stats['remote_checks'] += 1
+            self.remote_checked[_token_key(token)] = time.time()
+            while len(self.remote_checked) > TOKEN_CACHE_SIZE:
+                self.remote_checked.pop(next(iter(self.remote_checked)))
+
+    def invalidate(self, token):
+        key = _token_key(token)
+        with self.lock:
+            self.cache.pop(key, None)
+            self.remote_checked.pop(key, None)
+
+    def get_stats(self):
+        with self.lock:
+            return {**self.stats, 'cached_tokens': len(self.cache)}
+
+
+_token_verifier = None
+_token_verifier_lock = threading.Lock()
+
+
+def get_token_verifier():
+    """The process-wide verifier, or None when PyJWT or SUPABASE_URL is missing or it is disabled."""
+    global _token_verifier
+    if not JWT_AVAILABLE or not local_auth_enabled():
+        return None
+    if _token_verifier is None:
+        with _token_verifier_lock:
+            if _token_verifier is None:
+                supabase_url = os.environ.get('SUPABASE_URL')
+                if not supabase_url:
+                    return None
+                _token_verifier = TokenVerifier(supabase_url, os.environ.get('SUPABASE_JWT_SECRET'))
+    return _token_verifier
@@ -3,6 +3,8 @@ import re
 import google.auth
 from urllib.parse import urlparse, parse_qs
 
+from text_analysis import get_document
+
 def get_project_id():
     project_id = os.getenv('PROJECT_ID')
     if project_id:
@@ -40,7 +42,7 @@ def extract_title_from_markdown(markdown_text):
     return default_title
 
 def estimate_reading_time(text):
-    words = len(text.split())
+    words = get_document(text).word_count
     minutes = max(1, round(words / 200))
     return f"{minutes} min read"
 
@@ -110,17 +112,16 @@ def convert_mermaid_to_html(markdown_text):
     return result
 
 def calculate_engagement_score(text):
+    doc = get_document(text)
     score = 0
-    paragraphs = text.split('\n\n')
-    if len(paragraphs) >= 8:
+    if doc.paragraph_count >= 8:
         score += 10
-    short_paragraphs = sum(1 for p in paragraphs if len(p.split()) < 50)
-    score += min(20, short_paragraphs * 2)
-    bold_count = text.count('**')
+    score += min(20, doc.short_paragraph_count * 2)
+    bold_count = doc.count('**')
     score += min(15, bold_count)
-    questions = text.count('?')
+    questions = doc.count('?')
     score += min(15, questions * 2)
-    words = len(text.split())
+    words = doc.word_count
     if 1000 <= words <= 1500:
         score += 25
     elif 800 <= words <= 2400:
@@ -129,11 +130,11 @@ def calculate_engagement_score(text):
         score += 15
     else:
         score += 5
-    subheadings = text.count('##')
+    subheadings = doc.count('##')
     if 4 <= subheadings <= 7:
         score += 15
     else:
         score += 5
-    quotes = text.count('>')
+    quotes = doc.count('>')
     score += min(10, quotes * 3)
     return min(100, score)
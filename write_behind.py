@@ -0,0 +1,234 @@
+import os
+import json
+import time
+import uuid
+import atexit
+import threading
+from pathlib import Path
+from queue import Queue, Full, Empty
+
+SPOOL_DIR = Path(os.environ.get('WRITE_BEHIND_SPOOL_PATH') or Path(__file__).parent / 'write_behind_spool')
+MAX_PENDING = int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 1000))
+BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 50))
+FLUSH_SECONDS = float(os.environ.get('WRITE_BEHIND_FLUSH_SECONDS', 1.0))
+MAX_RETRIES = 3
+RETRY_BASE_SECONDS = 0.5
+SPOOL_REPLAY_SECONDS = 30
+SPOOL_MAX_ATTEMPTS = 20
+# A claimed spool file this old belongs to a process that died mid-replay
+STALE_CLAIM_SECONDS = 600
+
+
+def write_behind_enabled():
+    return os.environ.get('WRITE_BEHIND', 'true').lower() == 'true'
+
+
+class WriteBehindBuffer:
+    """
+    Persists database inserts off the request path.
+
+    add() queues a record in memory (at most max_pending) and returns at once.
+    A flusher thread groups queued records by table and inserts them in
+    batches, retrying with backoff. When is_rejected(error) says the database
+    refused the rows themselves, the batch is bisected until the offending
+    records are isolated, and only those go to spool/dead. Batches that still
+    fail for other reasons (connectivity, 5xx), and records that arrive while
+    the buffer is full, go to a spool directory as JSON files that are replayed
+    every SPOOL_REPLAY_SECONDS; a file that keeps failing is moved to spool/dead.
+    insert(table, records) must be idempotent on the record ids, because a
+    replayed batch may have been partly written.
+    """
+
+    def __init__(self, insert, spool_dir=SPOOL_DIR, max_pending=MAX_PENDING, batch_size=BATCH_SIZE,
+                 flush_seconds=FLUSH_SECONDS, is_rejected=None):
+        self.insert = insert
+        self.is_rejected = is_rejected or (lambda error: False)
+        self.spool_dir = Path(spool_dir)
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_seconds = flush_seconds
+        self.queue = Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.stats = {'queued': 0, 'written': 0, 'batches': 0, 'retries': 0, 'spooled': 0, 'replayed': 0,
+                      'rejected': 0, 'dead': 0}
+        self.last_replay = 0.0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def _count(self, stat, amount=1):
+        with self.lock:
+            self.stats[stat] += amount
+
+    def add(self, table, record):
+        try:
+            self.queue.put_nowait((table, record))
+            self._count('queued')
+        except Full:
+            print(f"[WriteBehind] Buffer full, spooling {table} record")
+            self._spool(table, [record])
+
+    def _run(self):
+        while self.running:
+            items = self._collect()
+            if items:
+                self._flush(items)
+            if time.monotonic() - self.last_replay > SPOOL_REPLAY_SECONDS:
+                self._replay_spool()
+
+    def _collect(self):
+        """Wait for a record, then gather more until the batch is full or flush_seconds pass."""
+        try:
+            items = [self.queue.get(timeout=self.flush_seconds)]
+        except Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(items) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self.queue.get(timeout=remaining))
+            except Empty:
+                break
+        return items
+
+    def _flush(self, items):
+        by_table = {}
+        for table, record in items:
+            by_table.setdefault(table, []).append(record)
+        for table, records in by_table.items():
+            unwritten = self._insert_with_retry(table, records)
+            if unwritten:
+                self._spool(table, unwritten)
+
+    def _insert_with_retry(self, table, records, attempts=MAX_RETRIES):
+        """Insert records and return those still unwritten after transient failures."""
+        for attempt in range(attempts):
+            try:
+                self.insert(table, records)
+                with self.lock:
+                    self.stats['written'] += len(records)
+                    self.stats['batches'] += 1
+                return []
+            except Exception as e:
+                if self.is_rejected(e):
+                    if len(records) == 1:
+                        self._count('rejected')
+                        print(f"[WriteBehind] Database rejected a {table} record: {str(e)[:200]}")
+                        self._dead_letter(table, records, e)
+                        return []
+                    # Retrying cannot help; split until the bad record is on its own
+                    middle = len(records) // 2
+                    return (self._insert_with_retry(table, records[:middle], attempts) +
+                            self._insert_with_retry(table, records[middle:], attempts))
+                print(f"[WriteBehind] Insert of {len(records)} {table} records failed "
+                      f"(attempt {attempt + 1}/{attempts}): {str(e)[:200]}")
+                if attempt + 1 < attempts:
+                    self._count('retries')
+                    time.sleep(RETRY_BASE_SECONDS * 2 ** attempt)
+        return records
+
+    def _dead_letter(self, table, records, reason):
+        dead_dir = self.spool_dir / 'dead'
+        dead_dir.mkdir(exist_ok=True)
+        path = dead_dir / f"{table}.{int(time.time() * 1000)}.{uuid.uuid4().hex[:8]}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'table': table, 'records': records, 'error': str(reason)[:1000]}, f, ensure_ascii=False)
+        self._count('dead')
+        print(f"[WriteBehind] Gave up on {len(records)} {table} records; moved to {path}")
+
+    def _spool(self, table, records, attempts=0):
+        path = self.spool_dir / f"{table}.{int(time.time() * 1000)}.{uuid.uuid4().hex[:8]}.json"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'table': table, 'records': records, 'attempts': attempts}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._count('spooled', len(records))
+
+    def _claimable_spool_files(self):
+        now = time.time()
+        for path in sorted(self.spool_dir.glob('*.json')):
+            yield path
+        for path in self.spool_dir.glob('*.claimed'):
+            if now - path.stat().st_mtime > STALE_CLAIM_SECONDS:
+                yield path
+
+    def _replay_spool(self):
+        self.last_replay = time.monotonic()
+        for path in self._claimable_spool_files():
+            # Renaming claims the file, so concurrent processes never replay it twice
+            claimed = path.with_name(f"{path.name.split('.json')[0]}.json.{os.getpid()}.claimed")
+            try:
+                os.replace(path, claimed)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WriteBehind] Unreadable spool file {claimed.name}: {e}")
+                self._bury(claimed)
+                continue
+
+            unwritten = self._insert_with_retry(data['table'], data['records'], attempts=1)
+            self._count('replayed', len(data['records']) - len(unwritten))
+            if not unwritten:
+                claimed.unlink(missing_ok=True)
+                continue
+
+            attempts = data.get('attempts', 0) + 1
+            if attempts >= SPOOL_MAX_ATTEMPTS:
+                self._dead_letter(data['table'], unwritten, f'still failing after {attempts} replays')
+            else:
+                self._spool(data['table'], unwritten, attempts)
+            claimed.unlink(missing_ok=True)
+            # The database is still failing; try the rest next round
+            break
+
+    def _bury(self, path):
+        dead_dir = self.spool_dir / 'dead'
+        dead_dir.mkdir(exist_ok=True)
+        os.replace(path, dead_dir / path.name)
+        self._count('dead')
+        print(f"[WriteBehind] Gave up on {path.name}; moved to {dead_dir}")
+
+    def pending(self):
+        return self.queue.qsize()
+
+    def close(self):
+        """Stop the flusher and spool anything still queued so a restart replays it."""
+        if not self.running:
+            return
+        self.running = False
+        self.thread.join(timeout=self.flush_seconds + MAX_RETRIES * RETRY_BASE_SECONDS * 4)
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except Empty:
+                break
+        by_table = {}
+        for table, record in items:
+            by_table.setdefault(table, []).append(record)
+        for table, records in by_table.items():
+            self._spool(table, records)
+
+    def get_stats(self):
+        with self.lock:
+            return {**self.stats, 'pending': self.queue.qsize(),
+                    'spool_files': len(list(self.spool_dir.glob('*.json')))}
+
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind_buffer(insert, is_rejected=None):
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                _write_behind = WriteBehindBuffer(insert, is_rejected=is_rejected)
+    return _write_behind